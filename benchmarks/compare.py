@@ -0,0 +1,74 @@
+"""
+Compara dos archivos de resultados de benchmarks/run.py y regresa código 1
+si algún escenario empeoró más que el umbral en throughput, p99 o memoria.
+
+Uso:
+    python benchmarks/compare.py base.json nuevo.json --threshold 0.15
+"""
+
+import argparse
+import json
+import sys
+
+# (métrica, función para obtenerla, True si un valor mayor es mejor)
+METRICS = (
+    ("req/s", lambda r: r["requests_per_s"], True),
+    ("MB/s", lambda r: r["mb_per_s"], True),
+    ("p50 ms", lambda r: r["latency_ms"]["p50"], False),
+    ("p99 ms", lambda r: r["latency_ms"]["p99"], False),
+    ("rss growth MB", lambda r: r["rss_mb"]["growth"], False),
+)
+
+# Diferencias absolutas por debajo de estas no se consideran regresión
+MIN_DELTA = {"p50 ms": 1.0, "p99 ms": 2.0, "rss growth MB": 16.0}
+
+
+def result_key(result):
+    return result["scenario"], json.dumps(result["params"], sort_keys=True)
+
+
+def load(path):
+    with open(path) as file:
+        return {result_key(result): result for result in json.load(file)["results"]}
+
+
+def compare(base, new, threshold):
+    regressions = []
+    for key, new_result in new.items():
+        base_result = base.get(key)
+        if base_result is None:
+            continue
+        scenario, params = key
+        for name, value, higher_is_better in METRICS:
+            before, after = value(base_result), value(new_result)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            mark = ""
+            if worse > threshold and abs(after - before) >= MIN_DELTA.get(name, 0):
+                mark = "  <-- regresión"
+                regressions.append((scenario, params, name))
+            print(
+                f"{scenario:<14} {params:<45} {name:<14} "
+                f"{before:>10} -> {after:>10} ({change:+.1%}){mark}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    regressions = compare(load(args.base), load(args.new), args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regresiones por encima de {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
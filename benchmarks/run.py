@@ -0,0 +1,580 @@
+"""
+Benchmarks del servicio contra un S3 local (moto), ejecutando la app FastAPI
+en el mismo proceso con un cliente ASGI que descarta el body conforme llega.
+
+Uso:
+    python benchmarks/run.py --output bench_results.json
+    python benchmarks/run.py --quick --scenarios stream_full,bundle
+    python benchmarks/compare.py base.json bench_results.json
+
+Cada escenario reporta requests por segundo, MB/s, latencia p50/p99, tiempo
+al primer byte y el pico de memoria residente del proceso durante la corrida.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+MIB = 1024 * 1024
+KIB = 1024
+
+VIDEOS_BUCKET = "bench-videos"
+FILES_BUCKET = "bench-files"
+LIST_BUCKET_PREFIX = "bench-list-"
+JWT_SECRET_NAME = "bench/jwt"
+
+# (escenario, parámetros) para la corrida completa y para --quick
+SCENARIOS = {
+    "stream_full": {
+        "full": [{"size": 1 * MIB}, {"size": 16 * MIB}, {"size": 64 * MIB}],
+        "quick": [{"size": 1 * MIB}, {"size": 8 * MIB}],
+    },
+    "stream_ranged": {
+        "full": [{"size": 64 * MIB, "range_size": 1 * MIB, "clients": 4}],
+        "quick": [{"size": 8 * MIB, "range_size": 1 * MIB, "clients": 2}],
+    },
+    "bundle": {
+        "full": [
+            {"files": 1, "file_size": 16 * MIB},
+            {"files": 10, "file_size": 1 * MIB},
+            {"files": 100, "file_size": 64 * KIB},
+            {"files": 1000, "file_size": 4 * KIB},
+        ],
+        "quick": [
+            {"files": 10, "file_size": 256 * KIB},
+            {"files": 100, "file_size": 4 * KIB},
+        ],
+    },
+    "upload": {
+        "full": [{"size": 1 * MIB}, {"size": 16 * MIB}, {"size": 64 * MIB}],
+        "quick": [{"size": 1 * MIB}, {"size": 8 * MIB}],
+    },
+    "list_videos": {
+        "full": [
+            {"objects": 1000, "limit": 100},
+            {"objects": 10000, "limit": 100},
+            {"objects": 10000, "limit": None},
+        ],
+        "quick": [{"objects": 500, "limit": 100}, {"objects": 500, "limit": None}],
+    },
+}
+
+
+def configure_environment(caches: bool, cache_dir: str):
+    """
+    Variables de entorno que la app lee al importarse; las que ya existan se
+    respetan
+    """
+    defaults = {
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "JWT_SECRET_KEY_NAME": JWT_SECRET_NAME,
+        "S3_BUCKET_VIDEOS": VIDEOS_BUCKET,
+        "LOGGIN_LEVEL": "WARNING",
+        "VIDEO_CHUNK_CACHE_DIR": os.path.join(cache_dir, "video"),
+        "BUNDLE_CACHE_DIR": os.path.join(cache_dir, "bundle"),
+    }
+    if not caches:
+        # Sin caches se mide el trabajo completo de cada request
+        defaults.update(
+            {
+                "VIDEO_CHUNK_CACHE_ENABLED": "false",
+                "VIDEO_READ_AHEAD_ENABLED": "false",
+                "BUNDLE_CACHE_ENABLED": "false",
+            }
+        )
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+
+
+class StaticTokenVerifier:
+    """
+    Sustituye la validación JWT: los tokens emitidos por el benchmark se
+    aceptan sin verificar firma, el costo medido es el de la transferencia
+    """
+
+    def __init__(self):
+        self._claims = {}
+
+    def issue(self, claims: dict) -> str:
+        token = uuid.uuid4().hex
+        self._claims[token] = claims
+        return token
+
+    def get_claims(self, token: str):
+        return self._claims.get(token)
+
+
+class RssSampler:
+    """
+    Muestrea la memoria residente del proceso en un hilo y guarda el pico
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current() -> int:
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # Sin /proc solo se conoce el máximo desde que inició el proceso
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.current()
+        self.peak = self.baseline
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+class AsgiResult:
+    __slots__ = ("status", "bytes", "latency", "ttfb")
+
+    def __init__(self):
+        self.status = None
+        self.bytes = 0
+        self.latency = 0.0
+        self.ttfb = None
+
+
+async def asgi_request(app, method, path, query=None, headers=None, body=None):
+    """
+    Ejecuta un request contra la app ASGI sin guardar la respuesta en
+    memoria; body es un iterable de bytes que se envía por partes
+    """
+    result = AsgiResult()
+    raw_headers = [
+        (name.lower().encode(), value.encode())
+        for name, value in (headers or {}).items()
+    ]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(query or {}).encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    body_iter = iter(body or [])
+    body_done = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        nonlocal body_done
+        if not body_done:
+            chunk = next(body_iter, None)
+            if chunk is not None:
+                return {"type": "http.request", "body": chunk, "more_body": True}
+            body_done = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result.status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk and result.ttfb is None:
+                result.ttfb = time.perf_counter() - started_at
+            result.bytes += len(chunk)
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    started_at = time.perf_counter()
+    await app(scope, receive, send)
+    response_complete.set()
+    result.latency = time.perf_counter() - started_at
+    if result.ttfb is None:
+        result.ttfb = result.latency
+    return result
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(name, params, results, duration, rss, expected_status, extra=None):
+    latencies = [r.latency * 1000 for r in results]
+    ttfbs = [r.ttfb * 1000 for r in results]
+    total_bytes = sum(r.bytes for r in results)
+    errors = sum(1 for r in results if r.status not in expected_status)
+    summary = {
+        "scenario": name,
+        "params": params,
+        "requests": len(results),
+        "errors": errors,
+        "duration_s": round(duration, 4),
+        "requests_per_s": round(len(results) / duration, 2) if duration else None,
+        "bytes": total_bytes,
+        "mb_per_s": round(total_bytes / MIB / duration, 2) if duration else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(max(latencies), 3),
+        },
+        "ttfb_ms": {
+            "p50": round(percentile(ttfbs, 0.50), 3),
+            "p99": round(percentile(ttfbs, 0.99), 3),
+        },
+        "rss_mb": {
+            "baseline": round(rss.baseline / MIB, 1),
+            "peak": round(rss.peak / MIB, 1),
+            "growth": round((rss.peak - rss.baseline) / MIB, 1),
+        },
+    }
+    if extra:
+        summary.update(extra)
+    return summary
+
+
+async def run_concurrently(make_requests, concurrency):
+    """
+    Ejecuta las corrutinas de make_requests con a lo más concurrency a la vez
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(request):
+        async with semaphore:
+            return await request()
+
+    return await asyncio.gather(*(limited(request) for request in make_requests))
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.s3 = None
+        self.app_module = None
+        self.verifier = StaticTokenVerifier()
+
+    def setup(self):
+        import boto3
+        from moto import mock_aws
+
+        self._mock = mock_aws()
+        self._mock.start()
+        self.s3 = boto3.client("s3")
+        self.s3.create_bucket(Bucket=VIDEOS_BUCKET)
+        self.s3.create_bucket(Bucket=FILES_BUCKET)
+
+        # Llave JWT que la app lee de Secrets Manager
+        key = base64.b64encode(os.urandom(32)).decode()
+        boto3.client("secretsmanager").create_secret(
+            Name=JWT_SECRET_NAME,
+            SecretString=json.dumps({"kty": "oct", "kid": "bench", "k": key}),
+        )
+
+        import app as app_module
+
+        app_module.token_verifier = self.verifier
+        self.app_module = app_module
+
+    def teardown(self):
+        self._mock.stop()
+
+    def put_object(self, bucket, key, size):
+        block = os.urandom(min(size, MIB))
+        data = (block * (size // len(block) + 1))[:size] if size else b""
+        self.s3.put_object(Bucket=bucket, Key=key, Body=data)
+
+    def run(self, name, params, requests, concurrency, expected_status, extra=None):
+        app = self.app_module.app
+
+        async def main():
+            return await run_concurrently(
+                [
+                    lambda request=request: asgi_request(app, **request)
+                    for request in requests
+                ],
+                concurrency,
+            )
+
+        with RssSampler() as rss:
+            started_at = time.perf_counter()
+            results = asyncio.run(main())
+            duration = time.perf_counter() - started_at
+        return summarize(name, params, results, duration, rss, expected_status, extra)
+
+    def stream_full(self, size):
+        key = f"full/{size}.mp4"
+        self.put_object(VIDEOS_BUCKET, key, size)
+        request = {
+            "method": "GET",
+            "path": "/transfers/api/video/stream",
+            "query": {"video_path": key},
+        }
+        return self.run(
+            "stream_full",
+            {"size": size},
+            [request] * self.args.requests,
+            self.args.concurrency,
+            {200},
+        )
+
+    def stream_ranged(self, size, range_size, clients):
+        key = f"ranged/{size}.mp4"
+        self.put_object(VIDEOS_BUCKET, key, size)
+        app = self.app_module.app
+
+        async def client(client_index):
+            # Cada cliente lee el video en orden, como un reproductor
+            results = []
+            for start in range(0, size, range_size):
+                end = min(start + range_size, size) - 1
+                results.append(
+                    await asgi_request(
+                        app,
+                        "GET",
+                        "/transfers/api/video/stream",
+                        {"video_path": key},
+                        {
+                            "Range": f"bytes={start}-{end}",
+                            "User-Agent": f"bench-player-{client_index}",
+                        },
+                    )
+                )
+            return results
+
+        async def main():
+            per_client = await asyncio.gather(*(client(i) for i in range(clients)))
+            return [result for results in per_client for result in results]
+
+        with RssSampler() as rss:
+            started_at = time.perf_counter()
+            results = asyncio.run(main())
+            duration = time.perf_counter() - started_at
+        return summarize(
+            "stream_ranged",
+            {"size": size, "range_size": range_size, "clients": clients},
+            results,
+            duration,
+            rss,
+            {206},
+        )
+
+    def bundle(self, files, file_size):
+        prefix = f"bundle/{files}x{file_size}"
+        entries = []
+        for index in range(files):
+            key = f"{prefix}/file-{index}.bin"
+            self.put_object(FILES_BUCKET, key, file_size)
+            entries.append({"key": key, "fileName": f"file-{index}.bin"})
+        token = self.verifier.issue({"files": {FILES_BUCKET: [{"bench": entries}]}})
+        request = {
+            "method": "GET",
+            "path": "/transfers/api/file",
+            "headers": {"Authorization": f"Bearer {token}"},
+        }
+        return self.run(
+            "bundle",
+            {"files": files, "file_size": file_size},
+            [request] * max(1, self.args.requests // 2),
+            self.args.concurrency,
+            {200},
+        )
+
+    def upload(self, size):
+        boundary = uuid.uuid4().hex
+        block = os.urandom(64 * KIB)
+
+        def body():
+            yield (
+                f"--{boundary}\r\n"
+                'Content-Disposition: form-data; name="file"; filename="bench.bin"\r\n'
+                "Content-Type: application/octet-stream\r\n\r\n"
+            ).encode()
+            remaining = size
+            while remaining > 0:
+                chunk = block[: min(len(block), remaining)]
+                remaining -= len(chunk)
+                yield chunk
+            yield f"\r\n--{boundary}--".encode()
+
+        requests = []
+        for index in range(max(1, self.args.requests // 2)):
+            token = self.verifier.issue(
+                {"bucket": FILES_BUCKET, "key": f"upload/{size}/{index}.bin"}
+            )
+            requests.append(
+                {
+                    "method": "PUT",
+                    "path": "/transfers/api/file",
+                    "headers": {
+                        "Authorization": f"Bearer {token}",
+                        "Content-Type": f"multipart/form-data; boundary={boundary}",
+                    },
+                    "body": body(),
+                }
+            )
+        summary = self.run(
+            "upload", {"size": size}, requests, self.args.concurrency, {200}
+        )
+        # Los bytes relevantes son los recibidos, no los de la respuesta
+        summary["bytes"] = size * len(requests)
+        duration = summary["duration_s"]
+        summary["mb_per_s"] = round(summary["bytes"] / MIB / duration, 2)
+        return summary
+
+    def list_videos(self, objects, limit):
+        from infrastructure.bucket_index import BucketIndex
+
+        bucket = f"{LIST_BUCKET_PREFIX}{objects}"
+        if bucket not in {b["Name"] for b in self.s3.list_buckets()["Buckets"]}:
+            self.s3.create_bucket(Bucket=bucket)
+            for index in range(objects):
+                folder = index % 50
+                self.s3.put_object(
+                    Bucket=bucket, Key=f"folder-{folder}/video-{index}.mp4", Body=b""
+                )
+
+        self.app_module.video_index = BucketIndex(
+            bucket,
+            self.app_module.VIDEO_EXTENSIONS,
+            self.app_module.VIDEO_INDEX_REFRESH_INTERVAL,
+        )
+        query = {"prefix": "folder-1"}
+        if limit is not None:
+            query["limit"] = limit
+        request = {
+            "method": "GET",
+            "path": "/transfers/api/videos/list",
+            "query": query,
+        }
+
+        # La primera consulta carga el índice del bucket
+        cold = asyncio.run(asgi_request(self.app_module.app, **request))
+        return self.run(
+            "list_videos",
+            {"objects": objects, "limit": limit},
+            [request] * (self.args.requests * 5),
+            self.args.concurrency,
+            {200},
+            {"cold_latency_ms": round(cold.latency * 1000, 3)},
+        )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_summary(summary):
+    params = ", ".join(f"{name}={value}" for name, value in summary["params"].items())
+    print(
+        f"{summary['scenario']:<14} {params:<40} "
+        f"{summary['requests_per_s']:>9} req/s {summary['mb_per_s']:>9} MB/s "
+        f"p50 {summary['latency_ms']['p50']:>9} ms p99 {summary['latency_ms']['p99']:>9} ms "
+        f"rss {summary['rss_mb']['peak']:>7} MB errors {summary['errors']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Escenarios separados por coma: " + ", ".join(SCENARIOS),
+    )
+    parser.add_argument("--quick", action="store_true", help="Tamaños reducidos")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--caches",
+        action="store_true",
+        help="Habilita los caches de video y de bundles (por defecto se miden sin cache)",
+    )
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(unknown)}")
+
+    cache_dir = tempfile.mkdtemp(prefix="transfers-bench-")
+    configure_environment(args.caches, cache_dir)
+
+    bench = Bench(args)
+    bench.setup()
+    results = []
+    try:
+        for name in names:
+            for params in SCENARIOS[name]["quick" if args.quick else "full"]:
+                summary = getattr(bench, name)(**params)
+                print_summary(summary)
+                results.append(summary)
+    finally:
+        bench.teardown()
+
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+            "caches": args.caches,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(output, file, indent=2)
+    print(f"Resultados en {args.output}")
+    return 1 if any(summary["errors"] for summary in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
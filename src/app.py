@@ -1,52 +1,131 @@
+import asyncio
 import os
-import json
 import logging
 from typing import Optional
-import re
-import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
+from botocore.exceptions import ClientError
 
 from fastapi import (
     FastAPI,
     Header,
     HTTPException,
     status,
-    File,
-    UploadFile,
     Body,
+    Query,
     Request,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, Response
+from fastapi.responses import (
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
+from application.auth import TokenVerifier
 from application.business import business_logic
-from ds_security_validation.verification import Verification
+from application.batch_upload import ARCHIVE_FIELD
+from application.multipart_stream import iter_form_file, iter_form_files
+from application.http_range import (
+    RangeNotSatisfiable,
+    http_date,
+    if_range_matches,
+    is_not_modified,
+    parse_byte_range,
+)
+from application.video import get_video_read_ahead, iter_cached_range
+from domain.constants import (
+    ADMISSION_ENABLED,
+    ADMISSION_RETRY_AFTER,
+    BUNDLE_JOBS_S3_BUCKET,
+    METRICS_ENABLED,
+    VIDEO_INDEX_MAX_AGE,
+    VIDEO_INDEX_REFRESH_INTERVAL,
+    VIDEO_LIST_MAX_PAGE_SIZE,
+    VIDEO_STREAM_REDIRECT,
+)
+from domain.entities.object_metadata import ObjectMetadata
+from infrastructure import s3 as infrastructure_s3
+from infrastructure.admission import AdmissionMiddleware, build_admission_controller
+from infrastructure.bucket_index import BucketIndex
+from infrastructure.chunk_cache import get_video_chunk_cache
+from infrastructure.executors import iterate_blocking, run_blocking
+from infrastructure.log_pipeline import configure_logging
+from infrastructure.metadata_cache import (
+    get_object_metadata,
+    invalidate_object_metadata,
+)
+from infrastructure.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    render_metrics,
+)
+from infrastructure.metrics_middleware import MetricsMiddleware
+from infrastructure.presigned_urls import get_presigned_url
 from infrastructure.secret_manager import get_key_jwt
+from infrastructure.secret_provider import SecretProvider
 
 
 APP_NAME = os.getenv("APP_NAME", "python-transfers")
-LOGGIN_LEVEL = os.getenv("LOGGIN_LEVEL", "DEBUG")
+LOGGIN_LEVEL = os.getenv("LOGGIN_LEVEL", "INFO")
 
 # Configuración S3 para videos
 S3_BUCKET_VIDEOS = os.getenv(
     "S3_BUCKET_VIDEOS", "ds-multiad-help-202506041618"
 )  # Configura tu bucket
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".wmv", ".flv", ".webm", ".mkv")
+VIDEO_STREAM_CHUNK_SIZE = int(os.getenv("VIDEO_STREAM_CHUNK_SIZE", str(64 * 1024)))
 
 JWT_SECRET = os.environ["JWT_SECRET_KEY_NAME"]
 
-jw_key = get_key_jwt(JWT_SECRET)
+# La llave se carga al arrancar el worker en segundo plano (o en el primer
+# request) y se refresca periódicamente para tomar las rotaciones
+jwt_keys = SecretProvider(JWT_SECRET, get_key_jwt)
+token_verifier = TokenVerifier(jwt_keys)
+
+# Índice de videos del bucket, se carga en la primera consulta
+video_index = BucketIndex(
+    S3_BUCKET_VIDEOS,
+    VIDEO_EXTENSIONS,
+    VIDEO_INDEX_REFRESH_INTERVAL,
+    VIDEO_INDEX_MAX_AGE,
+)
 
 ORIGINS = ["*"]
 
+# Clase del control de admisión de cada ruta pesada; health, metadata y
+# consulta de jobs no se limitan
+ADMISSION_ROUTES = {
+    ("GET", "/api/file"): "bundle",
+    ("GET", "/transfers/api/file"): "bundle",
+    ("POST", "/api/file"): "bundle",
+    ("POST", "/transfers/api/file"): "bundle",
+    ("PUT", "/api/file"): "upload",
+    ("PUT", "/transfers/api/file"): "upload",
+    ("PUT", "/api/files"): "batch_upload",
+    ("PUT", "/transfers/api/files"): "batch_upload",
+    ("GET", "/transfers/api/video/stream"): "stream",
+    ("GET", "/transfers/api/videos/list"): "list",
+}
+
 log_format = (
     f"%(asctime)s - [%(levelname)s] - {APP_NAME} - %(name)s - "
     "%(filename)s:%(lineno)d - %(funcName)s() - %(message)s"
 )
-logging.basicConfig(level=logging.getLevelName(LOGGIN_LEVEL), format=log_format)
+# Los registros se escriben desde un hilo en segundo plano, con los payloads
+# recortados y los tokens ocultos
+configure_logging(logging.getLevelName(LOGGIN_LEVEL), log_format)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+if ADMISSION_ENABLED:
+    # Dentro de CORS para que el 503 también lleve sus headers
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=build_admission_controller(),
+        routes=ADMISSION_ROUTES,
+        retry_after=ADMISSION_RETRY_AFTER,
+    )
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ORIGINS,
@@ -54,38 +133,97 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+
+@app.on_event("startup")
+def load_secrets():
+    jwt_keys.prefetch()
 
 
 def get_s3_client():
     """
-    Obtiene el cliente de S3
+    Obtiene el cliente de S3 compartido del proceso
     """
-    try:
-        return boto3.client("s3")
-    except NoCredentialsError:
+    s3_client = infrastructure_s3.get_s3_client()
+    if s3_client is None:
         logger.error("AWS credentials not found")
         raise Exception("AWS credentials not configured")
+    return s3_client
 
 
-def parse_range_header(range_header: str, file_size: int):
+def get_video_metadata(video_path: str) -> ObjectMetadata:
     """
-    Parse HTTP Range header y retorna posiciones de inicio y fin
+    Obtiene la metadata del video (desde el cache si está vigente)
     """
-    if not range_header:
-        return 0, file_size - 1
+    try:
+        return get_object_metadata(S3_BUCKET_VIDEOS, video_path)
+    except ClientError as e:
+        error_code = e.response["Error"]["Code"]
+        if error_code == "404":
+            logger.error(f"Video no encontrado: {video_path}")
+            raise HTTPException(
+                status_code=404, detail=f"Video no encontrado: {video_path}"
+            )
+        elif error_code == "403":
+            logger.error(f"Acceso denegado al video: {video_path}")
+            raise HTTPException(status_code=403, detail="Acceso denegado al video")
+        else:
+            logger.error(f"Error al acceder al video: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error interno del servidor")
 
-    range_match = re.match(r"bytes=(\d+)-(\d*)", range_header)
-    if not range_match:
-        return 0, file_size - 1
 
-    start = int(range_match.group(1))
-    end = int(range_match.group(2)) if range_match.group(2) else file_size - 1
+def generate_video_chunks(video_body, chunk_size: int):
+    """
+    Reenvía el contenido de S3 conforme llega, sin cargarlo completo en memoria
+    """
+    try:
+        for chunk in video_body.iter_chunks(chunk_size):
+            yield chunk
+    finally:
+        video_body.close()
 
-    # Asegurar que los valores estén dentro del rango válido
-    start = max(0, min(start, file_size - 1))
-    end = max(start, min(end, file_size - 1))
 
-    return start, end
+def close_quietly(close):
+    """
+    Cierra el stream de S3 al terminar la respuesta (o si el cliente se
+    desconecta); si el generador sigue en uso se cierra al liberarse
+    """
+    try:
+        close()
+    except Exception as e:
+        logger.debug("Stream no cerrado: %s", e)
+
+
+def video_validators(video_metadata: ObjectMetadata, weak: bool = False) -> dict:
+    """
+    Headers ETag y Last-Modified del video; weak para representaciones
+    derivadas del video (como su metadata)
+    """
+    headers = {}
+    if video_metadata.etag:
+        headers["ETag"] = f"W/{video_metadata.etag}" if weak else video_metadata.etag
+    if video_metadata.last_modified:
+        headers["Last-Modified"] = http_date(video_metadata.last_modified)
+    return headers
+
+
+def video_not_modified(request: Request, video_metadata: ObjectMetadata) -> bool:
+    return is_not_modified(
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+        video_metadata.etag,
+        video_metadata.last_modified,
+    )
+
+
+def get_client_id(request: Request) -> str:
+    """
+    Identifica al cliente para detectar lecturas secuenciales de un video
+    """
+    host = request.client.host if request.client else ""
+    return f"{host}|{request.headers.get('user-agent', '')}"
 
 
 @app.get("/transfers/api/health")
@@ -106,6 +244,16 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas del servicio en el formato de texto de Prometheus
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/transfers/api/video/stream")
 async def stream_video(video_path: str, request: Request):
     """
@@ -119,75 +267,154 @@ async def stream_video(video_path: str, request: Request):
         StreamingResponse con el video
     """
     try:
-        logger.info(f"Solicitando stream de video: {video_path}")
+        logger.info("Solicitando stream de video: %s", video_path)
+
+        if VIDEO_STREAM_REDIRECT:
+            # Se valida que el video exista y el cliente lo lee directo de S3
+            video_metadata = await run_blocking(get_video_metadata, video_path)
+            if video_not_modified(request, video_metadata):
+                return Response(
+                    status_code=304, headers=video_validators(video_metadata)
+                )
+            url, expires_in = get_presigned_url(S3_BUCKET_VIDEOS, video_path)
+            return RedirectResponse(
+                url,
+                status_code=307,
+                headers={"Cache-Control": f"private, max-age={expires_in}"},
+            )
 
         # Obtener cliente S3
         s3_client = get_s3_client()
+        range_header = request.headers.get("range")
 
-        # Primero obtener información del archivo
-        try:
-            head_response = s3_client.head_object(
-                Bucket=S3_BUCKET_VIDEOS, Key=video_path
-            )
-            file_size = head_response["ContentLength"]
-            content_type = head_response.get("ContentType", "video/mp4")
+        # La metadata viene del cache; si el video cambió en S3 el get_object
+        # falla por ETag y se reintenta con metadata nueva
+        for attempt in range(2):
+            video_metadata = await run_blocking(get_video_metadata, video_path)
+            file_size = video_metadata.size
+            content_type = video_metadata.content_type or "video/mp4"
 
             logger.info(
-                f"Video encontrado - Tamaño: {file_size} bytes, Tipo: {content_type}"
+                "Video encontrado - Tamaño: %s bytes, Tipo: %s", file_size, content_type
             )
 
-        except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            if error_code == "404":
-                logger.error(f"Video no encontrado: {video_path}")
-                raise HTTPException(
-                    status_code=404, detail=f"Video no encontrado: {video_path}"
+            # La copia del cliente sigue vigente, no se envía el contenido
+            if video_not_modified(request, video_metadata):
+                return Response(
+                    status_code=304,
+                    headers={
+                        **video_validators(video_metadata),
+                        "Cache-Control": "public, max-age=3600",
+                    },
                 )
-            elif error_code == "403":
-                logger.error(f"Acceso denegado al video: {video_path}")
-                raise HTTPException(status_code=403, detail="Acceso denegado al video")
-            else:
-                logger.error(f"Error al acceder al video: {str(e)}")
-                raise HTTPException(
-                    status_code=500, detail="Error interno del servidor"
-                )
-
-        # Parsear Range header si existe
-        range_header = request.headers.get("range")
-        start, end = parse_range_header(range_header, file_size)
-        content_length = end - start + 1
-
-        logger.debug(f"Range solicitado: {start}-{end} de {file_size}")
 
-        # Obtener el contenido del video con rango específico
-        try:
-            if range_header:
-                # Solicitud con rango específico
-                range_param = f"bytes={start}-{end}"
-                get_response = s3_client.get_object(
-                    Bucket=S3_BUCKET_VIDEOS, Key=video_path, Range=range_param
+            # Si el video cambió desde el rango que tiene el cliente, If-Range
+            # no coincide y se envía el video completo
+            if not if_range_matches(
+                request.headers.get("if-range"),
+                video_metadata.etag,
+                video_metadata.last_modified,
+            ):
+                range_header = None
+
+            # Parsear Range header si existe; un rango que no se entiende
+            # entrega el video completo
+            try:
+                byte_range = parse_byte_range(range_header, file_size)
+            except RangeNotSatisfiable:
+                logger.error("Rango inválido solicitado: %s", range_header)
+                return Response(
+                    status_code=416,
+                    headers={
+                        **video_validators(video_metadata),
+                        "Content-Range": f"bytes */{file_size}",
+                    },
                 )
-                status_code = 206  # Partial Content
+            if byte_range is None:
+                start, end = 0, file_size - 1
             else:
-                # Solicitud completa
-                get_response = s3_client.get_object(
-                    Bucket=S3_BUCKET_VIDEOS, Key=video_path
-                )
-                status_code = 200
+                start, end = byte_range
+            content_length = end - start + 1
+
+            logger.debug("Range solicitado: %s-%s de %s", start, end, file_size)
+
+            status_code = 206 if byte_range else 200  # Partial Content
 
-            # Leer el contenido
-            video_content = get_response["Body"].read()
+            # Con el cache de segmentos los bytes salen de disco o del buffer
+            # de read-ahead y solo los segmentos faltantes se piden a S3
+            chunk_cache = get_video_chunk_cache()
+            read_ahead = get_video_read_ahead()
+            use_chunk_cache = (
+                (chunk_cache is not None or read_ahead is not None)
+                and video_metadata.etag
+                and file_size > 0
+            )
 
-        except ClientError as e:
-            error_code = e.response["Error"]["Code"]
-            if error_code == "InvalidRange":
-                logger.error(f"Rango inválido solicitado: {range_header}")
-                raise HTTPException(
-                    status_code=416, detail="Rango solicitado no válido"
+            get_params = {"Bucket": S3_BUCKET_VIDEOS, "Key": video_path}
+            if video_metadata.etag:
+                get_params["IfMatch"] = video_metadata.etag
+
+            # Obtener el contenido del video con rango específico
+            try:
+                if use_chunk_cache:
+                    if read_ahead is not None:
+                        # Si el cliente lee el video en orden se descargan por
+                        # adelantado los segmentos que pedirá después
+                        read_ahead.observe(
+                            get_client_id(request),
+                            video_metadata,
+                            start,
+                            end,
+                            chunk_cache,
+                        )
+                    # El primer segmento que falta se pide a S3 aquí, así los
+                    # errores pasan por el mismo manejo que el GET directo
+                    video_chunks = await run_blocking(
+                        iter_cached_range,
+                        chunk_cache,
+                        video_metadata,
+                        start,
+                        end,
+                        VIDEO_STREAM_CHUNK_SIZE,
+                        read_ahead,
+                    )
+                    video_close = video_chunks.close
+                    break
+
+                if byte_range is not None:
+                    # Solicitud con rango específico
+                    get_params["Range"] = f"bytes={start}-{end}"
+                get_response = await run_blocking(s3_client.get_object, **get_params)
+
+                # El contenido se lee en streaming, no se carga completo en memoria
+                video_body = get_response["Body"]
+                video_chunks = generate_video_chunks(
+                    video_body, VIDEO_STREAM_CHUNK_SIZE
                 )
-            else:
-                logger.error(f"Error al obtener contenido del video: {str(e)}")
-                raise HTTPException(status_code=500, detail="Error al obtener el video")
+                video_close = video_body.close
+                break
+
+            except ClientError as e:
+                error_code = e.response["Error"]["Code"]
+                if error_code in ("PreconditionFailed", "412") and attempt == 0:
+                    logger.info("Video modificado en S3: %s", video_path)
+                    invalidate_object_metadata(S3_BUCKET_VIDEOS, video_path)
+                elif error_code == "NoSuchKey":
+                    logger.error(f"Video no encontrado: {video_path}")
+                    invalidate_object_metadata(S3_BUCKET_VIDEOS, video_path)
+                    raise HTTPException(
+                        status_code=404, detail=f"Video no encontrado: {video_path}"
+                    )
+                elif error_code == "InvalidRange":
+                    logger.error(f"Rango inválido solicitado: {range_header}")
+                    raise HTTPException(
+                        status_code=416, detail="Rango solicitado no válido"
+                    )
+                else:
+                    logger.error(f"Error al obtener contenido del video: {str(e)}")
+                    raise HTTPException(
+                        status_code=500, detail="Error al obtener el video"
+                    )
 
         # Preparar headers para la respuesta
         headers = {
@@ -195,25 +422,25 @@ async def stream_video(video_path: str, request: Request):
             "Accept-Ranges": "bytes",
             "Content-Length": str(content_length),
             "Cache-Control": "public, max-age=3600",  # Cache por 1 hora
+            **video_validators(video_metadata),
         }
 
         # Si es una solicitud de rango, agregar Content-Range header
-        if range_header:
+        if byte_range is not None:
             headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
 
-        # Crear generador para streaming del contenido
-        def generate_video_chunks():
-            chunk_size = 8192  # 8KB por chunk
-            for i in range(0, len(video_content), chunk_size):
-                yield video_content[i : i + chunk_size]
-
-        logger.info(f"Streaming video exitoso: {video_path} - {content_length} bytes")
+        logger.info(
+            "Streaming video exitoso: %s - %s bytes", video_path, content_length
+        )
 
+        # Los chunks se leen en el pool de trabajo bloqueante; si el cliente
+        # se desconecta se cierra la conexión con S3
         return StreamingResponse(
-            generate_video_chunks(),
+            iterate_blocking(video_chunks),
             status_code=status_code,
             headers=headers,
             media_type=content_type,
+            background=BackgroundTask(close_quietly, video_close),
         )
 
     except HTTPException:
@@ -229,39 +456,43 @@ class VideoStreamRequest(BaseModel):
 
 
 @app.get("/transfers/api/video/info")
-async def get_video_info(video_path: str):
+async def get_video_info(video_path: str, request: Request):
     """
     Obtiene información sobre un video sin descargarlo
 
     Args:
         video_path: Path del video en S3
+        request: Request object para los headers condicionales
 
     Returns:
         Información del video (tamaño, tipo, etc.)
     """
     try:
-        logger.info(f"Obteniendo información del video: {video_path}")
+        logger.info("Obteniendo información del video: %s", video_path)
 
-        s3_client = get_s3_client()
-
-        # Obtener metadata del archivo
-        head_response = s3_client.head_object(Bucket=S3_BUCKET_VIDEOS, Key=video_path)
+        # Obtener metadata del archivo (desde el cache si está vigente)
+        video_metadata = await run_blocking(
+            get_object_metadata, S3_BUCKET_VIDEOS, video_path
+        )
+        validators = video_validators(video_metadata, weak=True)
+        if video_not_modified(request, video_metadata):
+            return Response(status_code=304, headers=validators)
 
         video_info = {
             "video_path": video_path,
-            "file_size": head_response["ContentLength"],
-            "content_type": head_response.get("ContentType", "video/mp4"),
+            "file_size": video_metadata.size,
+            "content_type": video_metadata.content_type or "video/mp4",
             "last_modified": (
-                head_response.get("LastModified").isoformat()
-                if head_response.get("LastModified")
+                video_metadata.last_modified.isoformat()
+                if video_metadata.last_modified
                 else None
             ),
-            "etag": head_response.get("ETag"),
-            "size_mb": round(head_response["ContentLength"] / (1024 * 1024), 2),
+            "etag": video_metadata.etag,
+            "size_mb": round(video_metadata.size / (1024 * 1024), 2),
         }
 
-        logger.info(f"Información obtenida exitosamente para: {video_path}")
-        return video_info
+        logger.info("Información obtenida exitosamente para: %s", video_path)
+        return JSONResponse(content=video_info, headers=validators)
 
     except ClientError as e:
         error_code = e.response["Error"]["Code"]
@@ -282,47 +513,46 @@ async def get_video_info(video_path: str):
 
 
 @app.get("/transfers/api/videos/list")
-async def list_videos(prefix: str = ""):
+async def list_videos(
+    prefix: str = "",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=VIDEO_LIST_MAX_PAGE_SIZE),
+):
     """
-    Lista videos disponibles en el bucket S3
+    Lista videos disponibles en el bucket S3 desde el índice en memoria
 
     Args:
         prefix: Prefijo para filtrar videos (ej: "Negotiaton/")
+        cursor: Valor de next_cursor de la página anterior
+        limit: Tamaño de página, si no se envía se regresan todos los videos
 
     Returns:
-        Lista de videos disponibles
+        Lista de videos disponibles y el cursor de la siguiente página
     """
     try:
-        logger.info(f"Listando videos con prefijo: {prefix}")
+        logger.info("Listando videos con prefijo: %s", prefix)
 
-        s3_client = get_s3_client()
-
-        # Listar objetos en el bucket
-        paginator = s3_client.get_paginator("list_objects_v2")
-        page_iterator = paginator.paginate(Bucket=S3_BUCKET_VIDEOS, Prefix=prefix)
+        # La primera consulta (o un refresh) pagina el bucket completo
+        objects, next_cursor, total = await run_blocking(
+            video_index.query, prefix, cursor, limit
+        )
 
         videos = []
-        for page in page_iterator:
-            if "Contents" in page:
-                for obj in page["Contents"]:
-                    # Filtrar solo archivos de video
-                    key = obj["Key"]
-                    if key.lower().endswith(
-                        (".mp4", ".avi", ".mov", ".wmv", ".flv", ".webm", ".mkv")
-                    ):
-                        videos.append(
-                            {
-                                "path": key,
-                                "filename": key.split("/")[-1],
-                                "size": obj["Size"],
-                                "size_mb": round(obj["Size"] / (1024 * 1024), 2),
-                                "last_modified": obj["LastModified"].isoformat(),
-                                "stream_url": f"/api/video/stream?video_path={key}",
-                            }
-                        )
+        for obj in objects:
+            key = obj["Key"]
+            videos.append(
+                {
+                    "path": key,
+                    "filename": key.split("/")[-1],
+                    "size": obj["Size"],
+                    "size_mb": round(obj["Size"] / (1024 * 1024), 2),
+                    "last_modified": obj["LastModified"].isoformat(),
+                    "stream_url": f"/api/video/stream?video_path={key}",
+                }
+            )
 
-        logger.info(f"Se encontraron {len(videos)} videos")
-        return {"total_videos": len(videos), "videos": videos}
+        logger.info("Se encontraron %s videos", total)
+        return {"total_videos": total, "videos": videos, "next_cursor": next_cursor}
 
     except Exception as e:
         logger.error(f"Error al listar videos: {str(e)}")
@@ -349,7 +579,26 @@ def get_token(authorization: Optional[str], jwt_token: Optional[str]) -> str:
     return token
 
 
-async def upload_file_logic(file: UploadFile, authorization: str, jw_key: str):
+def iter_request_body(request: Request, loop: asyncio.AbstractEventLoop):
+    """
+    Permite leer el body del request desde un hilo fuera del event loop,
+    chunk por chunk y sin cargarlo completo en memoria
+    """
+    body = request.stream()
+
+    async def next_chunk():
+        return await body.__anext__()
+
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()
+        except StopAsyncIteration:
+            return
+
+
+async def upload_file_logic(
+    request: Request, authorization: str, token_verifier: TokenVerifier
+):
     if not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -357,38 +606,52 @@ async def upload_file_logic(file: UploadFile, authorization: str, jw_key: str):
         )
 
     token = authorization[len("Bearer ") :]
-    verification = Verification(jw_key)
+    # Los claims de un token ya validado salen del cache del verificador
+    token_claims = await run_blocking(token_verifier.get_claims, token)
 
-    if not verification.is_valid(token):
+    if token_claims is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token invalid!",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token_claims = json.loads(verification.get_claims(token))
-    file_content = await file.read()
+    # El archivo se envía a S3 conforme se recibe, sin leerlo completo
+    file_chunks = iter_form_file(
+        iter_request_body(request, asyncio.get_running_loop()),
+        request.headers.get("content-type"),
+        "file",
+    )
 
-    response = business_logic(
+    response = await run_blocking(
+        business_logic,
         "put_file",
         {
-            "file_content": file_content,
+            "file_chunks": file_chunks,
             "bucket_name": token_claims["bucket"],
             "key": token_claims["key"],
         },
     )
 
-    if response.get("status_code") == 404:
+    if response.get("status_code") == 400:
+        raise HTTPException(status_code=400, detail=response["error"])
+    elif response.get("status_code") == 404:
         raise HTTPException(status_code=404, detail=response["error"])
     elif response.get("status_code") == 403:
         raise HTTPException(status_code=403, detail=response["error"])
     elif response.get("status_code") == 500:
         raise HTTPException(status_code=500, detail=response["error"])
 
+    # El índice de videos vuelve a listar la carpeta del archivo
+    if token_claims["bucket"] == S3_BUCKET_VIDEOS:
+        video_index.invalidate(token_claims["key"])
+
     return {"message": "File uploaded successfully", "details": response["response"]}
 
 
-def download_file_logic(authorization: str, jw_key: str):
+async def upload_files_logic(
+    request: Request, authorization: str, token_verifier: TokenVerifier
+):
     if not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -396,30 +659,124 @@ def download_file_logic(authorization: str, jw_key: str):
         )
 
     token = authorization[len("Bearer ") :]
-    verification = Verification(jw_key)
+    token_claims = await run_blocking(token_verifier.get_claims, token)
 
-    if not verification.is_valid(token):
+    if token_claims is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token invalid!",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    logger.debug(f"token is: {token}")
-    token_claims = json.loads(verification.get_claims(token))
-    logger.debug(f"token claims are: {token_claims}")
-    files_data = token_claims.get("files")
+    # El token de lotes indica el prefijo de las keys y/o la lista de keys
+    # permitidas
+    prefix = token_claims.get("prefix")
+    allowed_keys = token_claims.get("keys")
+    if prefix is None and allowed_keys is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token does not allow batch uploads",
+        )
+
+    form_files = iter_form_files(
+        iter_request_body(request, asyncio.get_running_loop()),
+        request.headers.get("content-type"),
+    )
+
+    response = await run_blocking(
+        business_logic,
+        "put_files",
+        {
+            "form_files": form_files,
+            "bucket_name": token_claims["bucket"],
+            "prefix": prefix or "",
+            "allowed_keys": allowed_keys,
+        },
+    )
+
+    if "status_code" in response:
+        raise HTTPException(
+            status_code=response["status_code"], detail=response["error"]
+        )
+
+    if token_claims["bucket"] == S3_BUCKET_VIDEOS:
+        for result in response["response"]["files"]:
+            if result["status"] == "success":
+                video_index.invalidate(result["key"])
+
+    # El form se cortó o es inválido a la mitad: 400 con el resultado de los
+    # archivos que alcanzaron a subirse
+    if "error" in response["response"]:
+        raise HTTPException(status_code=400, detail=response["response"])
+
+    return response["response"]
+
+
+def download_file_logic(
+    authorization: str, token_verifier: TokenVerifier, request: Request
+):
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authorization header format. Expected 'Bearer <token>'",
+        )
+
+    token = authorization[len("Bearer ") :]
+    # Los claims de un token ya validado salen del cache del verificador
+    token_claims = token_verifier.get_claims(token)
+
+    if token_claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token invalid!",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
-    logger.debug(f"files_data in app.py is: {files_data}")
+    # El token nunca se escribe en el log; los claims se recortan
+    logger.debug("token claims are: %s", token_claims)
+    files_data = token_claims.get("files")
     if not files_data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No files data found in token.",
         )
 
-    response = business_logic("get_file", {"files_data": files_data})
+    # Con un job el bundle se genera en segundo plano y el cliente consulta
+    # el avance; se pide con el claim "async" o con "Prefer: respond-async"
+    if BUNDLE_JOBS_S3_BUCKET and (
+        token_claims.get("async")
+        or "respond-async" in request.headers.get("prefer", "")
+    ):
+        response = business_logic(
+            "create_bundle_job",
+            {"files_data": files_data, "layout": token_claims.get("layout")},
+        )
+        if "status_code" in response:
+            raise HTTPException(
+                status_code=response["status_code"], detail=response["error"]
+            )
+        job = response["response"]
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=job,
+            headers={"Location": f"{request.url.path}/jobs/{job['job_id']}"},
+        )
+
+    # El token puede pedir las carpetas como directorios ("flat") en vez de
+    # un ZIP por carpeta. Range/If-Range permiten reanudar una descarga.
+    response = business_logic(
+        "get_file",
+        {
+            "files_data": files_data,
+            "layout": token_claims.get("layout"),
+            "range_header": request.headers.get("range"),
+            "if_range": request.headers.get("if-range"),
+            # El token puede pedir una redirección a S3 en vez del contenido
+            "redirect": token_claims.get("redirect"),
+        },
+    )
 
-    if isinstance(response, StreamingResponse):
+    if isinstance(response, Response):
         return response
     elif "error" in response:
         if (
@@ -444,54 +801,150 @@ def download_file_logic(authorization: str, jw_key: str):
         )
 
 
-@app.put("/api/file")
+# El body multipart se lee en streaming, se documenta el campo "file" a mano
+UPLOAD_FILE_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+@app.put("/api/file", openapi_extra=UPLOAD_FILE_OPENAPI)
 async def upload_file(
-    file: UploadFile = File(...),
+    request: Request,
     authorization: str = Header(...),
 ):
-    return await upload_file_logic(file, authorization, jw_key)
+    return await upload_file_logic(request, authorization, token_verifier)
 
 
-@app.put("/transfers/api/file")
+@app.put("/transfers/api/file", openapi_extra=UPLOAD_FILE_OPENAPI)
 async def upload_file(
-    file: UploadFile = File(...),
+    request: Request,
+    authorization: str = Header(...),
+):
+    return await upload_file_logic(request, authorization, token_verifier)
+
+
+# Cada archivo del form se sube a prefix + su nombre; los .tar, .tar.gz y
+# .tgz enviados en el campo "archive" se expanden
+UPLOAD_FILES_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                        },
+                        ARCHIVE_FIELD: {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@app.put("/api/files", openapi_extra=UPLOAD_FILES_OPENAPI)
+async def upload_files(
+    request: Request,
+    authorization: str = Header(...),
+):
+    return await upload_files_logic(request, authorization, token_verifier)
+
+
+@app.put("/transfers/api/files", openapi_extra=UPLOAD_FILES_OPENAPI)
+async def upload_files_transfers(
+    request: Request,
     authorization: str = Header(...),
 ):
-    return await upload_file_logic(file, authorization, jw_key)
+    return await upload_files_logic(request, authorization, token_verifier)
 
 
 class TokenBody(BaseModel):
     jwt: str
 
 
+def bundle_job_logic(job_id: str):
+    response = business_logic("get_bundle_job", {"job_id": job_id})
+    if "status_code" in response:
+        raise HTTPException(
+            status_code=response["status_code"], detail=response["error"]
+        )
+    return response["response"]
+
+
+@app.get("/api/file/jobs/{job_id}")
+async def get_bundle_job(job_id: str):
+    """
+    @description: API to check a bundle job and get its download URL. The
+        job_id is a 128-bit random value returned only to the holder of the
+        token that created the job; it works as the access key for the job,
+        so no token is required here and it must not be shared
+    @param: job_id: str
+    @return: response: dict
+    """
+    return await run_blocking(bundle_job_logic, job_id)
+
+
+@app.get("/transfers/api/file/jobs/{job_id}")
+async def get_bundle_job_transfers(job_id: str):
+    """
+    @description: Same as /api/file/jobs/{job_id}; the job_id is the access key
+    @param: job_id: str
+    @return: response: dict
+    """
+    return await run_blocking(bundle_job_logic, job_id)
+
+
 # Download file
 @app.get("/api/file")
 async def download_file(
+    request: Request,
     authorization: str = Header(...),
 ):
-    return download_file_logic(authorization, jw_key)
+    return await run_blocking(
+        download_file_logic, authorization, token_verifier, request
+    )
 
 
 @app.get("/transfers/api/file")
 async def download_file(
+    request: Request,
     authorization: str = Header(...),
 ):
-    return download_file_logic(authorization, jw_key)
+    return await run_blocking(
+        download_file_logic, authorization, token_verifier, request
+    )
 
 
 @app.post("/api/file")
 async def download_file_post(
+    request: Request,
     token_body: TokenBody = Body(...),
     authorization: Optional[str] = Header(None),
 ):
     token = get_token(authorization, token_body.jwt)
-    return download_file_logic(token, jw_key)
+    return await run_blocking(download_file_logic, token, token_verifier, request)
 
 
 @app.post("/transfers/api/file")
 async def download_file_post_transfers(
+    request: Request,
     token_body: TokenBody = Body(...),
     authorization: Optional[str] = Header(None),
 ):
     token = get_token(authorization, token_body.jwt)
-    return download_file_logic(token, jw_key)
+    return await run_blocking(download_file_logic, token, token_verifier, request)
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from ds_security_validation.verification import Verification
+
+from domain.constants import CLAIMS_CACHE_MAX_ITEMS, CLAIMS_CACHE_TTL
+from infrastructure.metrics import record_cache
+from infrastructure.secret_provider import SecretProvider
+
+
+class TokenVerifier:
+    """
+    Valida tokens JWT con las llaves vigentes del SecretProvider (la actual
+    y, durante una rotación, la anterior), reutilizando una instancia de
+    Verification por llave, y guarda los claims de los tokens válidos en un
+    cache LRU indexado por el hash del token, hasta su "exp" o hasta ttl
+    segundos como máximo.
+    """
+
+    def __init__(
+        self,
+        keys: SecretProvider,
+        max_items: int = CLAIMS_CACHE_MAX_ITEMS,
+        ttl: float = CLAIMS_CACHE_TTL,
+    ):
+        self.keys = keys
+        self.max_items = max_items
+        self.ttl = ttl
+        self._verifications = {}
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_verifications(self) -> List[Verification]:
+        keys = self.keys.versions()
+        with self._lock:
+            verifications = {}
+            for key in keys:
+                fingerprint = json.dumps(key, sort_keys=True)
+                verification = self._verifications.get(fingerprint)
+                if verification is None:
+                    verification = Verification(key)
+                verifications[fingerprint] = verification
+            # Las llaves que salieron de la ventana de rotación se descartan
+            self._verifications = verifications
+            return list(verifications.values())
+
+    def _cached(self, digest: bytes) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(digest)
+            if item is None:
+                return None
+            expires_at, claims = item
+            if expires_at <= time.time():
+                del self._items[digest]
+                return None
+            self._items.move_to_end(digest)
+            return claims
+
+    def _store(self, digest: bytes, claims: dict):
+        expires_at = time.time() + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        with self._lock:
+            self._items[digest] = (expires_at, claims)
+            self._items.move_to_end(digest)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def get_claims(self, token: str) -> Optional[dict]:
+        """
+        Regresa los claims del token o None si el token no es válido
+        """
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = self._cached(digest)
+        record_cache("token_claims", claims is not None)
+        if claims is not None:
+            return claims
+
+        for verification in self._get_verifications():
+            if verification.is_valid(token):
+                claims = json.loads(verification.get_claims(token))
+                self._store(digest, claims)
+                return claims
+        return None
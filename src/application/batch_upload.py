@@ -0,0 +1,207 @@
+import io
+import logging
+import posixpath
+import tarfile
+import threading
+from functools import partial
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from application.multipart_stream import FormPart, MultipartError
+from domain.constants import DOWNLOAD_CHUNK_SIZE
+from infrastructure.executors import get_s3_executor
+from infrastructure.metadata_cache import invalidate_object_metadata
+from infrastructure.s3 import upload_stream
+
+logger = logging.getLogger(__name__)
+
+# Campo del form cuyos archivos .tar, .tar.gz o .tgz se expanden
+ARCHIVE_FIELD = "archive"
+
+UPLOAD_ERRORS = {
+    "BucketNotFound": "Bucket not found",
+    "ClientError": "Client error occurred during file upload",
+    "Incomplete": "The file was not received completely",
+    "KeyNotAllowed": "The token does not allow this key",
+}
+
+
+class ChunkReader(io.RawIOBase):
+    """
+    Archivo de solo lectura sobre un iterador de chunks
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def iter_archive(chunks: Iterable[bytes]) -> Iterator[Tuple[str, Iterator[bytes]]]:
+    """
+    Expande un archivo tar (opcionalmente comprimido) conforme llega y
+    regresa el nombre y el contenido de cada archivo regular
+    """
+    reader = io.BufferedReader(ChunkReader(chunks), DOWNLOAD_CHUNK_SIZE)
+    try:
+        with tarfile.open(fileobj=reader, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                file_obj = archive.extractfile(member)
+                yield member.name, iter(
+                    partial(file_obj.read, DOWNLOAD_CHUNK_SIZE), b""
+                )
+    except tarfile.TarError as e:
+        raise MultipartError(f"Invalid archive: {e}")
+
+
+def iter_batch_files(
+    form_files: Iterable[Tuple[FormPart, Iterator[bytes]]]
+) -> Iterator[Tuple[str, Iterator[bytes]]]:
+    """
+    Regresa (nombre, contenido) de cada archivo del form, expandiendo los
+    archivos tar enviados en el campo ARCHIVE_FIELD
+    """
+    for part, content in form_files:
+        if part.field_name == ARCHIVE_FIELD:
+            yield from iter_archive(content)
+        else:
+            yield part.filename, content
+
+
+def batch_object_key(
+    name: str, prefix: str, allowed_keys: Optional[List[str]]
+) -> Optional[str]:
+    """
+    Key de S3 para el archivo name dentro de la carpeta prefix, o None si el
+    nombre no es una ruta relativa válida o la key no está entre las
+    permitidas. El prefix se trata siempre como carpeta: "tenant1" solo
+    permite keys bajo "tenant1/", nunca "tenant10/".
+    """
+    if prefix and not prefix.endswith("/"):
+        prefix = f"{prefix}/"
+    name = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+    if name in ("", ".") or name == ".." or name.startswith("../") or "\0" in name:
+        return None
+    key = f"{prefix}{name}"
+    if not key.startswith(prefix):
+        return None
+    if allowed_keys is not None and key not in allowed_keys:
+        return None
+    return key
+
+
+def read_up_to(
+    chunks: Iterator[bytes], size: int
+) -> Tuple[bytes, Optional[Iterator[bytes]]]:
+    """
+    Lee chunks hasta juntar size bytes
+
+    Returns:
+        Los bytes leídos y None si el contenido terminó antes de size, o el
+        resto del contenido si no
+    """
+    data = []
+    read = 0
+    for chunk in chunks:
+        data.append(chunk)
+        read += len(chunk)
+        if read >= size:
+            return b"".join(data), chunks
+    return b"".join(data), None
+
+
+def upload_batch(
+    files: Iterable[Tuple[str, Iterator[bytes]]],
+    bucket_name: str,
+    prefix: str,
+    allowed_keys: Optional[List[str]],
+    part_size: int,
+    part_concurrency: int,
+    max_concurrency: int,
+    max_files: int,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Sube a S3 los archivos conforme llegan. Los que caben en una parte se
+    suben en el pool de S3 con hasta max_concurrency en curso mientras se
+    sigue leyendo el request; los más grandes se suben con un multipart
+    upload antes de pasar al siguiente.
+
+    Returns:
+        Resultado de cada archivo en el orden en que llegaron y el error del
+        form si el request se cortó o es inválido a la mitad (None si no);
+        los archivos anteriores al error ya quedaron en S3
+    """
+    results = []
+    pending = []
+    slots = threading.BoundedSemaphore(max_concurrency)
+    form_error = None
+
+    def upload_small(key, data):
+        try:
+            return upload_stream([data], bucket_name, key, part_size, 1)
+        except Exception as e:
+            logger.error("Error uploading %s/%s: %s", bucket_name, key, e)
+            return "UnexpectedError"
+        finally:
+            slots.release()
+
+    def finish(result, outcome):
+        if outcome is True:
+            invalidate_object_metadata(bucket_name, result["key"])
+            result["status"] = "success"
+        else:
+            result["status"] = "error"
+            result["error"] = UPLOAD_ERRORS.get(outcome, "An unexpected error occurred")
+
+    try:
+        result = None
+        for name, content in files:
+            if len(results) == max_files:
+                raise MultipartError(f"At most {max_files} files per batch")
+            key = batch_object_key(name, prefix, allowed_keys)
+            result = {"fileName": name, "key": key}
+            results.append(result)
+            if key is None:
+                finish(result, "KeyNotAllowed")
+                result = None
+                continue
+
+            data, rest = read_up_to(content, part_size)
+            if rest is None:
+                # Espera lugar en el pool para no acumular archivos en memoria
+                slots.acquire()
+                pending.append(
+                    (result, get_s3_executor().submit(upload_small, key, data))
+                )
+            else:
+                outcome = upload_stream(
+                    chain([data], rest), bucket_name, key, part_size, part_concurrency
+                )
+                finish(result, outcome)
+            result = None
+    except MultipartError as e:
+        logger.error("Invalid batch form after %s files: %s", len(results), e)
+        form_error = str(e)
+        # El archivo que se estaba leyendo no se subió
+        if result is not None:
+            finish(result, "Incomplete")
+    finally:
+        # Si el request falla a la mitad se esperan las subidas en curso
+        for result, future in pending:
+            finish(result, future.result())
+    return results, form_error
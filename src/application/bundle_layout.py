@@ -0,0 +1,387 @@
+import hashlib
+import json
+import zlib
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional
+
+from application.fetch import fetch_ranges
+from application.zip_stream import (
+    DATA_DESCRIPTOR,
+    DIRECTORY_ATTRIBUTES,
+    FILE_ATTRIBUTES,
+    ZIP_STORED,
+    central_header,
+    data_descriptor,
+    end_records,
+    local_header,
+    new_entry,
+)
+from domain.constants import BUNDLE_FETCH_CONCURRENCY, DOWNLOAD_CHUNK_SIZE
+from domain.entities.bundle_file import BundleFile
+from infrastructure.crc_cache import crc_cache
+from infrastructure.s3 import stream_file
+
+LAYOUT_NESTED = "nested"
+LAYOUT_FLAT = "flat"
+
+# Cambia si cambia la forma en que se arma el ZIP, para no reutilizar ETags
+BUNDLE_FORMAT_VERSION = 1
+
+# Fecha de las entradas cuyo objeto no tiene LastModified
+DEFAULT_DATE_TIME = datetime(1980, 1, 1, tzinfo=timezone.utc)
+
+
+def _gf2_times(matrix: List[int], vector: int) -> int:
+    total = 0
+    index = 0
+    while vector:
+        if vector & 1:
+            total ^= matrix[index]
+        vector >>= 1
+        index += 1
+    return total
+
+
+def _gf2_square(matrix: List[int]) -> List[int]:
+    return [_gf2_times(matrix, row) for row in matrix]
+
+
+def _zero_operators() -> List[List[int]]:
+    # Operador que avanza el CRC por un bit en cero, elevado al cuadrado hasta
+    # 1 byte y luego hasta 2^63 bytes
+    operator = [0xEDB88320] + [1 << n for n in range(31)]
+    for _ in range(3):
+        operator = _gf2_square(operator)
+    operators = []
+    for _ in range(64):
+        operators.append(operator)
+        operator = _gf2_square(operator)
+    return operators
+
+
+_ZERO_OPERATORS = _zero_operators()
+
+
+def crc32_combine(crc1: int, crc2: int, length2: int) -> int:
+    """
+    CRC32 de A + B a partir de crc32(A), crc32(B) y len(B), como el
+    crc32_combine de zlib
+    """
+    index = 0
+    while length2:
+        if length2 & 1:
+            crc1 = _gf2_times(_ZERO_OPERATORS[index], crc1)
+        length2 >>= 1
+        index += 1
+    return crc1 ^ crc2
+
+
+def entry_date_time(bundle_file: BundleFile) -> datetime:
+    return bundle_file.last_modified or DEFAULT_DATE_TIME
+
+
+def folder_date_time(files: List[BundleFile]) -> datetime:
+    return max(entry_date_time(bundle_file) for bundle_file in files)
+
+
+def bundle_digest(folders, layout: str, *options) -> str:
+    """
+    Hash de las carpetas resueltas (incluye el ETag de cada objeto) y de las
+    opciones con que se arma el ZIP. Cambia cuando cambia cualquier byte del
+    archivo generado.
+    """
+    normalized = [
+        BUNDLE_FORMAT_VERSION,
+        layout,
+        list(options),
+        [
+            [
+                folder_name,
+                [[f.bucket_name, f.key, f.file_name, f.size, f.etag] for f in files],
+            ]
+            for folder_name, files in folders
+        ],
+    ]
+    return hashlib.sha256(
+        json.dumps(normalized, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def bundle_etag(digest: str) -> str:
+    return f'"{digest[:32]}"'
+
+
+def bundle_filename(digest: str) -> str:
+    return f"{digest[:16]}.zip"
+
+
+@dataclass
+class Segment:
+    """
+    Parte contigua del ZIP: bytes fijos (data), el contenido de un objeto de
+    S3 (bundle_file) o bytes que dependen de los CRC (render)
+    """
+
+    offset: int
+    size: int
+    data: Optional[bytes] = None
+    bundle_file: Optional[BundleFile] = None
+    render: Optional[Callable[["CrcResolver"], bytes]] = None
+
+
+@dataclass
+class BundlePlan:
+    segments: List[Segment]
+    size: int
+    digest: str
+    # Offset donde terminan los datos de cada archivo, en orden
+    file_ends: List[int] = field(default_factory=list)
+
+    @property
+    def etag(self) -> str:
+        return bundle_etag(self.digest)
+
+    @property
+    def filename(self) -> str:
+        return bundle_filename(self.digest)
+
+
+class CrcResolver:
+    """
+    Obtiene el CRC32 de los objetos del bundle durante un request: del
+    checksum de S3, del cache, de lo que ya se leyó o, como último recurso,
+    leyendo el objeto
+    """
+
+    def __init__(self):
+        self._tails = {}
+        self._memo = {}
+
+    @staticmethod
+    def _key(bundle_file: BundleFile):
+        return bundle_file.bucket_name, bundle_file.key, bundle_file.etag
+
+    def add_tail(self, bundle_file: BundleFile, start: int, crc: int):
+        """
+        Registra el CRC de los bytes [start, size) ya leídos del objeto
+        """
+        if start == 0:
+            crc_cache.put(*self._key(bundle_file), crc)
+        else:
+            self._tails[self._key(bundle_file)] = (start, crc)
+
+    def __call__(self, bundle_file: BundleFile) -> int:
+        if bundle_file.crc32 is not None:
+            return bundle_file.crc32
+        crc = crc_cache.get(*self._key(bundle_file))
+        if crc is not None:
+            return crc
+
+        # Solo se lee la parte del objeto que no pasó por este request
+        start, tail_crc = self._tails.get(self._key(bundle_file), (bundle_file.size, 0))
+        crc = 0
+        if start > 0:
+            for chunk in stream_file(
+                bundle_file.bucket_name,
+                bundle_file.key,
+                DOWNLOAD_CHUNK_SIZE,
+                0,
+                start - 1,
+                bundle_file.etag,
+            ):
+                crc = zlib.crc32(chunk, crc)
+        crc = crc32_combine(crc, tail_crc, bundle_file.size - start)
+        crc_cache.put(*self._key(bundle_file), crc)
+        return crc
+
+    def cached(self, key, compute: Callable[[], int]) -> int:
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+
+def _segment_crc(segment: Segment, resolver: CrcResolver) -> int:
+    if segment.bundle_file is not None:
+        return resolver(segment.bundle_file)
+    if segment.data is not None:
+        return zlib.crc32(segment.data)
+    return zlib.crc32(segment.render(resolver))
+
+
+class _ArchiveBuilder:
+    """
+    Calcula la posición de cada parte de un ZIP sin comprimir a partir del
+    tamaño de los objetos, sin leer su contenido
+    """
+
+    def __init__(self, segments: List[Segment], start: int, file_ends: List[int]):
+        self.segments = segments
+        self.file_ends = file_ends
+        self.start = start
+        self.offset = start
+        self.entries = []
+
+    def append(self, size: int, **kwargs):
+        if size:
+            self.segments.append(Segment(self.offset, size, **kwargs))
+            self.offset += size
+
+    def add_entry(
+        self, name: str, date_time: datetime, content, external_attr=FILE_ATTRIBUTES
+    ):
+        """
+        Agrega una entrada; content(builder) agrega los segmentos del
+        contenido y regresa la función que calcula su CRC
+        """
+        entry = new_entry(
+            name, ZIP_STORED, date_time, self.offset - self.start, external_attr
+        )
+        header = local_header(entry)
+        self.append(len(header), data=header)
+
+        content_start = self.offset
+        crc = content(self)
+        entry.size = entry.compressed_size = self.offset - content_start
+
+        self.append(
+            DATA_DESCRIPTOR.size,
+            render=lambda resolver: data_descriptor(replace(entry, crc=crc(resolver))),
+        )
+        self.entries.append((entry, crc))
+
+    def add_file(self, name: str, bundle_file: BundleFile):
+        def content(builder):
+            builder.append(bundle_file.size, bundle_file=bundle_file)
+            builder.file_ends.append(builder.offset)
+            return lambda resolver: resolver(bundle_file)
+
+        self.add_entry(name, entry_date_time(bundle_file), content)
+
+    def add_directory(self, name: str, date_time: datetime):
+        self.add_entry(
+            f"{name}/",
+            date_time,
+            lambda builder: lambda resolver: 0,
+            DIRECTORY_ATTRIBUTES,
+        )
+
+    def add_folder_zip(self, name: str, files: List[BundleFile]):
+        def content(builder):
+            first = len(builder.segments)
+            folder_zip = _ArchiveBuilder(
+                builder.segments, builder.offset, builder.file_ends
+            )
+            for bundle_file in files:
+                folder_zip.add_file(bundle_file.file_name, bundle_file)
+            folder_zip.finish()
+            builder.offset = folder_zip.offset
+            inner = builder.segments[first:]
+
+            def crc(resolver):
+                def compute():
+                    value = 0
+                    for segment in inner:
+                        value = crc32_combine(
+                            value, _segment_crc(segment, resolver), segment.size
+                        )
+                    return value
+
+                return resolver.cached(("folder", first), compute)
+
+            return crc
+
+        self.add_entry(name, folder_date_time(files), content)
+
+    def finish(self):
+        central_directory_offset = self.offset - self.start
+        for entry, crc in self.entries:
+            self.append(
+                len(central_header(entry)),
+                render=lambda resolver, entry=entry, crc=crc: central_header(
+                    replace(entry, crc=crc(resolver))
+                ),
+            )
+        central_directory_size = self.offset - self.start - central_directory_offset
+        records = end_records(
+            len(self.entries), central_directory_offset, central_directory_size
+        )
+        self.append(len(records), data=records)
+
+
+def plan_bundle(folders, layout: str) -> BundlePlan:
+    """
+    Calcula el ZIP del bundle (sin compresión y con fechas y orden fijos) a
+    partir de los tamaños de S3. El mismo contenido en S3 produce siempre
+    los mismos bytes, por lo que se conoce el tamaño total y se puede
+    entregar cualquier rango.
+    """
+    segments = []
+    file_ends = []
+    archive = _ArchiveBuilder(segments, 0, file_ends)
+    for folder_name, files in folders:
+        if layout == LAYOUT_FLAT:
+            archive.add_directory(folder_name, folder_date_time(files))
+            for bundle_file in files:
+                archive.add_file(f"{folder_name}/{bundle_file.file_name}", bundle_file)
+        else:
+            archive.add_folder_zip(f"{folder_name}.zip", files)
+    archive.finish()
+
+    return BundlePlan(
+        segments=segments,
+        size=archive.offset,
+        digest=bundle_digest(folders, layout, ZIP_STORED),
+        file_ends=file_ends,
+    )
+
+
+def iter_bundle_range(
+    plan: BundlePlan,
+    start: int,
+    end: int,
+    max_in_flight: int = BUNDLE_FETCH_CONCURRENCY,
+) -> Iterator[bytes]:
+    """
+    Entrega los bytes [start, end] del bundle leyendo de S3 solo los bytes de
+    los objetos que caen dentro del rango
+    """
+    window = [
+        segment
+        for segment in plan.segments
+        if segment.offset <= end and segment.offset + segment.size > start
+    ]
+
+    def bounds(segment):
+        return (
+            max(start, segment.offset) - segment.offset,
+            min(end, segment.offset + segment.size - 1) - segment.offset,
+        )
+
+    file_ranges = [
+        (segment.bundle_file, *bounds(segment))
+        for segment in window
+        if segment.bundle_file is not None
+    ]
+    # Si el objeto cambió después del HEAD la descarga falla en vez de
+    # entregar bytes que no coinciden con el tamaño anunciado
+    contents = fetch_ranges(file_ranges, max_in_flight, match_etag=True)
+    resolver = CrcResolver()
+    try:
+        for segment in window:
+            low, high = bounds(segment)
+            if segment.bundle_file is None:
+                data = segment.data
+                if data is None:
+                    data = segment.render(resolver)
+                yield data[low : high + 1]
+                continue
+
+            crc = 0
+            for chunk in next(contents):
+                crc = zlib.crc32(chunk, crc)
+                yield chunk
+            if high == segment.size - 1:
+                resolver.add_tail(segment.bundle_file, low, crc)
+    finally:
+        contents.close()
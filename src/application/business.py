@@ -1,25 +1,136 @@
-import io
 import logging
-import zipfile
-from datetime import datetime
+import os
+import time
+from bisect import bisect_right
+from functools import partial
+from urllib.parse import quote
 from result import Ok, Err
-from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
-from infrastructure.s3 import upload_file, download_file
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from application.batch_upload import iter_batch_files, upload_batch
+from application.bundle_layout import (
+    LAYOUT_FLAT,
+    bundle_digest,
+    bundle_etag,
+    bundle_filename,
+    entry_date_time,
+    folder_date_time,
+    iter_bundle_range,
+    plan_bundle,
+)
+from application.compression import choose_compression
+from application.fetch import resolve_files, fetch_files
+from application.http_range import (
+    RangeNotSatisfiable,
+    if_range_matches,
+    parse_byte_range,
+)
+from application.multipart_stream import MultipartError
+from application.zip_stream import ZipStream
+from infrastructure.bundle_cache import get_bundle_cache, iter_file_range
+from infrastructure.executors import get_compression_executor, iterate_blocking
+from infrastructure.job_queue import JobQueueFull, get_job_queue
+from infrastructure.metadata_cache import invalidate_object_metadata
+from infrastructure.metrics import BUNDLE_BUILD_DURATION, BUNDLE_ENTRIES, record_cache
+from infrastructure.presigned_urls import get_presigned_url
+from domain.constants import (
+    BATCH_UPLOAD_CONCURRENCY,
+    BATCH_UPLOAD_MAX_FILES,
+    BUNDLE_COMPRESSION,
+    BUNDLE_COMPRESSION_BLOCK_SIZE,
+    BUNDLE_COMPRESSION_LEVEL,
+    BUNDLE_COMPRESSION_WORKERS,
+    BUNDLE_JOBS_S3_BUCKET,
+    BUNDLE_JOBS_S3_PREFIX,
+    BUNDLE_LAYOUT,
+    BUNDLE_PARALLEL_COMPRESSION_MIN_SIZE,
+    BUNDLE_RESUMABLE,
+    DOWNLOAD_CHUNK_SIZE,
+    FILE_DOWNLOAD_REDIRECT,
+    UPLOAD_CONCURRENCY,
+    UPLOAD_PART_SIZE,
+)
+from infrastructure.s3 import object_exists, upload_stream
+from domain.entities.bundle_job import JOB_COMPLETED, JOB_FAILED, JOB_RUNNING
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
 
 logger = logging.getLogger(__name__)
 
-def upload_file_logic(file_content, bucket_name, key):
-    file_buffer = io.BytesIO(file_content)
-
+def upload_file_logic(file_chunks, bucket_name, key):
     try:
-        success = upload_file(file_buffer, bucket_name, key)
+        # El archivo se sube a S3 conforme llega en el request
+        success = upload_stream(
+            file_chunks, bucket_name, key, UPLOAD_PART_SIZE, UPLOAD_CONCURRENCY
+        )
         
         if success == True:
+            invalidate_object_metadata(bucket_name, key)
             return Ok({"message": "File uploaded successfully", "status": "success"})
         else:
             return Err(success)  # Pass the specific error (e.g., "BucketNotFound") directly
 
+    except MultipartError as e:
+        logger.error(f"Invalid form: {e}")
+        return Err(f"InvalidForm: {e}")
+
+    except NoCredentialsError:
+        logger.error("AWS credentials not found")
+        return Err("AWS credentials not found")
+
+    except PartialCredentialsError:
+        logger.error("Incomplete AWS credentials")
+        return Err("Incomplete AWS credentials")
+
+    except ClientError as e:
+        logger.error(f"ClientError: {e}")
+        return Err(f"ClientError: {e}")
+
+    except Exception as e:
+        logger.error(f"An unexpected error occurred: {e}")
+        return Err(f"An unexpected error occurred: {e}")
+
+def upload_files_logic(form_files, bucket_name, prefix="", allowed_keys=None):
+    try:
+        # Los archivos se suben en paralelo conforme llegan en el request
+        results, form_error = upload_batch(
+            iter_batch_files(form_files),
+            bucket_name,
+            prefix,
+            allowed_keys,
+            UPLOAD_PART_SIZE,
+            UPLOAD_CONCURRENCY,
+            BATCH_UPLOAD_CONCURRENCY,
+            BATCH_UPLOAD_MAX_FILES,
+        )
+        if form_error is not None and not results:
+            return Err(f"InvalidForm: {form_error}")
+        if not results:
+            return Err("InvalidForm: At least one file is required")
+        if form_error is None and all(
+            result.get("error") == "Bucket not found" for result in results
+        ):
+            return Err("BucketNotFound")
+        uploaded = sum(result["status"] == "success" for result in results)
+        response = {
+            "files": results,
+            "uploaded": uploaded,
+            "failed": len(results) - uploaded,
+        }
+        # Los archivos anteriores al error ya están en S3, el cliente recibe
+        # su resultado junto con el error del form
+        if form_error is not None:
+            response["error"] = form_error
+        return Ok(response)
+
+    except MultipartError as e:
+        logger.error(f"Invalid form: {e}")
+        return Err(f"InvalidForm: {e}")
+
     except NoCredentialsError:
         logger.error("AWS credentials not found")
         return Err("AWS credentials not found")
@@ -36,82 +147,384 @@ def upload_file_logic(file_content, bucket_name, key):
         logger.error(f"An unexpected error occurred: {e}")
         return Err(f"An unexpected error occurred: {e}")
 
+def compressed_bundle_digest(folders, layout):
+    # La configuración de compresión cambia los bytes del ZIP
+    return bundle_digest(
+        folders,
+        layout,
+        BUNDLE_COMPRESSION,
+        BUNDLE_COMPRESSION_LEVEL,
+        BUNDLE_COMPRESSION_BLOCK_SIZE,
+        BUNDLE_PARALLEL_COMPRESSION_MIN_SIZE,
+    )
+
+
+def attachment_disposition(file_name):
+    """
+    Content-Disposition de descarga; los nombres no ASCII van en filename*
+    """
+    fallback = file_name.encode("ascii", "replace").decode("ascii").replace('"', "")
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(file_name)}"
+
+
+def redirect_response(url, expires_in):
+    # 303 para que los clientes sigan la redirección con GET también desde POST
+    return RedirectResponse(
+        url,
+        status_code=303,
+        headers={"Cache-Control": f"private, max-age={expires_in}"},
+    )
+
+
+def ranged_response(
+    read_range, size, etag, headers, status_code, range_header=None, if_range=None
+):
+    """
+    Responde el bundle completo o el rango pedido con Range/If-Range.
+    read_range(start, end) regresa los chunks de los bytes [start, end].
+    """
+    headers = {**headers, "Accept-Ranges": "bytes", "ETag": etag}
+
+    byte_range = None
+    if if_range_matches(if_range, etag):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416,
+                headers={"Content-Range": f"bytes */{size}", "ETag": etag},
+            )
+
+    if byte_range is None:
+        start, end = 0, size - 1
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    # Los chunks se generan en el pool de trabajo bloqueante, no en el event loop
+    return StreamingResponse(
+        iterate_blocking(read_range(start, end)),
+        headers=headers,
+        status_code=status_code,
+    )
+
+
+def measure_bundle(chunks, mode, entries):
+    """
+    Registra el tiempo de generación y los archivos del bundle; si la
+    descarga se interrumpe no se registra
+    """
+    started_at = time.perf_counter()
+    yield from chunks
+    BUNDLE_BUILD_DURATION.observe(time.perf_counter() - started_at, mode)
+    BUNDLE_ENTRIES.observe(entries, mode)
+
+
 # Función para la lógica de descarga de archivos
-def download_file_logic(files_data):
-    final_zip_buffer = io.BytesIO()  # Buffer para el ZIP final
-    has_files = False  # Verifica si al menos un archivo fue descargado
-    missing_files = []  # Lista para almacenar archivos que no se encontraron
-
-    with zipfile.ZipFile(final_zip_buffer, 'w') as final_zip:
-        for bucket_name, folders in files_data.items():
-            for folder_dict in folders:
-                for folder_name, files in folder_dict.items():
-                    folder_zip_buffer = io.BytesIO()  # Buffer en memoria para el ZIP de la carpeta
-                    files_in_folder = False  # Asegura que la carpeta tiene archivos válidos
-
-                    with zipfile.ZipFile(folder_zip_buffer, 'w') as folder_zip:
-                        for file_info in files:
-                            key = file_info["key"]
-                            file_name = file_info["fileName"]
-                            # Descargar el archivo de S3
-                            file_obj = download_file(bucket_name, key)
-
-                            if file_obj:
-                                folder_zip.writestr(file_name, file_obj.read())
-                                files_in_folder = True
-                                has_files = True  # Marcar que se encontró al menos un archivo
-                            else:
-                                logger.error(f"Failed to download {key} from {bucket_name}")
-                                missing_files.append(f"{key} from {bucket_name}")
-                                # Continuar con el siguiente archivo en lugar de retornar un error
-
-                    # Solo agregar la carpeta si contiene archivos válidos
-                    if files_in_folder:
-                        folder_zip_buffer.seek(0)
-                        final_zip.writestr(f"{folder_name}.zip", folder_zip_buffer.getvalue())
-
-    if not has_files:
+def download_file_logic(
+    files_data, layout=None, range_header=None, if_range=None, redirect=None
+):
+    # Carpetas con al menos un archivo disponible en S3 y archivos faltantes
+    folders_found, missing_files = resolve_files(files_data)
+
+    if not folders_found:
         # En lugar de lanzar un error, devolvemos un mensaje personalizado
         return {
             "response": None,
             "error": "No files found to download.",
             "status_code": 404  # Puedes cambiar este código según lo que necesites
         }
-    
-    if missing_files:
-        # Retornar una advertencia sobre los archivos que faltan, pero devolver el ZIP
-        final_zip_buffer.seek(0)  # Asegurarse de que el buffer del ZIP esté en el inicio
-        return StreamingResponse(
-            final_zip_buffer,
-            headers={
-                "Content-Disposition": f"attachment; filename={datetime.now().strftime('%Y%m%d%H%M%S')}.zip",
-                "Content-Type": "application/zip"
-            },
-            status_code=206  # Aquí especificamos el código de estado 206
+
+    if redirect is None:
+        redirect = FILE_DOWNLOAD_REDIRECT
+    bundle_files = [bundle_file for _, files in folders_found for bundle_file in files]
+    if redirect and len(bundle_files) == 1 and not missing_files:
+        # Un solo archivo se descarga directo de S3, sin pasar por el servicio
+        bundle_file = bundle_files[0]
+        url, expires_in = get_presigned_url(
+            bundle_file.bucket_name,
+            bundle_file.key,
+            ResponseContentDisposition=attachment_disposition(bundle_file.file_name),
         )
+        return redirect_response(url, expires_in)
 
-    # Generar el nombre del archivo ZIP final con timestamp
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    final_filename = f"{timestamp}.zip"
+    layout = layout or BUNDLE_LAYOUT
+    plan = None
+    if BUNDLE_RESUMABLE:
+        # El ZIP sin compresión se calcula de antemano: se conoce su tamaño y
+        # se puede reanudar con Range
+        plan = plan_bundle(folders_found, layout)
+        digest = plan.digest
+    else:
+        digest = compressed_bundle_digest(folders_found, layout)
 
-    # Devolver el ZIP final como StreamingResponse con el nombre formateado
-    final_zip_buffer.seek(0)  # Asegurarse de que el buffer del ZIP esté en el inicio
+    # El nombre del ZIP depende solo del contenido solicitado
     headers = {
-        "Content-Disposition": f"attachment; filename={final_filename}",
+        "Content-Disposition": f"attachment; filename={bundle_filename(digest)}",
         "Content-Type": "application/zip"
     }
+    if missing_files:
+        headers["X-Missing-Files"] = str(len(missing_files))
+
+    # Si faltan archivos se devuelve el ZIP parcial con código 206
+    status_code = 206 if missing_files else 200
+    respond = partial(
+        ranged_response,
+        headers=headers,
+        status_code=status_code,
+        range_header=range_header,
+        if_range=if_range,
+    )
+
+    # El digest incluye el ETag de cada objeto, un bundle en cache nunca
+    # está desactualizado
+    bundle_cache = get_bundle_cache()
+    if bundle_cache is not None:
+        cached_file = bundle_cache.open(digest)
+        if cached_file is not None:
+            logger.debug("Bundle cache hit: %s", digest)
+            record_cache("bundle", True)
+            try:
+                response = respond(
+                    lambda start, end: iter_file_range(
+                        cached_file, start, end, DOWNLOAD_CHUNK_SIZE
+                    ),
+                    os.fstat(cached_file.fileno()).st_size,
+                    bundle_etag(digest),
+                )
+            except BaseException:
+                cached_file.close()
+                raise
+            # Sin streaming (416) el archivo no se llega a leer
+            if not isinstance(response, StreamingResponse):
+                cached_file.close()
+            return response
+        cached_size = bundle_cache.head_s3(digest)
+        record_cache("bundle", cached_size is not None)
+        if cached_size is not None and redirect:
+            url, expires_in = bundle_cache.presigned_s3_url(
+                digest, attachment_disposition(bundle_filename(digest))
+            )
+            return redirect_response(url, expires_in)
+        if cached_size is not None:
+            logger.debug("Bundle cache hit in S3: %s", digest)
+            return respond(
+                lambda start, end: bundle_cache.stream_s3(digest, start, end),
+                cached_size,
+                bundle_etag(digest),
+            )
+
+    if plan is not None:
+
+        def read_range(start, end):
+            chunks = iter_bundle_range(plan, start, end)
+            if start == 0 and end == plan.size - 1:
+                chunks = measure_bundle(chunks, "stored", len(bundle_files))
+                # Solo una descarga completa deja el bundle en cache
+                if bundle_cache is not None:
+                    chunks = bundle_cache.store(digest, chunks)
+            return chunks
+
+        return respond(read_range, plan.size, plan.etag)
+
+    chunks = measure_bundle(
+        generate_zip(folders_found, layout), "compressed", len(bundle_files)
+    )
+    if bundle_cache is not None:
+        chunks = bundle_cache.store(digest, chunks)
+    return StreamingResponse(
+        iterate_blocking(chunks), headers=headers, status_code=status_code
+    )
+
+
+def add_bundle_file(zip_stream, name, bundle_file, chunks):
+    """
+    Agrega un archivo al ZIP con la compresión adecuada para su tipo
+    """
+    compression, chunks = choose_compression(
+        bundle_file.file_name, bundle_file.content_type, chunks
+    )
+
+    # Los archivos grandes se comprimen por bloques en varios núcleos
+    executor = None
+    if bundle_file.size >= BUNDLE_PARALLEL_COMPRESSION_MIN_SIZE:
+        executor = get_compression_executor()
+
+    yield from zip_stream.add(
+        name,
+        chunks,
+        compression=compression,
+        compress_level=BUNDLE_COMPRESSION_LEVEL,
+        date_time=entry_date_time(bundle_file),
+        executor=executor,
+        block_size=BUNDLE_COMPRESSION_BLOCK_SIZE,
+        max_in_flight=BUNDLE_COMPRESSION_WORKERS * 2,
+    )
+
+
+def generate_folder_zip(files, contents):
+    """
+    Genera el ZIP de una carpeta con el contenido descargado de S3
+    """
+    folder_zip = ZipStream()
+    for bundle_file in files:
+        yield from add_bundle_file(
+            folder_zip, bundle_file.file_name, bundle_file, next(contents)
+        )
+    yield from folder_zip.finish()
+
+
+def generate_zip(folders, layout=BUNDLE_LAYOUT):
+    """
+    Genera el ZIP final emitiendo los bytes conforme llegan de S3 para no
+    mantener el archivo completo en memoria. Con layout "nested" cada carpeta
+    es un ZIP dentro del ZIP final y con "flat" es un directorio.
+    """
+    # Las descargas se hacen en paralelo pero se escriben en el orden del token
+    contents = fetch_files(bundle_file for _, files in folders for bundle_file in files)
+    try:
+        final_zip = ZipStream()
+        for folder_name, files in folders:
+            if layout == LAYOUT_FLAT:
+                yield from final_zip.add_directory(folder_name, folder_date_time(files))
+                for bundle_file in files:
+                    yield from add_bundle_file(
+                        final_zip,
+                        f"{folder_name}/{bundle_file.file_name}",
+                        bundle_file,
+                        next(contents),
+                    )
+            else:
+                # El ZIP de la carpeta ya viene comprimido, se guarda sin comprimir
+                yield from final_zip.add(
+                    f"{folder_name}.zip",
+                    generate_folder_zip(files, contents),
+                    date_time=folder_date_time(files),
+                )
+        yield from final_zip.finish()
+    finally:
+        contents.close()
+
+
+def track_job_progress(job, chunks, file_ends=None):
+    """
+    Actualiza los bytes (y con file_ends los archivos) ya escritos del job
+    """
+    for chunk in chunks:
+        job.bytes_done += len(chunk)
+        if file_ends is not None:
+            job.files_done = bisect_right(file_ends, job.bytes_done)
+        yield chunk
+
+
+def run_bundle_job(job, files_data, layout=None):
+    """
+    Genera el bundle de un job y lo sube a S3 con un multipart upload,
+    sin guardarlo completo en memoria ni en disco
+    """
+    job.status = JOB_RUNNING
+    folders_found, missing_files = resolve_files(files_data)
+    job.missing_files = len(missing_files)
+    if not folders_found:
+        job.status = JOB_FAILED
+        job.error = "No files found to download."
+        return
+    job.files_total = sum(len(files) for _, files in folders_found)
+
+    layout = layout or BUNDLE_LAYOUT
+    if BUNDLE_RESUMABLE:
+        plan = plan_bundle(folders_found, layout)
+        digest = plan.digest
+        job.bytes_total = plan.size
+        chunks = track_job_progress(
+            job,
+            measure_bundle(
+                iter_bundle_range(plan, 0, plan.size - 1), "stored", job.files_total
+            ),
+            plan.file_ends,
+        )
+    else:
+        # Con compresión el tamaño final y el avance por archivo no se conocen
+        digest = compressed_bundle_digest(folders_found, layout)
+        chunks = track_job_progress(
+            job,
+            measure_bundle(
+                generate_zip(folders_found, layout), "compressed", job.files_total
+            ),
+        )
+
+    job.bucket_name = BUNDLE_JOBS_S3_BUCKET
+    job.key = f"{BUNDLE_JOBS_S3_PREFIX}{digest}.zip"
+    job.file_name = bundle_filename(digest)
+
+    # Un job anterior con el mismo contenido ya dejó el bundle en S3
+    if object_exists(job.bucket_name, job.key):
+        chunks.close()
+    else:
+        success = upload_stream(
+            chunks, job.bucket_name, job.key, UPLOAD_PART_SIZE, UPLOAD_CONCURRENCY
+        )
+        if success != True:
+            raise Exception(f"Upload of {job.key} failed: {success}")
+
+    job.files_done = job.files_total
+    job.bytes_total = job.bytes_total or job.bytes_done
+    job.bytes_done = job.bytes_total
+    job.status = JOB_COMPLETED
+
+
+def bundle_job_status(job):
+    status = {
+        "job_id": job.job_id,
+        "status": job.status,
+        "files_total": job.files_total,
+        "files_done": job.files_done,
+        "missing_files": job.missing_files,
+        "bytes_total": job.bytes_total,
+        "bytes_done": job.bytes_done,
+        "error": job.error,
+    }
+    if job.status == JOB_COMPLETED:
+        # La liga se firma en cada consulta para que nunca se entregue vencida
+        url, expires_in = get_presigned_url(
+            job.bucket_name,
+            job.key,
+            ResponseContentDisposition=attachment_disposition(job.file_name),
+        )
+        status["download_url"] = url
+        status["download_url_expires_in"] = expires_in
+    return status
+
+
+def create_bundle_job_logic(files_data, layout=None):
+    try:
+        job = get_job_queue().submit(run_bundle_job, files_data, layout)
+    except JobQueueFull:
+        return Err("JobQueueFull")
+    return Ok(bundle_job_status(job))
 
-    return StreamingResponse(final_zip_buffer, headers=headers, status_code=200)
+
+def get_bundle_job_logic(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return Err("JobNotFound")
+    return Ok(bundle_job_status(job))
 
 
 uses_cases = {
     "put_file": upload_file_logic,
+    "put_files": upload_files_logic,
     "get_file": download_file_logic,
+    "create_bundle_job": create_bundle_job_logic,
+    "get_bundle_job": get_bundle_job_logic,
 }
 
 def business_logic(action, context: dict) -> dict:
-    logger.info(f"Context: {context}")
-    logger.info(f"Action: {action}")
+    # El contexto puede traer el contenido del archivo, solo se registran
+    # sus llaves
+    logger.info("Action: %s, context keys: %s", action, list(context))
 
     if action not in uses_cases:
         raise Exception(f"Event {action} not found")
@@ -135,6 +548,24 @@ def business_logic(action, context: dict) -> dict:
                     "error": "Bucket not found",
                     "status_code": 404
                 }
+            elif error_message == "JobNotFound":
+                return {
+                    "response": "",
+                    "error": "Job not found",
+                    "status_code": 404
+                }
+            elif error_message == "JobQueueFull":
+                return {
+                    "response": "",
+                    "error": "Too many bundle jobs in progress",
+                    "status_code": 503
+                }
+            elif error_message.startswith("InvalidForm: "):
+                return {
+                    "response": "",
+                    "error": error_message[len("InvalidForm: ") :],
+                    "status_code": 400
+                }
             elif "ClientError" in error_message:
                 return {
                     "response": "",
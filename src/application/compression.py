@@ -0,0 +1,132 @@
+import itertools
+import os
+import zlib
+from typing import Iterable, Optional, Tuple
+
+from application.zip_stream import ZIP_DEFLATED, ZIP_STORED
+from domain.constants import BUNDLE_COMPRESSION
+
+COMPRESSION_AUTO = "auto"
+COMPRESSION_STORE = "store"
+COMPRESSION_DEFLATE = "deflate"
+
+# Formatos que ya vienen comprimidos, comprimirlos otra vez solo gasta CPU
+COMPRESSED_EXTENSIONS = {
+    ".7z",
+    ".aac",
+    ".avi",
+    ".br",
+    ".bz2",
+    ".docx",
+    ".flv",
+    ".gif",
+    ".gz",
+    ".heic",
+    ".jpeg",
+    ".jpg",
+    ".m4a",
+    ".m4v",
+    ".mkv",
+    ".mov",
+    ".mp3",
+    ".mp4",
+    ".odp",
+    ".ods",
+    ".odt",
+    ".ogg",
+    ".pdf",
+    ".png",
+    ".pptx",
+    ".rar",
+    ".tgz",
+    ".webm",
+    ".webp",
+    ".wmv",
+    ".xlsx",
+    ".xz",
+    ".zip",
+    ".zst",
+}
+TEXT_EXTENSIONS = {
+    ".csv",
+    ".htm",
+    ".html",
+    ".json",
+    ".log",
+    ".md",
+    ".sql",
+    ".svg",
+    ".tsv",
+    ".txt",
+    ".xml",
+    ".yaml",
+    ".yml",
+}
+TEXT_CONTENT_TYPES = (
+    "text/",
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+)
+COMPRESSED_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-7z-compressed",
+    "application/vnd.openxmlformats-officedocument.",
+)
+
+SAMPLE_SIZE = 64 * 1024
+# Si la muestra no baja al menos 10% no vale la pena comprimir
+SAMPLE_MIN_SAVING = 0.9
+
+
+def _sample_is_compressible(sample: bytes) -> bool:
+    sample = sample[:SAMPLE_SIZE]
+    if not sample:
+        return False
+    return len(zlib.compress(sample, 1)) < len(sample) * SAMPLE_MIN_SAVING
+
+
+def choose_compression(
+    file_name: str,
+    content_type: Optional[str],
+    chunks: Iterable[bytes],
+    policy: str = BUNDLE_COMPRESSION,
+) -> Tuple[int, Iterable[bytes]]:
+    """
+    Decide el método de compresión de una entrada del ZIP por extensión,
+    content type o, si no es posible, con una muestra del contenido
+
+    Returns:
+        Tupla con el método (ZIP_STORED o ZIP_DEFLATED) y los chunks a escribir
+    """
+    if policy == COMPRESSION_STORE:
+        return ZIP_STORED, chunks
+    if policy == COMPRESSION_DEFLATE:
+        return ZIP_DEFLATED, chunks
+
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension in COMPRESSED_EXTENSIONS:
+        return ZIP_STORED, chunks
+    if extension in TEXT_EXTENSIONS:
+        return ZIP_DEFLATED, chunks
+
+    content_type = (content_type or "").lower()
+    if content_type.startswith(TEXT_CONTENT_TYPES):
+        return ZIP_DEFLATED, chunks
+    if content_type.startswith(COMPRESSED_CONTENT_TYPES):
+        return ZIP_STORED, chunks
+
+    # Se revisa el primer chunk y se vuelve a poner al inicio del stream
+    chunks = iter(chunks)
+    first_chunk = next(chunks, b"")
+    chunks = itertools.chain([first_chunk], chunks)
+    if _sample_is_compressible(first_chunk):
+        return ZIP_DEFLATED, chunks
+    return ZIP_STORED, chunks
@@ -0,0 +1,214 @@
+import base64
+import logging
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from domain.constants import (
+    BUNDLE_FETCH_CONCURRENCY,
+    BUNDLE_PARALLEL_RANGE_MIN_SIZE,
+    BUNDLE_PREFETCH_MAX_SIZE,
+    BUNDLE_RANGE_CONCURRENCY,
+    BUNDLE_RANGE_SIZE,
+    DOWNLOAD_CHUNK_SIZE,
+)
+from domain.entities.bundle_file import BundleFile
+from infrastructure.executors import get_s3_executor
+from infrastructure.s3 import head_file, stream_file
+
+logger = logging.getLogger(__name__)
+
+
+def map_ordered(
+    func: Callable, items: Iterable, max_in_flight: int, executor: Executor
+) -> Iterator:
+    """
+    Ejecuta func sobre cada item en el executor con a lo sumo max_in_flight
+    tareas pendientes y entrega los resultados en el mismo orden de items
+    """
+    pending = deque()
+    items = iter(items)
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= max_in_flight:
+                break
+
+        while pending:
+            result = pending.popleft().result()
+            for item in items:
+                pending.append(executor.submit(func, item))
+                break
+            yield result
+    finally:
+        # Si el consumidor se detiene (cliente desconectado) no se descargan
+        # los archivos que aún no empezaron
+        for future in pending:
+            future.cancel()
+
+
+def _full_object_crc32(metadata) -> Optional[int]:
+    # Los checksums compuestos de multipart ("...-N") no son el CRC del objeto
+    checksum = metadata.get("ChecksumCRC32")
+    if not checksum or "-" in checksum:
+        return None
+    if metadata.get("ChecksumType", "FULL_OBJECT") != "FULL_OBJECT":
+        return None
+    return int.from_bytes(base64.b64decode(checksum), "big")
+
+
+def resolve_files(files_data, max_in_flight: int = BUNDLE_FETCH_CONCURRENCY):
+    """
+    Consulta la metadata de todos los archivos del token en paralelo
+
+    Returns:
+        Tupla con las carpetas que tienen archivos disponibles
+        [(folder_name, [BundleFile])] y la lista de archivos faltantes
+    """
+    requested = []
+    folder_names = []
+    for bucket_name, folders in files_data.items():
+        for folder_dict in folders:
+            for folder_name, files in folder_dict.items():
+                folder_names.append(folder_name)
+                for file_info in files:
+                    requested.append((bucket_name, len(folder_names) - 1, file_info))
+
+    def head(item):
+        bucket_name, _, file_info = item
+        return head_file(bucket_name, file_info["key"], checksum=True)
+
+    folders_found = {}
+    missing_files = []
+    results = map_ordered(head, requested, max_in_flight, get_s3_executor())
+    for (bucket_name, folder_index, file_info), metadata in zip(requested, results):
+        key = file_info["key"]
+        if metadata:
+            folders_found.setdefault(folder_index, []).append(
+                BundleFile(
+                    bucket_name=bucket_name,
+                    key=key,
+                    file_name=file_info["fileName"],
+                    size=metadata["ContentLength"],
+                    content_type=metadata.get("ContentType"),
+                    etag=metadata.get("ETag"),
+                    last_modified=metadata.get("LastModified"),
+                    crc32=_full_object_crc32(metadata),
+                )
+            )
+        else:
+            logger.error(f"Failed to download {key} from {bucket_name}")
+            missing_files.append(f"{key} from {bucket_name}")
+
+    # Solo se incluyen las carpetas que contienen archivos válidos
+    folders = [
+        (folder_names[folder_index], files)
+        for folder_index, files in folders_found.items()
+    ]
+    return folders, missing_files
+
+
+# Bytes [start, end] de un archivo del bundle
+FileRange = Tuple[BundleFile, int, int]
+
+
+def _read_range(bundle_file: BundleFile, start: int, end: int, etag: Optional[str]):
+    return b"".join(
+        stream_file(
+            bundle_file.bucket_name,
+            bundle_file.key,
+            DOWNLOAD_CHUNK_SIZE,
+            start,
+            end,
+            etag,
+        )
+    )
+
+
+def _prefetch(file_range: FileRange, match_etag: bool):
+    # Los rangos grandes se leen en streaming cuando les toca su turno
+    bundle_file, start, end = file_range
+    if end - start + 1 > BUNDLE_PREFETCH_MAX_SIZE:
+        return None
+    if end < start:
+        return b""
+
+    return _read_range(
+        bundle_file, start, end, bundle_file.etag if match_etag else None
+    )
+
+
+def iter_parallel_range(
+    bundle_file: BundleFile,
+    start: int,
+    end: int,
+    range_size: int = BUNDLE_RANGE_SIZE,
+    max_in_flight: int = BUNDLE_RANGE_CONCURRENCY,
+) -> Iterator[bytes]:
+    """
+    Lee los bytes [start, end] de un objeto grande en rangos de range_size
+    descargados en paralelo y los entrega en orden; a lo sumo max_in_flight
+    rangos esperan en memoria. Los rangos se piden con el ETag de la consulta
+    inicial para no mezclar versiones del objeto.
+    """
+    parts = [
+        (part_start, min(part_start + range_size - 1, end))
+        for part_start in range(start, end + 1, range_size)
+    ]
+    yield from map_ordered(
+        lambda part: _read_range(bundle_file, part[0], part[1], bundle_file.etag),
+        parts,
+        max_in_flight,
+        get_s3_executor(),
+    )
+
+
+def fetch_ranges(
+    ranges: Iterable[FileRange],
+    max_in_flight: int = BUNDLE_FETCH_CONCURRENCY,
+    match_etag: bool = False,
+) -> Iterator[Iterable[bytes]]:
+    """
+    Descarga los rangos en paralelo y entrega el contenido de cada uno en el
+    orden recibido. Los rangos pequeños se descargan por adelantado, los
+    grandes se entregan como un stream de chunks y los de al menos
+    BUNDLE_PARALLEL_RANGE_MIN_SIZE se leen por partes en paralelo. Con
+    match_etag la descarga falla si el objeto ya no tiene el ETag de la
+    consulta inicial.
+    """
+    ranges = list(ranges)
+    results = map_ordered(
+        lambda file_range: _prefetch(file_range, match_etag),
+        ranges,
+        max_in_flight,
+        get_s3_executor(),
+    )
+    try:
+        for (bundle_file, start, end), content in zip(ranges, results):
+            if end - start + 1 >= BUNDLE_PARALLEL_RANGE_MIN_SIZE:
+                yield iter_parallel_range(bundle_file, start, end)
+            elif content is None:
+                yield stream_file(
+                    bundle_file.bucket_name,
+                    bundle_file.key,
+                    DOWNLOAD_CHUNK_SIZE,
+                    start,
+                    end,
+                    bundle_file.etag if match_etag else None,
+                )
+            else:
+                yield [content]
+    finally:
+        results.close()
+
+
+def fetch_files(
+    files: Iterable[BundleFile], max_in_flight: int = BUNDLE_FETCH_CONCURRENCY
+) -> Iterator[Iterable[bytes]]:
+    """
+    Descarga los archivos completos en paralelo, en el orden recibido
+    """
+    return fetch_ranges(
+        ((bundle_file, 0, bundle_file.size - 1) for bundle_file in files),
+        max_in_flight,
+    )
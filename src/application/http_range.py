@@ -0,0 +1,125 @@
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_byte_range(
+    range_header: Optional[str], size: int
+) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta un header Range de un solo rango ("bytes=a-b", "bytes=a-" o
+    "bytes=-n")
+
+    Returns:
+        Tupla (start, end) inclusiva o None si el header no existe, no se
+        entiende o pide varios rangos; en esos casos se entrega el recurso
+        completo
+
+    Raises:
+        RangeNotSatisfiable: Si el rango cae fuera del recurso
+    """
+    if not range_header:
+        return None
+
+    range_match = BYTE_RANGE.fullmatch(range_header.strip())
+    if not range_match:
+        return None
+
+    first, last = range_match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Sufijo: los últimos n bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(range_header)
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def http_date(date_time: datetime) -> str:
+    return format_datetime(date_time.astimezone(timezone.utc), usegmt=True)
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        date_time = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date_time.tzinfo is None:
+        date_time = date_time.replace(tzinfo=timezone.utc)
+    return date_time
+
+
+def _same_second(first: datetime, second: datetime) -> bool:
+    # Las fechas HTTP no tienen fracciones de segundo
+    return int(first.timestamp()) == int(second.timestamp())
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def if_range_matches(
+    if_range: Optional[str],
+    etag: Optional[str],
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """
+    Indica si el Range se debe respetar según el header If-Range: el ETag
+    (comparación fuerte) o la fecha deben coincidir con los actuales. Si no
+    coinciden se envía el recurso completo.
+    """
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return etag is not None and not etag.startswith("W/") and if_range == etag
+
+    date_time = _parse_http_date(if_range)
+    if date_time is None or last_modified is None:
+        return False
+    return _same_second(date_time, last_modified)
+
+
+def is_not_modified(
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+    etag: Optional[str],
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """
+    Indica si la copia del cliente sigue vigente (respuesta 304).
+    If-None-Match tiene prioridad sobre If-Modified-Since.
+    """
+    if if_none_match:
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return any(
+            _opaque_tag(tag.strip()) == _opaque_tag(etag)
+            for tag in if_none_match.split(",")
+        )
+
+    if if_modified_since and last_modified is not None:
+        date_time = _parse_http_date(if_modified_since)
+        if date_time is None:
+            return False
+        return int(last_modified.timestamp()) <= int(date_time.timestamp())
+    return False
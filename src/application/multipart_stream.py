@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import (
+    MultipartParser,
+    MultipartState,
+    parse_options_header,
+)
+
+
+class MultipartError(Exception):
+    pass
+
+
+@dataclass
+class FormPart:
+    field_name: str
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+
+
+PART_START = "start"
+PART_DATA = "data"
+PART_END = "end"
+
+
+def iter_multipart(chunks: Iterable[bytes], content_type: str) -> Iterator[tuple]:
+    """
+    Parsea un body multipart/form-data conforme llega, sin guardarlo en
+    memoria ni en disco
+
+    Args:
+        chunks: Body del request en chunks
+        content_type: Header Content-Type del request
+
+    Returns:
+        Generador de eventos (PART_START, FormPart), (PART_DATA, bytes) y
+        (PART_END, FormPart) en el orden del body
+    """
+    media_type, params = parse_options_header(content_type or "")
+    if media_type != b"multipart/form-data" or b"boundary" not in params:
+        raise MultipartError("Expected a multipart/form-data body")
+
+    events = []
+    headers = {}
+    header_field = bytearray()
+    header_value = bytearray()
+    current = None
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data, start, end):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        headers[bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        nonlocal current
+        _, options = parse_options_header(headers.get(b"content-disposition", b""))
+        filename = options.get(b"filename")
+        part_content_type = headers.get(b"content-type")
+        current = FormPart(
+            field_name=options.get(b"name", b"").decode("utf-8"),
+            filename=filename.decode("utf-8") if filename is not None else None,
+            content_type=(
+                part_content_type.decode("latin-1") if part_content_type else None
+            ),
+        )
+        events.append((PART_START, current))
+
+    def on_part_data(data, start, end):
+        events.append((PART_DATA, bytes(data[start:end])))
+
+    def on_part_end():
+        events.append((PART_END, current))
+
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        },
+    )
+
+    try:
+        for chunk in chunks:
+            parser.write(chunk)
+            yield from events
+            events.clear()
+        parser.finalize()
+    except MultipartParseError as e:
+        raise MultipartError(f"Malformed multipart body: {e}")
+    yield from events
+    # finalize no valida que el body termine con el boundary final
+    if parser.state != MultipartState.END:
+        raise MultipartError("Incomplete multipart body")
+
+
+def iter_form_file(
+    chunks: Iterable[bytes], content_type: str, field_name: str
+) -> Iterator[bytes]:
+    """
+    Regresa el contenido del archivo enviado en field_name conforme llega
+    """
+    in_field = False
+    found = False
+    for event, value in iter_multipart(chunks, content_type):
+        if event == PART_START:
+            in_field = value.field_name == field_name and value.filename is not None
+            found = found or in_field
+        elif event == PART_DATA and in_field:
+            yield value
+        elif event == PART_END and in_field:
+            return
+    if not found:
+        raise MultipartError(f"Field '{field_name}' with a file is required")
+
+
+def iter_form_files(
+    chunks: Iterable[bytes], content_type: str
+) -> Iterator[Tuple[FormPart, Iterator[bytes]]]:
+    """
+    Regresa cada archivo del form junto con un generador de su contenido
+    conforme llega. El contenido de un archivo se debe leer antes de pedir
+    el siguiente; lo que no se lea se descarta.
+    """
+    events = iter_multipart(chunks, content_type)
+
+    def content():
+        for event, value in events:
+            if event == PART_DATA:
+                yield value
+            elif event == PART_END:
+                return
+
+    for event, value in events:
+        if event == PART_START and value.filename is not None:
+            file_content = content()
+            yield value, file_content
+            for _ in file_content:
+                pass
@@ -0,0 +1,372 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+from domain.constants import (
+    S3_READ_TIMEOUT,
+    VIDEO_CHUNK_SIZE,
+    VIDEO_READ_AHEAD_DEPTH,
+    VIDEO_READ_AHEAD_ENABLED,
+    VIDEO_READ_AHEAD_IDLE_TTL,
+    VIDEO_READ_AHEAD_MAX_BYTES,
+)
+from domain.entities.object_metadata import ObjectMetadata
+from infrastructure.chunk_cache import ChunkCache
+from infrastructure.executors import get_s3_executor
+from infrastructure.metadata_cache import invalidate_object_metadata
+from infrastructure.metrics import record_cache
+from infrastructure.read_ahead_buffer import ReadAheadBuffer
+from infrastructure.s3 import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+
+def _get_segments(
+    metadata: ObjectMetadata, first_index: int, last_index: int, chunk_size: int
+):
+    """
+    GET de los segmentos [first_index, last_index] validando el ETag
+    """
+    range_start = first_index * chunk_size
+    range_end = min((last_index + 1) * chunk_size, metadata.size) - 1
+
+    get_params = {
+        "Bucket": metadata.bucket_name,
+        "Key": metadata.key,
+        "Range": f"bytes={range_start}-{range_end}",
+    }
+    if metadata.etag:
+        get_params["IfMatch"] = metadata.etag
+    try:
+        return get_s3_client().get_object(**get_params)["Body"]
+    except Exception:
+        # Puede ser que el objeto haya cambiado, se fuerza un nuevo HEAD
+        invalidate_object_metadata(metadata.bucket_name, metadata.key)
+        raise
+
+
+class VideoReadAhead:
+    """
+    Detecta cuando un cliente pide rangos consecutivos de un video y descarga
+    en segundo plano los siguientes depth segmentos al buffer en memoria, para
+    que el siguiente Range no espere la latencia de S3.
+    """
+
+    def __init__(
+        self,
+        buffer: ReadAheadBuffer,
+        chunk_size: int,
+        depth: int,
+        max_clients: int = 10000,
+    ):
+        self.buffer = buffer
+        self.chunk_size = chunk_size
+        self.depth = depth
+        self.max_clients = max_clients
+        self._positions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(metadata: ObjectMetadata, index: int):
+        return metadata.bucket_name, metadata.key, metadata.etag, index
+
+    def contains(self, metadata: ObjectMetadata, index: int) -> bool:
+        return self.buffer.contains(self._key(metadata, index))
+
+    def get(self, metadata: ObjectMetadata, index: int) -> Optional[bytes]:
+        return self.buffer.get(self._key(metadata, index), S3_READ_TIMEOUT)
+
+    def _load(
+        self, metadata: ObjectMetadata, first_index: int, last_index: int
+    ) -> List[bytes]:
+        body = _get_segments(metadata, first_index, last_index, self.chunk_size)
+        try:
+            data = body.read()
+        finally:
+            body.close()
+        return [
+            data[offset : offset + self.chunk_size]
+            for offset in range(0, len(data), self.chunk_size)
+        ]
+
+    def observe(
+        self,
+        client_id: str,
+        metadata: ObjectMetadata,
+        start: int,
+        end: int,
+        chunk_cache: Optional[ChunkCache] = None,
+    ):
+        """
+        Registra el rango pedido por el cliente y, si continúa donde terminó
+        el anterior, programa la lectura de los segmentos siguientes
+        """
+        position_key = (client_id, metadata.bucket_name, metadata.key)
+        with self._lock:
+            previous_end = self._positions.pop(position_key, None)
+            self._positions[position_key] = end + 1
+            while len(self._positions) > self.max_clients:
+                self._positions.popitem(last=False)
+
+        if previous_end is None or abs(start - previous_end) > self.chunk_size:
+            return
+
+        first_index = (end + 1) // self.chunk_size
+        last_index = min(
+            first_index + self.depth - 1, (metadata.size - 1) // self.chunk_size
+        )
+        run = []
+        for index in range(first_index, last_index + 2):
+            available = index > last_index or self.contains(metadata, index)
+            if not available and chunk_cache is not None:
+                available = chunk_cache.contains(
+                    metadata.bucket_name, metadata.key, metadata.etag, index
+                )
+            if not available:
+                run.append(index)
+                continue
+            if run:
+                logger.debug("Read-ahead %s [%s-%s]", metadata.key, run[0], run[-1])
+                self.buffer.schedule(
+                    [self._key(metadata, i) for i in run],
+                    lambda first=run[0], last=run[-1]: self._load(
+                        metadata, first, last
+                    ),
+                    get_s3_executor(),
+                )
+                run = []
+
+
+_read_ahead = None
+_read_ahead_lock = threading.Lock()
+
+
+def get_video_read_ahead() -> Optional[VideoReadAhead]:
+    """
+    Regresa el read-ahead de video del proceso o None si está deshabilitado
+    """
+    global _read_ahead
+    if not VIDEO_READ_AHEAD_ENABLED:
+        return None
+    if _read_ahead is None:
+        with _read_ahead_lock:
+            if _read_ahead is None:
+                _read_ahead = VideoReadAhead(
+                    ReadAheadBuffer(
+                        VIDEO_READ_AHEAD_MAX_BYTES, VIDEO_READ_AHEAD_IDLE_TTL
+                    ),
+                    VIDEO_CHUNK_SIZE,
+                    VIDEO_READ_AHEAD_DEPTH,
+                )
+    return _read_ahead
+
+
+def _fill_chunks(
+    chunk_cache: Optional[ChunkCache],
+    metadata: ObjectMetadata,
+    first_index: int,
+    last_index: int,
+    start: int,
+    end: int,
+    read_size: int,
+    chunk_size: int = VIDEO_CHUNK_SIZE,
+    body=None,
+) -> Iterator[bytes]:
+    """
+    Descarga de S3 los segmentos [first_index, last_index] con un solo GET
+    (o lee body si el GET ya se hizo), los guarda en el cache (si existe) y
+    entrega la parte que cae dentro de [start, end]
+    """
+    if chunk_cache is not None:
+        chunk_size = chunk_cache.chunk_size
+    range_start = first_index * chunk_size
+    if body is None:
+        body = _get_segments(metadata, first_index, last_index, chunk_size)
+
+    def new_writer(index):
+        if chunk_cache is None:
+            return None
+        return chunk_cache.writer(
+            metadata.bucket_name, metadata.key, metadata.etag, index
+        )
+
+    position = range_start
+    index = first_index
+    writer = new_writer(index)
+    try:
+        for piece in body.iter_chunks(read_size):
+            piece = memoryview(piece)
+            while piece:
+                chunk_end = min((index + 1) * chunk_size, metadata.size)
+                part = piece[: chunk_end - position]
+                piece = piece[len(part) :]
+
+                if writer is not None:
+                    writer.write(part)
+                part_start = position
+                position += len(part)
+
+                # Parte de la pieza dentro del rango solicitado
+                lo = max(start, part_start)
+                hi = min(end + 1, position)
+                if lo < hi:
+                    yield bytes(part[lo - part_start : hi - part_start])
+
+                if position == chunk_end:
+                    if writer is not None:
+                        writer.commit()
+                    index += 1
+                    writer = None
+                    if index > last_index:
+                        break
+                    writer = new_writer(index)
+    finally:
+        if writer is not None:
+            writer.discard()
+        body.close()
+
+
+class CachedRange:
+    """
+    Iterador de los bytes de un rango de video servido por segmentos; close
+    libera también el GET abierto de antemano aunque no se haya leído
+    """
+
+    def __init__(self, chunks: Iterator[bytes], body=None):
+        self._chunks = chunks
+        self._body = body
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self._chunks)
+
+    def close(self):
+        self._chunks.close()
+        if self._body is not None:
+            self._body.close()
+
+
+def iter_cached_range(
+    chunk_cache: Optional[ChunkCache],
+    metadata: ObjectMetadata,
+    start: int,
+    end: int,
+    read_size: int,
+    read_ahead: Optional[VideoReadAhead] = None,
+) -> CachedRange:
+    """
+    Entrega los bytes [start, end] del objeto por segmentos. Cada segmento
+    sale del buffer de read-ahead, del cache en disco o, si no está en
+    ninguno, de S3; los faltantes contiguos se descargan con un solo GET
+    que también llena el cache.
+
+    El primer GET que haga falta se hace antes de regresar, así un objeto
+    que cambió (412) o que ya no existe falla antes de enviar los headers
+    de la respuesta.
+    """
+    if chunk_cache is not None:
+        chunk_size = chunk_cache.chunk_size
+    else:
+        chunk_size = read_ahead.chunk_size if read_ahead else VIDEO_CHUNK_SIZE
+    last_index = end // chunk_size
+
+    def available(index):
+        if read_ahead is not None and read_ahead.contains(metadata, index):
+            return True
+        return chunk_cache is not None and chunk_cache.contains(
+            metadata.bucket_name, metadata.key, metadata.etag, index
+        )
+
+    def missing_run_end(index):
+        run_end = index
+        while run_end < last_index and not available(run_end + 1):
+            run_end += 1
+        return run_end
+
+    def record_missing(index, run_end, count):
+        logger.debug("Video chunk cache miss: %s [%s-%s]", metadata.key, index, run_end)
+        if count > 0:
+            if read_ahead is not None:
+                record_cache("video_read_ahead", False, count)
+            if chunk_cache is not None:
+                record_cache("video_chunk", False, count)
+
+    first_miss = next(
+        (
+            index
+            for index in range(start // chunk_size, last_index + 1)
+            if not available(index)
+        ),
+        None,
+    )
+    opened = None
+    if first_miss is not None:
+        run_end = missing_run_end(first_miss)
+        body = _get_segments(metadata, first_miss, run_end, chunk_size)
+        opened = (first_miss, run_end, body)
+
+    def chunks():
+        index = start // chunk_size
+        while index <= last_index:
+            if opened is not None and index == opened[0]:
+                first, run_end, body = opened
+                # Ninguno de los segmentos del GET anticipado se buscó aquí
+                record_missing(first, run_end, run_end - first + 1)
+                yield from _fill_chunks(
+                    chunk_cache,
+                    metadata,
+                    first,
+                    run_end,
+                    start,
+                    end,
+                    read_size,
+                    chunk_size,
+                    body,
+                )
+                index = run_end + 1
+                continue
+
+            chunk_start = index * chunk_size
+            lo = max(start - chunk_start, 0)
+            hi = min(end + 1 - chunk_start, chunk_size)
+
+            data = None
+            if read_ahead is not None:
+                data = read_ahead.get(metadata, index)
+                if data is not None:
+                    record_cache("video_read_ahead", True)
+                    data = data[lo:hi]
+            if data is None and chunk_cache is not None:
+                data = chunk_cache.read(
+                    metadata.bucket_name, metadata.key, metadata.etag, index, lo, hi
+                )
+                record_cache("video_chunk", data is not None)
+            if data is not None:
+                yield data
+                index += 1
+                continue
+
+            # Un segmento que sirve el cache en disco no cuenta como fallo
+            # del read-ahead, solo los que se piden a S3
+            if read_ahead is not None:
+                record_cache("video_read_ahead", False)
+
+            run_end = missing_run_end(index)
+            # El resto de los segmentos del GET tampoco estaba en ningún cache
+            record_missing(index, run_end, run_end - index)
+            yield from _fill_chunks(
+                chunk_cache,
+                metadata,
+                index,
+                run_end,
+                start,
+                end,
+                read_size,
+                chunk_size,
+            )
+            index = run_end + 1
+
+    return CachedRange(chunks(), opened[2] if opened is not None else None)
@@ -0,0 +1,379 @@
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+ZIP64_VERSION = 45
+CREATE_SYSTEM_UNIX = 3
+
+FLAG_DATA_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+
+LOCAL_HEADER = struct.Struct("<4sHHHHHLLLHH")
+DATA_DESCRIPTOR = struct.Struct("<4sLQQ")
+CENTRAL_HEADER = struct.Struct("<4sBBHHHHHLLLHHHHHLL")
+ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+ZIP64_END_LOCATOR = struct.Struct("<4sLQL")
+END_RECORD = struct.Struct("<4s4H2LH")
+
+LOCAL_HEADER_SIGNATURE = b"PK\003\004"
+DATA_DESCRIPTOR_SIGNATURE = b"PK\007\010"
+CENTRAL_HEADER_SIGNATURE = b"PK\001\002"
+ZIP64_END_RECORD_SIGNATURE = b"PK\006\006"
+ZIP64_END_LOCATOR_SIGNATURE = b"PK\006\007"
+END_RECORD_SIGNATURE = b"PK\005\006"
+
+PARALLEL_BLOCK_SIZE = 1024 * 1024
+# Bloque final vacío que cierra un stream deflate formado por bloques
+FINAL_DEFLATE_BLOCK = b"\x03\x00"
+
+FILE_ATTRIBUTES = (0o100644 & 0xFFFF) << 16
+DIRECTORY_ATTRIBUTES = (0o40755 & 0xFFFF) << 16 | 0x10
+
+
+@dataclass
+class ZipEntry:
+    name: bytes
+    flags: int
+    method: int
+    dos_time: int
+    dos_date: int
+    offset: int
+    crc: int = 0
+    compressed_size: int = 0
+    size: int = 0
+    external_attr: int = FILE_ATTRIBUTES
+
+
+def _dos_date_time(date_time: Optional[datetime]):
+    dt = date_time or datetime.now()
+    year = min(max(dt.year, 1980), 2107)
+    dos_date = (year - 1980) << 9 | dt.month << 5 | dt.day
+    dos_time = dt.hour << 11 | dt.minute << 5 | (dt.second // 2)
+    return dos_time, dos_date
+
+
+def _measure(chunks: Iterable[bytes], entry: ZipEntry) -> Iterator[bytes]:
+    # Calcula el CRC y el tamaño sin comprimir en el orden del contenido
+    for chunk in chunks:
+        if not chunk:
+            continue
+        entry.crc = zlib.crc32(chunk, entry.crc)
+        entry.size += len(chunk)
+        yield chunk
+
+
+def _deflate(chunks: Iterable[bytes], level: int) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    for chunk in chunks:
+        chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    tail = compressor.flush()
+    if tail:
+        yield tail
+
+
+def _rebuffer(chunks: Iterable[bytes], block_size: int) -> Iterator[bytes]:
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= block_size:
+            data = b"".join(pending)
+            while len(data) >= block_size:
+                yield data[:block_size]
+                data = data[block_size:]
+            pending = [data]
+            pending_size = len(data)
+    if pending_size:
+        yield b"".join(pending)
+
+
+def _deflate_block(block: bytes, level: int) -> bytes:
+    # Cada bloque termina con un sync flush para que los streams se puedan
+    # concatenar; zlib libera el GIL así que los hilos comprimen en paralelo
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _deflate_parallel(
+    blocks: Iterable[bytes], level: int, executor: Executor, max_in_flight: int
+) -> Iterator[bytes]:
+    pending = deque()
+    try:
+        for block in blocks:
+            pending.append(executor.submit(_deflate_block, block, level))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+    yield FINAL_DEFLATE_BLOCK
+
+
+def _encode_name(name: str):
+    try:
+        return name.encode("ascii"), 0
+    except UnicodeEncodeError:
+        return name.encode("utf-8"), FLAG_UTF8
+
+
+def new_entry(
+    name: str,
+    compression: int,
+    date_time: Optional[datetime],
+    offset: int,
+    external_attr: int = FILE_ATTRIBUTES,
+) -> ZipEntry:
+    """
+    Crea la entrada de un archivo que comienza en offset
+    """
+    encoded_name, flags = _encode_name(name)
+    dos_time, dos_date = _dos_date_time(date_time)
+    return ZipEntry(
+        name=encoded_name,
+        flags=flags | FLAG_DATA_DESCRIPTOR,
+        method=compression,
+        dos_time=dos_time,
+        dos_date=dos_date,
+        offset=offset,
+        external_attr=external_attr,
+    )
+
+
+def local_header(entry: ZipEntry) -> bytes:
+    """
+    Header local de una entrada. Los tamaños y el CRC van en el data
+    descriptor, por lo que el header no depende del contenido.
+    """
+    extra = struct.pack("<HHQQ", 1, 16, 0, 0)
+    return (
+        LOCAL_HEADER.pack(
+            LOCAL_HEADER_SIGNATURE,
+            ZIP64_VERSION,
+            entry.flags,
+            entry.method,
+            entry.dos_time,
+            entry.dos_date,
+            0,
+            0xFFFFFFFF,
+            0xFFFFFFFF,
+            len(entry.name),
+            len(extra),
+        )
+        + entry.name
+        + extra
+    )
+
+
+def data_descriptor(entry: ZipEntry) -> bytes:
+    return DATA_DESCRIPTOR.pack(
+        DATA_DESCRIPTOR_SIGNATURE,
+        entry.crc,
+        entry.compressed_size,
+        entry.size,
+    )
+
+
+def central_header(entry: ZipEntry) -> bytes:
+    zip64_fields = []
+    size = entry.size
+    compressed_size = entry.compressed_size
+    offset = entry.offset
+    if size > ZIP64_LIMIT:
+        zip64_fields.append(size)
+        size = 0xFFFFFFFF
+    if compressed_size > ZIP64_LIMIT:
+        zip64_fields.append(compressed_size)
+        compressed_size = 0xFFFFFFFF
+    if offset > ZIP64_LIMIT:
+        zip64_fields.append(offset)
+        offset = 0xFFFFFFFF
+
+    extra = b""
+    if zip64_fields:
+        extra = struct.pack(
+            f"<HH{len(zip64_fields)}Q", 1, 8 * len(zip64_fields), *zip64_fields
+        )
+
+    return (
+        CENTRAL_HEADER.pack(
+            CENTRAL_HEADER_SIGNATURE,
+            ZIP64_VERSION,
+            CREATE_SYSTEM_UNIX,
+            ZIP64_VERSION,
+            entry.flags,
+            entry.method,
+            entry.dos_time,
+            entry.dos_date,
+            entry.crc,
+            compressed_size,
+            size,
+            len(entry.name),
+            len(extra),
+            0,
+            0,
+            0,
+            entry.external_attr,
+            offset,
+        )
+        + entry.name
+        + extra
+    )
+
+
+def end_records(
+    count: int, central_directory_offset: int, central_directory_size: int
+) -> bytes:
+    """
+    Registro final del ZIP, precedido por los registros ZIP64 cuando algún
+    valor no cabe en el formato original
+    """
+    records = b""
+    if (
+        count > ZIP_FILECOUNT_LIMIT
+        or central_directory_offset > ZIP64_LIMIT
+        or central_directory_size > ZIP64_LIMIT
+    ):
+        zip64_end_offset = central_directory_offset + central_directory_size
+        records += ZIP64_END_RECORD.pack(
+            ZIP64_END_RECORD_SIGNATURE,
+            ZIP64_END_RECORD.size - 12,
+            ZIP64_VERSION,
+            ZIP64_VERSION,
+            0,
+            0,
+            count,
+            count,
+            central_directory_size,
+            central_directory_offset,
+        )
+        records += ZIP64_END_LOCATOR.pack(
+            ZIP64_END_LOCATOR_SIGNATURE, 0, zip64_end_offset, 1
+        )
+        count = min(count, 0xFFFF)
+        central_directory_size = min(central_directory_size, 0xFFFFFFFF)
+        central_directory_offset = min(central_directory_offset, 0xFFFFFFFF)
+
+    return records + END_RECORD.pack(
+        END_RECORD_SIGNATURE,
+        0,
+        0,
+        count,
+        count,
+        central_directory_size,
+        central_directory_offset,
+        0,
+    )
+
+
+class ZipStream:
+    """
+    Escritor de ZIP en streaming.
+
+    Emite el header local, los datos y el data descriptor de cada entrada a
+    medida que llegan los chunks, y el directorio central al final. Las
+    entradas usan ZIP64 para que no exista límite de tamaño y la memoria
+    usada depende solo del tamaño de los chunks recibidos.
+    """
+
+    def __init__(self):
+        self._entries = []
+        self._offset = 0
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    def _emit(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return data
+
+    def add(
+        self,
+        name: str,
+        chunks: Iterable[bytes],
+        compression: int = ZIP_STORED,
+        compress_level: int = zlib.Z_DEFAULT_COMPRESSION,
+        date_time: Optional[datetime] = None,
+        executor: Optional[Executor] = None,
+        block_size: int = PARALLEL_BLOCK_SIZE,
+        max_in_flight: int = 4,
+    ) -> Iterator[bytes]:
+        """
+        Agrega una entrada al ZIP
+
+        Args:
+            name: Nombre de la entrada dentro del ZIP
+            chunks: Iterable con el contenido de la entrada
+            compression: ZIP_STORED o ZIP_DEFLATED
+            compress_level: Nivel de compresión para ZIP_DEFLATED
+            date_time: Fecha de modificación de la entrada
+            executor: Si se envía, los bloques de block_size bytes se
+                comprimen en paralelo en este executor, con a lo sumo
+                max_in_flight bloques pendientes
+
+        Returns:
+            Generador con los bytes de la entrada
+        """
+        entry = new_entry(name, compression, date_time, self._offset)
+        yield self._emit(local_header(entry))
+
+        data_chunks = _measure(chunks, entry)
+        if compression == ZIP_DEFLATED and executor is not None:
+            data_chunks = _deflate_parallel(
+                _rebuffer(data_chunks, block_size),
+                compress_level,
+                executor,
+                max_in_flight,
+            )
+        elif compression == ZIP_DEFLATED:
+            data_chunks = _deflate(data_chunks, compress_level)
+
+        for chunk in data_chunks:
+            entry.compressed_size += len(chunk)
+            yield self._emit(chunk)
+
+        yield self._emit(data_descriptor(entry))
+        self._entries.append(entry)
+
+    def add_directory(
+        self, name: str, date_time: Optional[datetime] = None
+    ) -> Iterator[bytes]:
+        """
+        Agrega una entrada de directorio (sin contenido) al ZIP
+        """
+        if not name.endswith("/"):
+            name += "/"
+        yield from self.add(name, [], date_time=date_time)
+        self._entries[-1].external_attr = DIRECTORY_ATTRIBUTES
+
+    def finish(self) -> Iterator[bytes]:
+        """
+        Escribe el directorio central y el registro final del ZIP
+
+        Returns:
+            Generador con los bytes del directorio central
+        """
+        central_directory_offset = self._offset
+        for entry in self._entries:
+            yield self._emit(central_header(entry))
+        central_directory_size = self._offset - central_directory_offset
+
+        yield self._emit(
+            end_records(
+                len(self._entries), central_directory_offset, central_directory_size
+            )
+        )
@@ -16,3 +16,192 @@ AUDIENCE = os.environ.get("AUDIENCE", "0oabfj1b1hAec7oHg5d7")
 
 PATH_SECRET_BUS = os.environ.get("PATH_SECRET_BUS", "dev/app/bus")
 PATH_SECRET_FRONT = os.environ.get("PATH_SECRET_FRONT", "dev/app/frontend")
+
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.environ.get("S3_MAX_CONCURRENCY", "32"))
+BLOCKING_IO_WORKERS = int(os.environ.get("BLOCKING_IO_WORKERS", "64"))
+BUNDLE_FETCH_CONCURRENCY = int(os.environ.get("BUNDLE_FETCH_CONCURRENCY", "8"))
+BUNDLE_PREFETCH_MAX_SIZE = int(
+    os.environ.get("BUNDLE_PREFETCH_MAX_SIZE", str(8 * 1024 * 1024))
+)
+# Los archivos del bundle de al menos BUNDLE_PARALLEL_RANGE_MIN_SIZE se leen
+# en rangos de BUNDLE_RANGE_SIZE con hasta BUNDLE_RANGE_CONCURRENCY en paralelo
+BUNDLE_PARALLEL_RANGE_MIN_SIZE = int(
+    os.environ.get("BUNDLE_PARALLEL_RANGE_MIN_SIZE", str(64 * 1024 * 1024))
+)
+BUNDLE_RANGE_SIZE = int(os.environ.get("BUNDLE_RANGE_SIZE", str(8 * 1024 * 1024)))
+BUNDLE_RANGE_CONCURRENCY = int(os.environ.get("BUNDLE_RANGE_CONCURRENCY", "4"))
+
+S3_MAX_POOL_CONNECTIONS = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", "64"))
+S3_CONNECT_TIMEOUT = float(os.environ.get("S3_CONNECT_TIMEOUT", "5"))
+S3_READ_TIMEOUT = float(os.environ.get("S3_READ_TIMEOUT", "60"))
+S3_RETRY_MODE = os.environ.get("S3_RETRY_MODE", "standard")
+S3_MAX_ATTEMPTS = int(os.environ.get("S3_MAX_ATTEMPTS", "3"))
+S3_TCP_KEEPALIVE = os.environ.get("S3_TCP_KEEPALIVE", "true").lower() == "true"
+
+METADATA_CACHE_TTL = float(os.environ.get("METADATA_CACHE_TTL", "60"))
+METADATA_CACHE_MAX_ITEMS = int(os.environ.get("METADATA_CACHE_MAX_ITEMS", "4096"))
+
+VIDEO_CHUNK_CACHE_ENABLED = (
+    os.environ.get("VIDEO_CHUNK_CACHE_ENABLED", "true").lower() == "true"
+)
+VIDEO_CHUNK_CACHE_DIR = os.environ.get(
+    "VIDEO_CHUNK_CACHE_DIR", "/tmp/transfers-video-cache"
+)
+VIDEO_CHUNK_CACHE_MAX_BYTES = int(
+    os.environ.get("VIDEO_CHUNK_CACHE_MAX_BYTES", str(1024 * 1024 * 1024))
+)
+VIDEO_CHUNK_SIZE = int(os.environ.get("VIDEO_CHUNK_SIZE", str(1024 * 1024)))
+
+UPLOAD_PART_SIZE = max(
+    int(os.environ.get("UPLOAD_PART_SIZE", str(8 * 1024 * 1024))), 5 * 1024 * 1024
+)
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", "4"))
+
+CLAIMS_CACHE_MAX_ITEMS = int(os.environ.get("CLAIMS_CACHE_MAX_ITEMS", "10000"))
+CLAIMS_CACHE_TTL = float(os.environ.get("CLAIMS_CACHE_TTL", "300"))
+
+VIDEO_INDEX_REFRESH_INTERVAL = float(
+    os.environ.get("VIDEO_INDEX_REFRESH_INTERVAL", "60")
+)
+VIDEO_INDEX_MAX_AGE = float(os.environ.get("VIDEO_INDEX_MAX_AGE", "900"))
+VIDEO_LIST_MAX_PAGE_SIZE = int(os.environ.get("VIDEO_LIST_MAX_PAGE_SIZE", "1000"))
+
+BUNDLE_COMPRESSION = os.environ.get("BUNDLE_COMPRESSION", "auto")
+BUNDLE_COMPRESSION_LEVEL = int(os.environ.get("BUNDLE_COMPRESSION_LEVEL", "6"))
+BUNDLE_LAYOUT = os.environ.get("BUNDLE_LAYOUT", "nested")
+BUNDLE_COMPRESSION_WORKERS = int(
+    os.environ.get("BUNDLE_COMPRESSION_WORKERS", str(os.cpu_count() or 1))
+)
+BUNDLE_COMPRESSION_BLOCK_SIZE = int(
+    os.environ.get("BUNDLE_COMPRESSION_BLOCK_SIZE", str(1024 * 1024))
+)
+BUNDLE_PARALLEL_COMPRESSION_MIN_SIZE = int(
+    os.environ.get("BUNDLE_PARALLEL_COMPRESSION_MIN_SIZE", str(4 * 1024 * 1024))
+)
+# Con BUNDLE_RESUMABLE los ZIP se arman sin compresión (ZIP_STORED) para
+# conocer su tamaño de antemano: llevan Content-Length y se pueden reanudar
+# con Range, pero BUNDLE_COMPRESSION y la compresión en paralelo no se
+# aplican y se transfieren más bytes. Desactivado, los archivos se comprimen
+# según BUNDLE_COMPRESSION y la respuesta no admite Range salvo cuando el
+# bundle sale del cache.
+BUNDLE_RESUMABLE = os.environ.get("BUNDLE_RESUMABLE", "false").lower() == "true"
+CRC_CACHE_MAX_ITEMS = int(os.environ.get("CRC_CACHE_MAX_ITEMS", "100000"))
+
+BUNDLE_CACHE_ENABLED = os.environ.get("BUNDLE_CACHE_ENABLED", "true").lower() == "true"
+BUNDLE_CACHE_DIR = os.environ.get("BUNDLE_CACHE_DIR", "/tmp/transfers-bundle-cache")
+# Cada cuánto (segundos) un cache en disco vuelve a listar su directorio para
+# contar los archivos de los demás workers contra su límite de tamaño
+DISK_CACHE_SCAN_INTERVAL = float(os.environ.get("DISK_CACHE_SCAN_INTERVAL", "10"))
+BUNDLE_CACHE_MAX_BYTES = int(
+    os.environ.get("BUNDLE_CACHE_MAX_BYTES", str(5 * 1024 * 1024 * 1024))
+)
+BUNDLE_CACHE_MAX_AGE = float(os.environ.get("BUNDLE_CACHE_MAX_AGE", "86400"))
+BUNDLE_CACHE_S3_BUCKET = os.environ.get("BUNDLE_CACHE_S3_BUCKET", "")
+BUNDLE_CACHE_S3_PREFIX = os.environ.get("BUNDLE_CACHE_S3_PREFIX", "bundle-cache/")
+
+VIDEO_STREAM_REDIRECT = (
+    os.environ.get("VIDEO_STREAM_REDIRECT", "false").lower() == "true"
+)
+FILE_DOWNLOAD_REDIRECT = (
+    os.environ.get("FILE_DOWNLOAD_REDIRECT", "false").lower() == "true"
+)
+PRESIGNED_URL_EXPIRATION = int(os.environ.get("PRESIGNED_URL_EXPIRATION", "300"))
+PRESIGNED_URL_REFRESH_MARGIN = int(os.environ.get("PRESIGNED_URL_REFRESH_MARGIN", "60"))
+PRESIGNED_URL_CACHE_MAX_ITEMS = int(
+    os.environ.get("PRESIGNED_URL_CACHE_MAX_ITEMS", "10000")
+)
+
+BUNDLE_JOBS_S3_BUCKET = os.environ.get("BUNDLE_JOBS_S3_BUCKET", "")
+BUNDLE_JOBS_S3_PREFIX = os.environ.get("BUNDLE_JOBS_S3_PREFIX", "bundle-jobs/")
+BUNDLE_JOB_WORKERS = int(os.environ.get("BUNDLE_JOB_WORKERS", "2"))
+BUNDLE_JOB_MAX_PENDING = int(os.environ.get("BUNDLE_JOB_MAX_PENDING", "100"))
+BUNDLE_JOB_TTL = float(os.environ.get("BUNDLE_JOB_TTL", "3600"))
+# El estado de los jobs en curso se publica en S3 cada
+# BUNDLE_JOB_SYNC_INTERVAL segundos; un job sin publicar en
+# BUNDLE_JOB_STALE_AFTER segundos se reporta como fallido (worker caído)
+BUNDLE_JOB_SYNC_INTERVAL = float(os.environ.get("BUNDLE_JOB_SYNC_INTERVAL", "2"))
+BUNDLE_JOB_STALE_AFTER = float(os.environ.get("BUNDLE_JOB_STALE_AFTER", "300"))
+
+VIDEO_READ_AHEAD_ENABLED = (
+    os.environ.get("VIDEO_READ_AHEAD_ENABLED", "true").lower() == "true"
+)
+VIDEO_READ_AHEAD_DEPTH = int(os.environ.get("VIDEO_READ_AHEAD_DEPTH", "4"))
+VIDEO_READ_AHEAD_MAX_BYTES = int(
+    os.environ.get("VIDEO_READ_AHEAD_MAX_BYTES", str(256 * 1024 * 1024))
+)
+VIDEO_READ_AHEAD_IDLE_TTL = float(os.environ.get("VIDEO_READ_AHEAD_IDLE_TTL", "30"))
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+
+LOG_QUEUE_MAX_SIZE = int(os.environ.get("LOG_QUEUE_MAX_SIZE", "10000"))
+LOG_MAX_ARG_LENGTH = int(os.environ.get("LOG_MAX_ARG_LENGTH", "512"))
+LOG_MAX_ITEMS = int(os.environ.get("LOG_MAX_ITEMS", "20"))
+LOG_MAX_MESSAGE_LENGTH = int(os.environ.get("LOG_MAX_MESSAGE_LENGTH", "4096"))
+# Fracción de los registros DEBUG que se escriben (1 = todos)
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", "1"))
+
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "true").lower() == "true"
+# Memoria estimada total de las operaciones en curso por worker
+ADMISSION_MAX_BYTES = int(
+    os.environ.get("ADMISSION_MAX_BYTES", str(1024 * 1024 * 1024))
+)
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", "5"))
+ADMISSION_BUNDLE_MAX_CONCURRENT = int(
+    os.environ.get("ADMISSION_BUNDLE_MAX_CONCURRENT", "8")
+)
+ADMISSION_BUNDLE_BYTES = int(
+    os.environ.get(
+        "ADMISSION_BUNDLE_BYTES",
+        str(
+            BUNDLE_FETCH_CONCURRENCY * BUNDLE_PREFETCH_MAX_SIZE
+            + BUNDLE_RANGE_CONCURRENCY * BUNDLE_RANGE_SIZE
+            + 2 * BUNDLE_COMPRESSION_WORKERS * BUNDLE_COMPRESSION_BLOCK_SIZE
+        ),
+    )
+)
+ADMISSION_UPLOAD_MAX_CONCURRENT = int(
+    os.environ.get("ADMISSION_UPLOAD_MAX_CONCURRENT", "8")
+)
+ADMISSION_UPLOAD_BYTES = int(
+    os.environ.get(
+        "ADMISSION_UPLOAD_BYTES", str(UPLOAD_PART_SIZE * (UPLOAD_CONCURRENCY + 1))
+    )
+)
+ADMISSION_STREAM_MAX_CONCURRENT = int(
+    os.environ.get("ADMISSION_STREAM_MAX_CONCURRENT", "200")
+)
+ADMISSION_STREAM_BYTES = int(
+    os.environ.get("ADMISSION_STREAM_BYTES", str(2 * VIDEO_CHUNK_SIZE))
+)
+ADMISSION_LIST_MAX_CONCURRENT = int(
+    os.environ.get("ADMISSION_LIST_MAX_CONCURRENT", "32")
+)
+ADMISSION_LIST_BYTES = int(os.environ.get("ADMISSION_LIST_BYTES", str(4 * 1024 * 1024)))
+
+# La llave JWT se vuelve a leer de Secrets Manager en segundo plano cada
+# SECRET_REFRESH_INTERVAL segundos; si falla se reintenta tras
+# SECRET_RETRY_INTERVAL. La llave anterior se acepta SECRET_ROTATION_GRACE
+# segundos después de una rotación.
+SECRET_REFRESH_INTERVAL = float(os.environ.get("SECRET_REFRESH_INTERVAL", "300"))
+SECRET_RETRY_INTERVAL = float(os.environ.get("SECRET_RETRY_INTERVAL", "30"))
+SECRET_ROTATION_GRACE = float(os.environ.get("SECRET_ROTATION_GRACE", "3600"))
+# Archivo local (0600) para no consultar Secrets Manager en cada arranque;
+# vacío lo desactiva
+SECRET_CACHE_FILE = os.environ.get("SECRET_CACHE_FILE", "")
+
+# Archivos que se suben en paralelo por request en la carga por lotes; cada
+# uno ocupa hasta UPLOAD_PART_SIZE en memoria mientras se sube
+BATCH_UPLOAD_CONCURRENCY = int(os.environ.get("BATCH_UPLOAD_CONCURRENCY", "8"))
+BATCH_UPLOAD_MAX_FILES = int(os.environ.get("BATCH_UPLOAD_MAX_FILES", "1000"))
+ADMISSION_BATCH_UPLOAD_MAX_CONCURRENT = int(
+    os.environ.get("ADMISSION_BATCH_UPLOAD_MAX_CONCURRENT", "4")
+)
+ADMISSION_BATCH_UPLOAD_BYTES = int(
+    os.environ.get(
+        "ADMISSION_BATCH_UPLOAD_BYTES",
+        str(UPLOAD_PART_SIZE * (BATCH_UPLOAD_CONCURRENCY + UPLOAD_CONCURRENCY + 1)),
+    )
+)
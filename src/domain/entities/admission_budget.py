@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class AdmissionBudget:
+    name: str
+    max_concurrent: int
+    # Memoria estimada que usa cada operación de la clase
+    bytes_per_request: int
+    max_queue: int
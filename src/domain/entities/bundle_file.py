@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass
+class BundleFile:
+    bucket_name: str
+    key: str
+    file_name: str
+    size: int
+    content_type: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    # CRC32 del contenido completo cuando S3 lo tiene como checksum
+    crc32: Optional[int] = None
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import Optional
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class BundleJob:
+    job_id: str
+    status: str = JOB_QUEUED
+    files_total: int = 0
+    files_done: int = 0
+    missing_files: int = 0
+    bytes_total: Optional[int] = None
+    bytes_done: int = 0
+    error: Optional[str] = None
+    bucket_name: Optional[str] = None
+    key: Optional[str] = None
+    file_name: Optional[str] = None
+    # Tiempos epoch, comparables entre workers
+    finished_at: Optional[float] = None
+    updated_at: Optional[float] = None
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from domain.constants import (
+    ADMISSION_BATCH_UPLOAD_BYTES,
+    ADMISSION_BATCH_UPLOAD_MAX_CONCURRENT,
+    ADMISSION_BUNDLE_BYTES,
+    ADMISSION_BUNDLE_MAX_CONCURRENT,
+    ADMISSION_LIST_BYTES,
+    ADMISSION_LIST_MAX_CONCURRENT,
+    ADMISSION_MAX_BYTES,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_STREAM_BYTES,
+    ADMISSION_STREAM_MAX_CONCURRENT,
+    ADMISSION_UPLOAD_BYTES,
+    ADMISSION_UPLOAD_MAX_CONCURRENT,
+)
+from domain.entities.admission_budget import AdmissionBudget
+from infrastructure.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_DURATION,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionController:
+    """
+    Limita por worker las operaciones pesadas en curso: cada clase tiene un
+    máximo de operaciones concurrentes y todas comparten un presupuesto de
+    memoria estimada (max_bytes). Lo que no cabe espera en una cola corta
+    hasta queue_timeout segundos y después se rechaza.
+
+    Se usa solo desde el event loop, por lo que no necesita locks.
+    """
+
+    def __init__(
+        self, budgets: Iterable[AdmissionBudget], max_bytes: int, queue_timeout: float
+    ):
+        self.budgets = {budget.name: budget for budget in budgets}
+        self.max_bytes = max_bytes
+        self.queue_timeout = queue_timeout
+        self._running = {name: 0 for name in self.budgets}
+        self._waiting = {name: deque() for name in self.budgets}
+        self._bytes = 0
+
+    def _fits(self, budget: AdmissionBudget) -> bool:
+        if self._running[budget.name] >= budget.max_concurrent:
+            return False
+        # Una operación más grande que el presupuesto completo entra sola
+        return self._bytes == 0 or (
+            self._bytes + budget.bytes_per_request <= self.max_bytes
+        )
+
+    def _grant(self, budget: AdmissionBudget):
+        self._running[budget.name] += 1
+        self._bytes += budget.bytes_per_request
+        ADMISSION_IN_FLIGHT.inc(budget.name)
+
+    def _wake_waiters(self):
+        for name, waiting in self._waiting.items():
+            budget = self.budgets[name]
+            while waiting and self._fits(budget):
+                waiter = waiting.popleft()
+                if waiter.done():
+                    continue
+                self._grant(budget)
+                waiter.set_result(True)
+
+    async def acquire(self, name: str) -> bool:
+        """
+        Reserva un lugar para una operación de la clase name
+
+        Returns:
+            True si se admitió (hay que llamar a release al terminar) o False
+            si se rechazó
+        """
+        budget = self.budgets[name]
+        waiting = self._waiting[name]
+        if not waiting and self._fits(budget):
+            self._grant(budget)
+            return True
+        if len(waiting) >= budget.max_queue:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        waiting.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # El cliente se fue justo cuando se le asignó el lugar
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            raise
+        finally:
+            if waiter in waiting:
+                waiting.remove(waiter)
+
+    def release(self, name: str):
+        budget = self.budgets[name]
+        self._running[name] -= 1
+        self._bytes -= budget.bytes_per_request
+        ADMISSION_IN_FLIGHT.dec(name)
+        self._wake_waiters()
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI que pasa por el AdmissionController los requests de las
+    rutas clasificadas (method, path) -> clase. La operación se libera cuando
+    termina de enviarse la respuesta, incluido el streaming. Las rutas sin
+    clase (health, metadata, métricas) no se limitan.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        routes: Dict[Tuple[str, str], str],
+        retry_after: int,
+    ):
+        self.app = app
+        self.controller = controller
+        self.routes = routes
+        self.retry_after = retry_after
+
+    def _classify(self, scope) -> Optional[str]:
+        if scope["type"] != "http":
+            return None
+        return self.routes.get((scope["method"], scope["path"]))
+
+    async def __call__(self, scope, receive, send):
+        name = self._classify(scope)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        admitted = await self.controller.acquire(name)
+        ADMISSION_WAIT_DURATION.observe(time.perf_counter() - started_at, name)
+        if not admitted:
+            ADMISSION_REJECTED.inc(name)
+            logger.warning("Request rejected by admission control: %s", name)
+            response = JSONResponse(
+                {"detail": "Service overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+
+def build_admission_controller() -> AdmissionController:
+    """
+    Controller con los presupuestos configurados para bundle, upload,
+    batch_upload, stream y list
+    """
+    budgets = [
+        AdmissionBudget(
+            "bundle",
+            ADMISSION_BUNDLE_MAX_CONCURRENT,
+            ADMISSION_BUNDLE_BYTES,
+            ADMISSION_MAX_QUEUE,
+        ),
+        AdmissionBudget(
+            "upload",
+            ADMISSION_UPLOAD_MAX_CONCURRENT,
+            ADMISSION_UPLOAD_BYTES,
+            ADMISSION_MAX_QUEUE,
+        ),
+        AdmissionBudget(
+            "batch_upload",
+            ADMISSION_BATCH_UPLOAD_MAX_CONCURRENT,
+            ADMISSION_BATCH_UPLOAD_BYTES,
+            ADMISSION_MAX_QUEUE,
+        ),
+        AdmissionBudget(
+            "stream",
+            ADMISSION_STREAM_MAX_CONCURRENT,
+            ADMISSION_STREAM_BYTES,
+            ADMISSION_MAX_QUEUE,
+        ),
+        AdmissionBudget(
+            "list",
+            ADMISSION_LIST_MAX_CONCURRENT,
+            ADMISSION_LIST_BYTES,
+            ADMISSION_MAX_QUEUE,
+        ),
+    ]
+    return AdmissionController(budgets, ADMISSION_MAX_BYTES, ADMISSION_QUEUE_TIMEOUT)
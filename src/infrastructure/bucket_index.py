@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Optional, Tuple
+
+from infrastructure.executors import get_s3_executor
+from infrastructure.s3 import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+
+class BucketIndex:
+    """
+    Índice en memoria de los objetos de un bucket filtrados por extensión.
+
+    El índice se carga una vez y después se actualiza en segundo plano cada
+    refresh_interval segundos. Cada actualización lista el primer nivel del
+    bucket (usando el delimitador "/") y vuelve a listar, en paralelo, solo
+    los sub-prefijos nuevos, los marcados con invalidate y los listados hace
+    más de max_age segundos; el resto se toma de la actualización anterior.
+    El índice se reemplaza de forma atómica, por lo que las consultas nunca
+    esperan a S3.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        suffixes: Tuple[str],
+        refresh_interval: float,
+        max_age: float,
+    ):
+        self.bucket_name = bucket_name
+        self.suffixes = suffixes
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        # (keys ordenados, {key: objeto}), se reemplaza completo en cada
+        # actualización
+        self._snapshot = ([], {})
+        # {sub-prefijo: (objetos, momento del listado)}
+        self._prefixes = {}
+        # Sub-prefijos por volver a listar, None para todos
+        self._stale = set()
+        self._stale_lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._load_lock = threading.Lock()
+        self._refresher = None
+
+    def _list(self, prefix: str, delimiter: Optional[str] = None):
+        params = {"Bucket": self.bucket_name, "Prefix": prefix}
+        if delimiter:
+            params["Delimiter"] = delimiter
+
+        objects = []
+        prefixes = []
+        paginator = get_s3_client().get_paginator("list_objects_v2")
+        for page in paginator.paginate(**params):
+            for obj in page.get("Contents", []):
+                if obj["Key"].lower().endswith(self.suffixes):
+                    objects.append(obj)
+            for common_prefix in page.get("CommonPrefixes", []):
+                prefixes.append(common_prefix["Prefix"])
+        return objects, prefixes
+
+    def invalidate(self, key: Optional[str] = None):
+        """
+        Marca para la siguiente actualización el sub-prefijo que contiene key,
+        o todo el bucket si key es None
+        """
+        with self._stale_lock:
+            if key is None:
+                self._stale = None
+            elif self._stale is not None and "/" in key:
+                self._stale.add(key[: key.index("/") + 1])
+
+    def refresh(self):
+        """
+        Vuelve a listar el primer nivel del bucket y los sub-prefijos que lo
+        necesitan, y reemplaza el índice
+        """
+        with self._stale_lock:
+            stale, self._stale = self._stale, set()
+
+        try:
+            objects, prefixes = self._list("", "/")
+            now = time.monotonic()
+            to_list = [
+                prefix
+                for prefix in prefixes
+                if stale is None
+                or prefix in stale
+                or prefix not in self._prefixes
+                or now - self._prefixes[prefix][1] > self.max_age
+            ]
+            executor = get_s3_executor()
+            futures = [executor.submit(self._list, prefix) for prefix in to_list]
+            listed = {
+                prefix: (future.result()[0], now)
+                for prefix, future in zip(to_list, futures)
+            }
+        except Exception:
+            # Lo marcado se vuelve a intentar en la siguiente actualización
+            self._restore_stale(stale)
+            raise
+
+        # Los sub-prefijos que ya no existen se descartan
+        self._prefixes = {
+            prefix: listed.get(prefix) or self._prefixes[prefix] for prefix in prefixes
+        }
+        for prefix_objects, _ in self._prefixes.values():
+            objects.extend(prefix_objects)
+
+        index = {obj["Key"]: obj for obj in objects}
+        # Una sola asignación: las consultas leen siempre keys y objetos de
+        # la misma versión del índice
+        self._snapshot = (sorted(index), index)
+        self._loaded.set()
+        logger.info(
+            "Bucket index %s refreshed: %s keys, %s of %s prefixes listed",
+            self.bucket_name,
+            len(index),
+            len(to_list),
+            len(prefixes),
+        )
+
+    def _restore_stale(self, stale):
+        with self._stale_lock:
+            if stale is None or self._stale is None:
+                self._stale = None
+            else:
+                self._stale |= stale
+
+    def _refresh_loop(self):
+        while True:
+            self._loaded.wait()
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing bucket index {self.bucket_name}: {e}")
+
+    def ensure_loaded(self):
+        """
+        Carga el índice la primera vez y arranca la actualización periódica
+        """
+        if self._loaded.is_set():
+            return
+        with self._load_lock:
+            if not self._loaded.is_set():
+                self.refresh()
+            if self._refresher is None:
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop, name="bucket-index", daemon=True
+                )
+                self._refresher.start()
+
+    def query(
+        self,
+        prefix: str = "",
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        """
+        Consulta los objetos cuyo key empieza con prefix, en orden
+
+        Args:
+            prefix: Prefijo para filtrar
+            cursor: Último key de la página anterior
+            limit: Tamaño de página, None para todos los objetos
+
+        Returns:
+            Tupla con los objetos de la página, el cursor de la siguiente
+            página (None si no hay más) y el total de objetos con el prefijo
+        """
+        self.ensure_loaded()
+        keys, objects = self._snapshot
+
+        first = bisect_left(keys, prefix)
+        if prefix:
+            last = bisect_left(keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), first)
+        else:
+            last = len(keys)
+        total = last - first
+
+        start = first
+        if cursor:
+            start = max(first, bisect_right(keys, cursor))
+        end = last if limit is None else min(last, start + limit)
+
+        page = [objects[key] for key in keys[start:end]]
+        next_cursor = keys[end - 1] if end < last and page else None
+        return page, next_cursor, total
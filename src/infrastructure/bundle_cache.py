@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from botocore.exceptions import ClientError
+
+from domain.constants import (
+    BUNDLE_CACHE_DIR,
+    BUNDLE_CACHE_ENABLED,
+    BUNDLE_CACHE_MAX_AGE,
+    BUNDLE_CACHE_MAX_BYTES,
+    BUNDLE_CACHE_S3_BUCKET,
+    BUNDLE_CACHE_S3_PREFIX,
+    DOWNLOAD_CHUNK_SIZE,
+)
+from infrastructure.disk_cache import DiskCache
+from infrastructure.executors import get_s3_executor
+from infrastructure.presigned_urls import get_presigned_url
+from infrastructure.s3 import get_s3_client, stream_file
+
+logger = logging.getLogger(__name__)
+
+
+def iter_file_range(
+    file: BinaryIO, start: int, end: int, chunk_size: int
+) -> Iterator[bytes]:
+    """
+    Lee los bytes [start, end] de un archivo abierto y lo cierra al terminar
+    """
+    try:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+class BundleCache(DiskCache):
+    """
+    Cache de los ZIP generados, identificados por el hash de las carpetas y
+    del ETag de cada objeto. Si un objeto cambia, cambia su ETag y con él la
+    llave, por lo que nunca se entrega un bundle viejo.
+
+    Opcionalmente los bundles también se guardan en un prefijo de S3 para
+    compartirlos entre instancias; ahí el tamaño se controla con una regla
+    de ciclo de vida del bucket y la antigüedad se revisa al consultarlos.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        max_age: float,
+        s3_bucket: Optional[str] = None,
+        s3_prefix: str = "",
+    ):
+        super().__init__(directory, max_bytes, max_age)
+        self.s3_bucket = s3_bucket
+        self.s3_prefix = s3_prefix
+        # Un bundle enorme desalojaría todo lo demás
+        self.max_entry_bytes = max_bytes // 4
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.zip")
+
+    def _s3_key(self, digest: str) -> str:
+        return f"{self.s3_prefix}{digest}.zip"
+
+    def open(self, digest: str) -> Optional[BinaryIO]:
+        """
+        Regresa el bundle abierto o None si no está en disco o expiró. El
+        archivo abierto se puede leer aunque otro request lo desaloje.
+        """
+        path = self._path(digest)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            self._forget(path)
+            return None
+
+        stat = os.fstat(file.fileno())
+        if self._expired(stat.st_mtime):
+            file.close()
+            self._forget(path)
+            self._remove(path)
+            return None
+        self._touch(path, stat.st_size)
+        return file
+
+    def store(self, digest: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Entrega los chunks y guarda una copia del bundle. La copia se publica
+        solo si el bundle se generó completo.
+        """
+        try:
+            writer = self._writer(self._path(digest))
+        except OSError as e:
+            logger.warning(f"Bundle cache not available: {e}")
+            writer = None
+
+        try:
+            for chunk in chunks:
+                if writer is not None:
+                    try:
+                        writer.write(chunk)
+                    except OSError as e:
+                        logger.warning(f"Bundle cache write failed: {e}")
+                        writer.discard()
+                        writer = None
+                if writer is not None and writer.size > self.max_entry_bytes:
+                    writer.discard()
+                    writer = None
+                yield chunk
+
+            if writer is not None:
+                writer.commit()
+                writer = None
+                self._upload_s3(digest)
+        finally:
+            if writer is not None:
+                writer.discard()
+
+    def head_s3(self, digest: str) -> Optional[int]:
+        """
+        Regresa el tamaño del bundle guardado en S3 o None si no existe o
+        expiró
+        """
+        if not self.s3_bucket:
+            return None
+        try:
+            head_response = get_s3_client().head_object(
+                Bucket=self.s3_bucket, Key=self._s3_key(digest)
+            )
+        except ClientError:
+            return None
+
+        age = datetime.now(timezone.utc) - head_response["LastModified"]
+        if self.max_age is not None and age.total_seconds() > self.max_age:
+            return None
+        return head_response["ContentLength"]
+
+    def stream_s3(self, digest: str, start: int, end: int) -> Iterator[bytes]:
+        return stream_file(
+            self.s3_bucket, self._s3_key(digest), DOWNLOAD_CHUNK_SIZE, start, end
+        )
+
+    def presigned_s3_url(self, digest: str, content_disposition: str):
+        return get_presigned_url(
+            self.s3_bucket,
+            self._s3_key(digest),
+            ResponseContentDisposition=content_disposition,
+        )
+
+    def _upload_s3(self, digest: str):
+        if not self.s3_bucket:
+            return
+
+        def upload():
+            try:
+                with open(self._path(digest), "rb") as file:
+                    get_s3_client().upload_fileobj(
+                        file, self.s3_bucket, self._s3_key(digest)
+                    )
+            except (OSError, ClientError) as e:
+                logger.warning(f"Bundle {digest} not copied to S3: {e}")
+
+        get_s3_executor().submit(upload)
+
+
+_bundle_cache = None
+_bundle_cache_disabled = not BUNDLE_CACHE_ENABLED
+_bundle_cache_lock = threading.Lock()
+
+
+def get_bundle_cache() -> Optional[BundleCache]:
+    """
+    Regresa el cache de bundles del proceso o None si está deshabilitado o no
+    se puede usar el directorio configurado
+    """
+    global _bundle_cache, _bundle_cache_disabled
+    if _bundle_cache_disabled:
+        return None
+    if _bundle_cache is None:
+        with _bundle_cache_lock:
+            if _bundle_cache is None:
+                try:
+                    _bundle_cache = BundleCache(
+                        BUNDLE_CACHE_DIR,
+                        BUNDLE_CACHE_MAX_BYTES,
+                        BUNDLE_CACHE_MAX_AGE,
+                        BUNDLE_CACHE_S3_BUCKET or None,
+                        BUNDLE_CACHE_S3_PREFIX,
+                    )
+                except OSError as e:
+                    logger.error(f"Bundle cache disabled: {e}")
+                    _bundle_cache_disabled = True
+                    return None
+    return _bundle_cache
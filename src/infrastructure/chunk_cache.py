@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import mmap
+import os
+import threading
+from typing import Optional
+
+from domain.constants import (
+    VIDEO_CHUNK_CACHE_DIR,
+    VIDEO_CHUNK_CACHE_ENABLED,
+    VIDEO_CHUNK_CACHE_MAX_BYTES,
+    VIDEO_CHUNK_SIZE,
+)
+from infrastructure.disk_cache import CacheWriter, DiskCache
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkCache(DiskCache):
+    """
+    Cache en disco de segmentos de tamaño fijo alineados al inicio del objeto.
+
+    Los segmentos se identifican por bucket/key/ETag, por lo que una nueva
+    versión del objeto nunca usa segmentos viejos. El directorio se puede
+    compartir entre workers y max_bytes limita el total de todos ellos (ver
+    DiskCache).
+    """
+
+    def __init__(self, directory: str, max_bytes: int, chunk_size: int):
+        self.chunk_size = chunk_size
+        super().__init__(directory, max_bytes)
+
+    def _path(self, bucket_name: str, key: str, etag: str, index: int) -> str:
+        digest = hashlib.sha256(f"{bucket_name}\0{key}\0{etag}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.{index}")
+
+    def contains(self, bucket_name: str, key: str, etag: str, index: int) -> bool:
+        return os.path.exists(self._path(bucket_name, key, etag, index))
+
+    def read(
+        self,
+        bucket_name: str,
+        key: str,
+        etag: str,
+        index: int,
+        start: int = 0,
+        end: Optional[int] = None,
+    ) -> Optional[bytes]:
+        """
+        Lee los bytes [start, end) de un segmento con mmap
+
+        Returns:
+            Los bytes solicitados o None si el segmento no está en cache
+        """
+        path = self._path(bucket_name, key, etag, index)
+        try:
+            with open(path, "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                if size == 0:
+                    return None
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    data = mapped[start:end]
+        except FileNotFoundError:
+            self._forget(path)
+            return None
+
+        self._touch(path, size)
+        return data
+
+    def writer(self, bucket_name: str, key: str, etag: str, index: int) -> CacheWriter:
+        return self._writer(self._path(bucket_name, key, etag, index))
+
+
+_chunk_cache = None
+_chunk_cache_disabled = not VIDEO_CHUNK_CACHE_ENABLED
+_chunk_cache_lock = threading.Lock()
+
+
+def get_video_chunk_cache() -> Optional[ChunkCache]:
+    """
+    Regresa el cache de segmentos de video del proceso o None si está
+    deshabilitado o no se puede usar el directorio configurado
+    """
+    global _chunk_cache, _chunk_cache_disabled
+    if _chunk_cache_disabled:
+        return None
+    if _chunk_cache is None:
+        with _chunk_cache_lock:
+            if _chunk_cache is None:
+                try:
+                    _chunk_cache = ChunkCache(
+                        VIDEO_CHUNK_CACHE_DIR,
+                        VIDEO_CHUNK_CACHE_MAX_BYTES,
+                        VIDEO_CHUNK_SIZE,
+                    )
+                except OSError as e:
+                    logger.error(f"Video chunk cache disabled: {e}")
+                    _chunk_cache_disabled = True
+                    return None
+    return _chunk_cache
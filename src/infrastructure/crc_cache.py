@@ -0,0 +1,36 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from domain.constants import CRC_CACHE_MAX_ITEMS
+from infrastructure.metrics import record_cache
+
+
+class CrcCache:
+    """
+    Cache LRU en memoria del CRC32 de objetos de S3. La llave incluye el ETag,
+    por lo que una nueva versión del objeto nunca usa un CRC viejo.
+    """
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bucket_name: str, key: str, etag: str) -> Optional[int]:
+        with self._lock:
+            crc = self._items.get((bucket_name, key, etag))
+            if crc is not None:
+                self._items.move_to_end((bucket_name, key, etag))
+        record_cache("crc", crc is not None)
+        return crc
+
+    def put(self, bucket_name: str, key: str, etag: str, crc: int):
+        with self._lock:
+            self._items[(bucket_name, key, etag)] = crc
+            self._items.move_to_end((bucket_name, key, etag))
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+crc_cache = CrcCache(CRC_CACHE_MAX_ITEMS)
@@ -0,0 +1,150 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from domain.constants import DISK_CACHE_SCAN_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWriter:
+    """
+    Escribe un archivo temporal y lo publica en el cache solo cuando está
+    completo
+    """
+
+    def __init__(self, cache: "DiskCache", path: str):
+        self._cache = cache
+        self._path = path
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache.directory, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        self.size = 0
+
+    def write(self, data):
+        self._file.write(data)
+        self.size += len(data)
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp_path, self._path)
+        self._cache._register(self._path, self.size)
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class DiskCache:
+    """
+    Archivos en un directorio con desalojo LRU cuando se supera max_bytes y,
+    opcionalmente, por antigüedad con max_age segundos.
+
+    El directorio se puede compartir entre workers: el sistema de archivos es
+    la fuente de verdad. El último uso de cada archivo se guarda en su atime
+    y, como máximo cada scan_interval segundos, al escribir se vuelve a
+    listar el directorio, así max_bytes limita el total de todos los workers
+    y no el de cada uno.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        max_age: Optional[float] = None,
+        scan_interval: float = DISK_CACHE_SCAN_INTERVAL,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.scan_interval = scan_interval
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._size = 0
+        self._last_scan = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """
+        Reconstruye el índice con los archivos del directorio, incluidos los
+        de otros workers, ordenados por último uso, y desaloja lo que sobre
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Desalojado por otro worker mientras se listaba
+                continue
+            if self._expired(stat.st_mtime):
+                self._remove(entry.path)
+                continue
+            entries.append((stat.st_atime, entry.path, stat.st_size))
+
+        with self._lock:
+            self._items = OrderedDict((path, size) for _, path, size in sorted(entries))
+            self._size = sum(self._items.values())
+            self._last_scan = time.monotonic()
+            self._evict()
+
+    def _expired(self, mtime: float) -> bool:
+        return self.max_age is not None and time.time() - mtime > self.max_age
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _register(self, path: str, size: int):
+        with self._lock:
+            self._size += size - self._items.pop(path, 0)
+            self._items[path] = size
+            self._evict()
+            scan = time.monotonic() - self._last_scan >= self.scan_interval
+        # Incluye lo que escribieron los demás workers desde el último listado
+        if scan:
+            self._scan()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._items:
+            path, size = self._items.popitem(last=False)
+            self._size -= size
+            self._remove(path)
+
+    def _forget(self, path: str):
+        with self._lock:
+            self._size -= self._items.pop(path, 0)
+
+    def _touch(self, path: str, size: int):
+        """
+        Marca el archivo como usado recientemente, también para los demás
+        workers (atime)
+        """
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except OSError:
+            pass
+        with self._lock:
+            if path in self._items:
+                self._items.move_to_end(path)
+            else:
+                # Archivo escrito por otro worker
+                self._items[path] = size
+                self._size += size
+                self._evict()
+
+    def _writer(self, path: str) -> CacheWriter:
+        return CacheWriter(self, path)
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterable
+
+from domain.constants import (
+    BLOCKING_IO_WORKERS,
+    BUNDLE_COMPRESSION_WORKERS,
+    S3_MAX_CONCURRENCY,
+)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_s3_executor = None
+_compression_executor = None
+_blocking_executor = None
+_DONE = object()
+
+
+def get_s3_executor() -> ThreadPoolExecutor:
+    """
+    Pool de hilos del proceso para las llamadas a S3, su tamaño limita cuántas
+    llamadas concurrentes hace un worker sumando todos los requests
+    """
+    global _s3_executor
+    if _s3_executor is None:
+        with _lock:
+            if _s3_executor is None:
+                _s3_executor = ThreadPoolExecutor(
+                    max_workers=S3_MAX_CONCURRENCY, thread_name_prefix="s3"
+                )
+    return _s3_executor
+
+
+def get_compression_executor() -> ThreadPoolExecutor:
+    """
+    Pool de hilos del proceso para comprimir entradas de los ZIP. zlib libera
+    el GIL mientras comprime, por lo que los hilos usan varios núcleos sin el
+    costo de copiar los datos a otro proceso.
+    """
+    global _compression_executor
+    if _compression_executor is None:
+        with _lock:
+            if _compression_executor is None:
+                _compression_executor = ThreadPoolExecutor(
+                    max_workers=BUNDLE_COMPRESSION_WORKERS,
+                    thread_name_prefix="compression",
+                )
+    return _compression_executor
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """
+    Pool de hilos del proceso para el trabajo bloqueante de los endpoints
+    (metadata, planeación de bundles, lectura de los chunks de respuesta).
+    Es independiente de los pools de S3 y de compresión, a los que este
+    trabajo envía tareas y espera, por lo que no se pueden bloquear entre sí.
+    """
+    global _blocking_executor
+    if _blocking_executor is None:
+        with _lock:
+            if _blocking_executor is None:
+                _blocking_executor = ThreadPoolExecutor(
+                    max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking"
+                )
+    return _blocking_executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    """
+    Ejecuta func en el pool de trabajo bloqueante sin detener el event loop
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_blocking_executor(), partial(func, *args, **kwargs)
+    )
+
+
+def _close_quietly(close: Callable):
+    try:
+        close()
+    except Exception as e:
+        logger.debug("Iterator not closed: %s", e)
+
+
+async def iterate_blocking(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Recorre un iterador bloqueante en el pool de trabajo bloqueante. Al
+    terminar, o si el cliente se desconecta, el iterador se cierra en el
+    mismo pool cuando termina el chunk que estaba en curso.
+    """
+    executor = get_blocking_executor()
+    iterator = iter(chunks)
+    future = None
+    try:
+        while True:
+            future = executor.submit(next, iterator, _DONE)
+            chunk = await asyncio.wrap_future(future)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            if future is not None and not future.done():
+                # El generador sigue ejecutándose en otro hilo
+                future.add_done_callback(
+                    lambda _: executor.submit(_close_quietly, close)
+                )
+            else:
+                executor.submit(_close_quietly, close)
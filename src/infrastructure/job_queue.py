@@ -0,0 +1,181 @@
+import logging
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from domain.constants import (
+    BUNDLE_JOB_MAX_PENDING,
+    BUNDLE_JOB_STALE_AFTER,
+    BUNDLE_JOB_SYNC_INTERVAL,
+    BUNDLE_JOB_TTL,
+    BUNDLE_JOB_WORKERS,
+    BUNDLE_JOBS_S3_BUCKET,
+    BUNDLE_JOBS_S3_PREFIX,
+)
+from domain.entities.bundle_job import JOB_FAILED, BundleJob
+from infrastructure.job_store import S3JobStore
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class LocalJobQueue:
+    """
+    Cola de jobs dentro del proceso: los jobs corren en un pool de hilos y su
+    estado vive en memoria. Los jobs terminados se descartan ttl segundos
+    después de terminar.
+
+    Con un store (save/load) el estado también se publica al encolar, cada
+    sync_interval segundos mientras corre y al terminar, así un job se puede
+    consultar desde cualquier worker. Un job que deja de publicarse por más
+    de stale_after segundos (su worker se cayó) se reporta como fallido.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        ttl: float,
+        store=None,
+        sync_interval: float = BUNDLE_JOB_SYNC_INTERVAL,
+        stale_after: float = BUNDLE_JOB_STALE_AFTER,
+    ):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.store = store
+        self.sync_interval = sync_interval
+        self.stale_after = stale_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bundle-job"
+        )
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._syncer = None
+
+    def submit(self, func: Callable, *args) -> BundleJob:
+        """
+        Encola func(job, *args) y regresa el job creado
+
+        Raises:
+            JobQueueFull: Si ya hay max_pending jobs sin terminar
+        """
+        with self._lock:
+            self._expire()
+            if self._pending >= self.max_pending:
+                raise JobQueueFull()
+            # 128 bits aleatorios: el id es la credencial para consultar el
+            # job y su URL de descarga
+            job = BundleJob(job_id=secrets.token_hex(16))
+            self._jobs[job.job_id] = job
+            self._pending += 1
+
+        if self.store is not None:
+            try:
+                self._save(job)
+            except Exception:
+                with self._lock:
+                    del self._jobs[job.job_id]
+                    self._pending -= 1
+                raise
+            self._start_syncer()
+        self._executor.submit(self._run, job, func, args)
+        return job
+
+    def _run(self, job: BundleJob, func: Callable, args):
+        try:
+            func(job, *args)
+        except Exception as e:
+            logger.error("Bundle job %s failed: %s", job.job_id[:8], e)
+            job.status = JOB_FAILED
+            job.error = "Bundle generation failed"
+        finally:
+            job.finished_at = time.time()
+            if self.store is not None:
+                try:
+                    self._save(job)
+                except Exception as e:
+                    logger.error("Error saving bundle job %s: %s", job.job_id[:8], e)
+            with self._lock:
+                self._pending -= 1
+
+    def _save(self, job: BundleJob):
+        job.updated_at = time.time()
+        self.store.save(job)
+
+    def _start_syncer(self):
+        with self._lock:
+            if self._syncer is not None:
+                return
+            self._syncer = threading.Thread(
+                target=self._sync_loop, name="bundle-job-sync", daemon=True
+            )
+        self._syncer.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_interval)
+            with self._lock:
+                running = [
+                    job for job in self._jobs.values() if job.finished_at is None
+                ]
+            for job in running:
+                try:
+                    self._save(job)
+                except Exception as e:
+                    logger.error("Error saving bundle job %s: %s", job.job_id[:8], e)
+
+    def get(self, job_id: str) -> Optional[BundleJob]:
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+        if job is not None or self.store is None or not JOB_ID.fullmatch(job_id):
+            return job
+
+        # Job de otro worker
+        job = self.store.load(job_id)
+        if job is None:
+            return None
+        now = time.time()
+        if job.finished_at is not None and now - job.finished_at > self.ttl:
+            return None
+        if job.finished_at is None and now - (job.updated_at or 0) > self.stale_after:
+            job.status = JOB_FAILED
+            job.error = "Bundle job interrupted"
+        return job
+
+    def _expire(self):
+        now = time.time()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> LocalJobQueue:
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                store = None
+                if BUNDLE_JOBS_S3_BUCKET:
+                    store = S3JobStore(BUNDLE_JOBS_S3_BUCKET, BUNDLE_JOBS_S3_PREFIX)
+                _job_queue = LocalJobQueue(
+                    BUNDLE_JOB_WORKERS, BUNDLE_JOB_MAX_PENDING, BUNDLE_JOB_TTL, store
+                )
+    return _job_queue
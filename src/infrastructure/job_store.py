@@ -0,0 +1,41 @@
+import json
+from dataclasses import asdict
+from typing import Optional
+
+from botocore.exceptions import ClientError
+
+from domain.entities.bundle_job import BundleJob
+from infrastructure.s3 import get_s3_client
+
+
+class S3JobStore:
+    """
+    Guarda el estado de cada job como un JSON pequeño en S3 para que
+    cualquier worker pueda consultarlo, no solo el que lo ejecuta
+    """
+
+    def __init__(self, bucket_name: str, prefix: str):
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}jobs/{job_id}.json"
+
+    def save(self, job: BundleJob):
+        get_s3_client().put_object(
+            Bucket=self.bucket_name,
+            Key=self._key(job.job_id),
+            Body=json.dumps(asdict(job)).encode(),
+            ContentType="application/json",
+        )
+
+    def load(self, job_id: str) -> Optional[BundleJob]:
+        try:
+            response = get_s3_client().get_object(
+                Bucket=self.bucket_name, Key=self._key(job_id)
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return BundleJob(**json.loads(response["Body"].read()))
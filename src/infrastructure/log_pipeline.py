@@ -0,0 +1,159 @@
+import atexit
+import logging
+import queue
+import random
+import re
+import sys
+from collections.abc import Mapping
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from domain.constants import (
+    LOG_DEBUG_SAMPLE_RATE,
+    LOG_MAX_ARG_LENGTH,
+    LOG_MAX_ITEMS,
+    LOG_MAX_MESSAGE_LENGTH,
+    LOG_QUEUE_MAX_SIZE,
+)
+from infrastructure.metrics import LOG_RECORDS_DROPPED
+
+BEARER_TOKEN = re.compile(r"(Bearer\s+)[A-Za-z0-9._~+/=-]+", re.IGNORECASE)
+JWT = re.compile(r"eyJ[A-Za-z0-9_-]*\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*")
+SENSITIVE_KEYS = (
+    "authorization",
+    "token",
+    "jwt",
+    "password",
+    "secret",
+    "file_content",
+)
+
+REDACTED = "<redacted>"
+
+
+def redact_text(text: str, max_length: int) -> str:
+    """
+    Recorta el texto y oculta tokens Bearer y JWT
+    """
+    if len(text) > max_length:
+        text = f"{text[:max_length]}...<{len(text) - max_length} more chars>"
+    text = BEARER_TOKEN.sub(rf"\1{REDACTED}", text)
+    return JWT.sub(REDACTED, text)
+
+
+def _is_sensitive(key) -> bool:
+    return isinstance(key, str) and any(word in key.lower() for word in SENSITIVE_KEYS)
+
+
+def summarize(value, depth: int = 0):
+    """
+    Copia acotada de un argumento de log: los bytes se reemplazan por su
+    tamaño, los textos se recortan y las colecciones se limitan a
+    LOG_MAX_ITEMS elementos, así el costo no depende del tamaño del payload
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, str):
+        return redact_text(value, LOG_MAX_ARG_LENGTH)
+    if depth >= 2:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, Mapping):
+        summary = {}
+        for index, (key, item) in enumerate(value.items()):
+            if index == LOG_MAX_ITEMS:
+                summary["..."] = f"<{len(value) - index} more>"
+                break
+            summary[key] = (
+                REDACTED if _is_sensitive(key) else summarize(item, depth + 1)
+            )
+        return summary
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [
+            summarize(item, depth + 1) for _, item in zip(range(LOG_MAX_ITEMS), value)
+        ]
+        if len(value) > LOG_MAX_ITEMS:
+            items.append(f"<{len(value) - LOG_MAX_ITEMS} more>")
+        return items
+    return redact_text(str(value), LOG_MAX_ARG_LENGTH)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Deja pasar solo una fracción de los registros DEBUG; los demás niveles
+    siempre pasan
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class RedactingFormatter(logging.Formatter):
+    """
+    Formatter del hilo de logging: recorta el mensaje final y oculta tokens
+    que hayan llegado dentro de un f-string
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redact_text(super().format(record), LOG_MAX_MESSAGE_LENGTH)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Envía los registros a una cola que atiende un hilo en segundo plano. El
+    hilo del request solo copia los argumentos de forma acotada; el mensaje
+    se arma y se escribe en el hilo de logging. Si la cola está llena el
+    registro se descarta en lugar de bloquear el request.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if isinstance(record.args, Mapping):
+            record.args = summarize(record.args)
+        elif record.args:
+            record.args = tuple(summarize(arg) for arg in record.args)
+        if isinstance(record.msg, str) and len(record.msg) > LOG_MAX_MESSAGE_LENGTH:
+            record.msg = record.msg[:LOG_MAX_MESSAGE_LENGTH]
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(level: int, log_format: str):
+    """
+    Configura el logger raíz para escribir en stderr desde un hilo en
+    segundo plano. Se puede llamar más de una vez, solo la primera tiene
+    efecto.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(RedactingFormatter(log_format))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(LOG_DEBUG_SAMPLE_RATE))
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Se escriben los registros pendientes al terminar el proceso
+    atexit.register(_listener.stop)
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from domain.constants import METADATA_CACHE_MAX_ITEMS, METADATA_CACHE_TTL
+from domain.entities.object_metadata import ObjectMetadata
+from infrastructure.metrics import record_cache
+from infrastructure.s3 import get_s3_client
+
+
+class ObjectMetadataCache:
+    """
+    Cache LRU en memoria con TTL para la metadata (HEAD) de objetos de S3
+    """
+
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, bucket_name: str, key: str) -> Optional[ObjectMetadata]:
+        with self._lock:
+            item = self._items.get((bucket_name, key))
+            if item is None:
+                return None
+            expires_at, metadata = item
+            if expires_at < time.monotonic():
+                del self._items[(bucket_name, key)]
+                return None
+            self._items.move_to_end((bucket_name, key))
+            return metadata
+
+    def put(self, metadata: ObjectMetadata):
+        with self._lock:
+            self._items[(metadata.bucket_name, metadata.key)] = (
+                time.monotonic() + self.ttl,
+                metadata,
+            )
+            self._items.move_to_end((metadata.bucket_name, metadata.key))
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def invalidate(self, bucket_name: str, key: Optional[str] = None):
+        """
+        Elimina la metadata de un objeto o de todos los objetos del bucket
+        """
+        with self._lock:
+            if key is not None:
+                self._items.pop((bucket_name, key), None)
+                return
+            for cached_key in [k for k in self._items if k[0] == bucket_name]:
+                del self._items[cached_key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+metadata_cache = ObjectMetadataCache(METADATA_CACHE_MAX_ITEMS, METADATA_CACHE_TTL)
+
+
+def get_object_metadata(bucket_name: str, key: str) -> ObjectMetadata:
+    """
+    Regresa la metadata del objeto desde el cache o con un head_object.
+    Los errores de S3 (ClientError) se propagan al llamador.
+    """
+    metadata = metadata_cache.get(bucket_name, key)
+    record_cache("object_metadata", metadata is not None)
+    if metadata is not None:
+        return metadata
+
+    head_response = get_s3_client().head_object(Bucket=bucket_name, Key=key)
+    metadata = ObjectMetadata(
+        bucket_name=bucket_name,
+        key=key,
+        size=head_response["ContentLength"],
+        content_type=head_response.get("ContentType"),
+        etag=head_response.get("ETag"),
+        last_modified=head_response.get("LastModified"),
+    )
+    metadata_cache.put(metadata)
+    return metadata
+
+
+def invalidate_object_metadata(bucket_name: str, key: Optional[str] = None):
+    metadata_cache.invalidate(bucket_name, key)
@@ -0,0 +1,281 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import List, Sequence, Tuple
+
+# Buckets por defecto para latencias en segundos
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """
+    Métrica con un shard por hilo: cada hilo escribe solo en su diccionario,
+    sin locks, y los shards se suman al generar /metrics. Los shards de
+    hilos que ya terminaron se acumulan en uno solo.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired = {}
+        self._shards_lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def _merge(self, total: dict, shard: dict):
+        raise NotImplementedError
+
+    def _collect(self) -> dict:
+        with self._shards_lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    # El hilo ya no escribe en su shard
+                    self._merge(self._retired, shard)
+            self._shards = alive
+
+            total = {}
+            self._merge(total, self._retired)
+            for _, shard in alive:
+                # La copia del diccionario no suelta el GIL, el hilo dueño
+                # puede seguir escribiendo mientras tanto
+                self._merge(total, dict(shard))
+        return total
+
+    def _render_samples(self, values: dict) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._render_samples(self._collect()))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, total: dict, shard: dict):
+        for labels, value in shard.items():
+            total[labels] = total.get(labels, 0) + value
+
+    def _render_samples(self, values: dict) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Gauge(Counter):
+    """
+    Gauge que solo sube y baja (por ejemplo requests en curso); un inc y su
+    dec pueden ocurrir en hilos distintos porque los shards se suman
+    """
+
+    type_name = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # Un contador por bucket más +Inf, la suma y el total
+            counts = shard[labels] = [0] * (len(self.buckets) + 3)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def _merge(self, total: dict, shard: dict):
+        for labels, counts in shard.items():
+            merged = total.get(labels)
+            if merged is None:
+                total[labels] = list(counts)
+            else:
+                for i, count in enumerate(counts):
+                    merged[i] += count
+
+    def _render_samples(self, values: dict) -> List[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for labels, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = _format_value(bound) if bound == math.inf else repr(float(bound))
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, labels + (le,))} "
+                    f"{_format_value(cumulative)}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(counts[-2])}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(counts[-1])}")
+        return lines
+
+
+def render_metrics() -> str:
+    """
+    Regresa todas las métricas registradas en el formato de texto de
+    Prometheus
+    """
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "transfers_http_requests_total",
+    "Requests HTTP atendidos",
+    ("route", "method", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "transfers_http_request_duration_seconds",
+    "Tiempo desde que llega el request hasta que se envía el último byte",
+    ("route", "method"),
+)
+HTTP_TIME_TO_FIRST_BYTE = Histogram(
+    "transfers_http_time_to_first_byte_seconds",
+    "Tiempo desde que llega el request hasta que se envía el primer byte del body",
+    ("route", "method"),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "transfers_http_requests_in_flight",
+    "Requests HTTP en curso",
+)
+HTTP_RESPONSE_BYTES = Counter(
+    "transfers_http_response_bytes_total",
+    "Bytes enviados en el body de las respuestas",
+    ("route",),
+)
+HTTP_REQUEST_BYTES = Counter(
+    "transfers_http_request_bytes_total",
+    "Bytes recibidos en el body de los requests",
+    ("route",),
+)
+S3_REQUEST_DURATION = Histogram(
+    "transfers_s3_request_duration_seconds",
+    "Latencia de las llamadas a S3 hasta recibir los headers de la respuesta",
+    ("operation",),
+)
+S3_REQUEST_ERRORS = Counter(
+    "transfers_s3_request_errors_total",
+    "Llamadas a S3 que terminaron en error",
+    ("operation",),
+)
+BUNDLE_BUILD_DURATION = Histogram(
+    "transfers_bundle_build_duration_seconds",
+    "Tiempo para generar un bundle completo",
+    ("mode",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+BUNDLE_ENTRIES = Histogram(
+    "transfers_bundle_entries",
+    "Archivos por bundle generado",
+    ("mode",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "transfers_admission_in_flight",
+    "Operaciones admitidas en curso por clase",
+    ("class",),
+)
+ADMISSION_REJECTED = Counter(
+    "transfers_admission_rejected_total",
+    "Requests rechazados con 503 por el control de admisión",
+    ("class",),
+)
+ADMISSION_WAIT_DURATION = Histogram(
+    "transfers_admission_wait_seconds",
+    "Tiempo en la cola del control de admisión",
+    ("class",),
+)
+LOG_RECORDS_DROPPED = Counter(
+    "transfers_log_records_dropped_total",
+    "Registros de log descartados porque la cola estaba llena",
+)
+CACHE_REQUESTS = Counter(
+    "transfers_cache_requests_total",
+    "Consultas a los caches por resultado (hit o miss)",
+    ("cache", "result"),
+)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss", amount=count)
@@ -0,0 +1,76 @@
+import time
+
+from infrastructure.metrics import (
+    HTTP_REQUEST_BYTES,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    HTTP_RESPONSE_BYTES,
+    HTTP_TIME_TO_FIRST_BYTE,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada request: duración hasta el último byte,
+    tiempo hasta el primer byte del body (en un StreamingResponse los headers
+    salen antes de leer S3, por eso no se usan), bytes recibidos y enviados
+    y requests en curso.
+
+    Las métricas se etiquetan con la plantilla de la ruta (por ejemplo
+    /api/file/jobs/{job_id}) para no crear una serie por URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+        first_byte_at = None
+        bytes_received = 0
+        bytes_sent = 0
+
+        async def receive_with_metrics():
+            nonlocal bytes_received
+            message = await receive()
+            if message["type"] == "http.request":
+                bytes_received += len(message.get("body", b""))
+            return message
+
+        async def send_with_metrics(message):
+            nonlocal status_code, first_byte_at, bytes_sent
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if body and first_byte_at is None:
+                    first_byte_at = time.perf_counter()
+                bytes_sent += len(body)
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_with_metrics, send_with_metrics)
+        finally:
+            finished_at = time.perf_counter()
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+
+            # El router deja la ruta en el scope al resolver el request
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(route, method, str(status_code))
+            HTTP_REQUEST_DURATION.observe(finished_at - started_at, route, method)
+            HTTP_TIME_TO_FIRST_BYTE.observe(
+                (first_byte_at or finished_at) - started_at, route, method
+            )
+            if bytes_received:
+                HTTP_REQUEST_BYTES.inc(route, amount=bytes_received)
+            if bytes_sent:
+                HTTP_RESPONSE_BYTES.inc(route, amount=bytes_sent)
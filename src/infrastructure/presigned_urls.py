@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from domain.constants import (
+    PRESIGNED_URL_CACHE_MAX_ITEMS,
+    PRESIGNED_URL_EXPIRATION,
+    PRESIGNED_URL_REFRESH_MARGIN,
+)
+from infrastructure.metrics import record_cache
+from infrastructure.s3 import get_s3_client
+
+
+class PresignedUrlCache:
+    """
+    Cache LRU de URLs prefirmadas de get_object. Una URL se reutiliza hasta
+    refresh_margin segundos antes de que expire, así quien la recibe siempre
+    tiene al menos ese tiempo para usarla.
+    """
+
+    def __init__(self, expiration: int, refresh_margin: int, max_items: int):
+        self.expiration = expiration
+        self.refresh_margin = min(refresh_margin, expiration // 2)
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_url(self, bucket_name: str, key: str, **params) -> Tuple[str, int]:
+        """
+        Regresa la URL prefirmada del objeto y los segundos que se puede
+        seguir entregando. params se agregan al get_object, por ejemplo
+        ResponseContentDisposition.
+        """
+        cache_key = (bucket_name, key, tuple(sorted(params.items())))
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(cache_key)
+            if item is not None and item[0] - self.refresh_margin > now:
+                self._items.move_to_end(cache_key)
+                record_cache("presigned_url", True)
+                return item[1], int(item[0] - self.refresh_margin - now)
+
+        record_cache("presigned_url", False)
+        url = get_s3_client().generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket_name, "Key": key, **params},
+            ExpiresIn=self.expiration,
+        )
+        with self._lock:
+            self._items[cache_key] = (now + self.expiration, url)
+            self._items.move_to_end(cache_key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return url, self.expiration - self.refresh_margin
+
+
+presigned_url_cache = PresignedUrlCache(
+    PRESIGNED_URL_EXPIRATION,
+    PRESIGNED_URL_REFRESH_MARGIN,
+    PRESIGNED_URL_CACHE_MAX_ITEMS,
+)
+
+
+def get_presigned_url(bucket_name: str, key: str, **params) -> Tuple[str, int]:
+    return presigned_url_cache.get_url(bucket_name, key, **params)
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from typing import Callable, Hashable, List, Optional
+
+
+class ReadAheadBuffer:
+    """
+    Buffer en memoria de segmentos leídos por adelantado. Usa a lo sumo
+    max_bytes (desalojo LRU) y descarta los segmentos que nadie pidió en
+    idle_ttl segundos. Un segmento que se está descargando se puede esperar
+    en vez de pedirlo de nuevo.
+    """
+
+    def __init__(self, max_bytes: int, idle_ttl: float):
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._items = OrderedDict()
+        self._pending = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._items:
+            key, (last_used, data) = next(iter(self._items.items()))
+            if now - last_used <= self.idle_ttl:
+                break
+            del self._items[key]
+            self._size -= len(data)
+
+    def _put(self, key: Hashable, data: bytes, now: float):
+        if len(data) > self.max_bytes:
+            return
+        previous = self._items.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous[1])
+        while self._items and self._size + len(data) > self.max_bytes:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self._size -= len(evicted)
+        self._items[key] = (now, data)
+        self._size += len(data)
+
+    def contains(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items or key in self._pending
+
+    def get(self, key: Hashable, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Regresa el segmento, esperando si se está descargando, o None si no
+        está en el buffer
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            item = self._items.pop(key, None)
+            if item is not None:
+                self._items[key] = (now, item[1])
+                return item[1]
+            future = self._pending.get(key)
+
+        if future is None:
+            return None
+        try:
+            future.result(timeout)
+        except Exception:
+            return None
+        with self._lock:
+            item = self._items.get(key)
+            return item[1] if item is not None else None
+
+    def schedule(
+        self,
+        keys: List[Hashable],
+        load: Callable[[], List[bytes]],
+        executor: Executor,
+    ):
+        """
+        Descarga en el executor los segmentos keys; load() regresa el
+        contenido de cada uno en el mismo orden
+        """
+        future = Future()
+        with self._lock:
+            for key in keys:
+                self._pending[key] = future
+
+        def run():
+            try:
+                segments = load()
+                with self._lock:
+                    now = time.monotonic()
+                    self._expire(now)
+                    for key, data in zip(keys, segments):
+                        self._put(key, data, now)
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    for key in keys:
+                        if self._pending.get(key) is future:
+                            del self._pending[key]
+
+        executor.submit(run)
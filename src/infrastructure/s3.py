@@ -1,52 +1,233 @@
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
-import io
 import logging
+import threading
+import time
 import csv
+from concurrent.futures import wait
+
+from domain.constants import (
+    S3_CONNECT_TIMEOUT,
+    S3_MAX_ATTEMPTS,
+    S3_MAX_POOL_CONNECTIONS,
+    S3_READ_TIMEOUT,
+    S3_RETRY_MODE,
+    S3_TCP_KEEPALIVE,
+)
+from infrastructure.executors import get_s3_executor
+from infrastructure.metrics import S3_REQUEST_DURATION, S3_REQUEST_ERRORS
 
 logger = logging.getLogger(__name__)
 
-def get_s3_client():
-    try:
-        s3_client = boto3.client('s3')
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _start_call_timer(model, context, **kwargs):
+    context["metrics_timer"] = (model.name, time.perf_counter())
+
+
+def _observe_call(context, http_response=None, **kwargs):
+    """
+    Registra la latencia de la llamada; en un get_object es el tiempo hasta
+    recibir los headers, el body se lee después
+    """
+    timer = context.pop("metrics_timer", None)
+    if timer is None:
+        return
+    operation, started_at = timer
+    S3_REQUEST_DURATION.observe(time.perf_counter() - started_at, operation)
+    if http_response is None or http_response.status_code >= 300:
+        S3_REQUEST_ERRORS.inc(operation)
+
+
+def _build_s3_client(region_name):
+    config = Config(
+        region_name=region_name,
+        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+        connect_timeout=S3_CONNECT_TIMEOUT,
+        read_timeout=S3_READ_TIMEOUT,
+        retries={"mode": S3_RETRY_MODE, "max_attempts": S3_MAX_ATTEMPTS},
+        tcp_keepalive=S3_TCP_KEEPALIVE,
+    )
+    # La sesión por defecto de boto3 no es thread-safe, se usa una propia
+    s3_client = boto3.session.Session().client("s3", config=config)
+    events = s3_client.meta.events
+    events.register("before-call.s3", _start_call_timer)
+    events.register("after-call.s3", _observe_call)
+    events.register("after-call-error.s3", _observe_call)
+    return s3_client
+
+
+def get_s3_client(region_name=None):
+    """
+    Regresa el cliente de S3 del proceso. Se crea una sola vez por región y
+    se comparte entre requests e hilos para reutilizar sus conexiones.
+    """
+    s3_client = _clients.get(region_name)
+    if s3_client is not None:
         return s3_client
-    except NoCredentialsError:
-        print("Credentials not available.")
+
+    with _clients_lock:
+        s3_client = _clients.get(region_name)
+        if s3_client is None:
+            try:
+                s3_client = _build_s3_client(region_name)
+            except NoCredentialsError:
+                logger.error("AWS credentials not available")
+                return None
+            except ClientError as e:
+                logger.error("Error creating S3 client: %s", e)
+                return None
+            _clients[region_name] = s3_client
+    return s3_client
+
+
+def head_file(bucket_name, object_name, checksum=False):
+    s3_client = get_s3_client()
+    if s3_client is None:
         return None
+
+    head_params = {"Bucket": bucket_name, "Key": object_name}
+    if checksum:
+        # Incluye el checksum guardado por S3 (p. ej. ChecksumCRC32)
+        head_params["ChecksumMode"] = "ENABLED"
+    try:
+        return s3_client.head_object(**head_params)
     except ClientError as e:
-        print(f"Error creating S3 client: {e}")
+        logger.error(f"Error getting metadata of {object_name}: {e}")
         return None
-    
-def upload_file(file_obj, bucket_name, object_name):
-    s3_client = get_s3_client()
-    if s3_client is None:
-        return False
 
+
+def object_exists(bucket_name, object_name):
+    """
+    Indica si el objeto existe; otros errores de S3 se propagan
+    """
     try:
-        s3_client.upload_fileobj(file_obj, bucket_name, object_name)
-        print(f"File uploaded to {bucket_name}/{object_name}")
+        get_s3_client().head_object(Bucket=bucket_name, Key=object_name)
         return True
     except ClientError as e:
-        error_code = e.response['Error']['Code']
-        if error_code == 'NoSuchBucket':
-            print(f"Bucket {bucket_name} not found.")
-            return "BucketNotFound"
-        print(f"Error uploading file: {e}")
-        return "ClientError"
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
 
-def download_file(bucket_name, object_name):
+
+def stream_file(bucket_name, object_name, chunk_size, start=None, end=None, etag=None):
+    """
+    Lee un objeto de S3 en chunks sin cargarlo completo en memoria. Con
+    start/end se leen solo los bytes [start, end] y con etag la lectura
+    falla si el objeto cambió.
+    """
     s3_client = get_s3_client()
     if s3_client is None:
-        return None
+        raise Exception("AWS credentials not configured")
+
+    get_params = {"Bucket": bucket_name, "Key": object_name}
+    if start is not None:
+        get_params["Range"] = f"bytes={start}-{'' if end is None else end}"
+    if etag:
+        get_params["IfMatch"] = etag
+    response = s3_client.get_object(**get_params)
+    body = response["Body"]
+    try:
+        for chunk in body.iter_chunks(chunk_size):
+            yield chunk
+    finally:
+        body.close()
+
+
+def upload_stream(chunks, bucket_name, object_name, part_size, max_concurrency):
+    """
+    Sube a S3 el contenido de chunks conforme llega. Si supera part_size se
+    usa un multipart upload con hasta max_concurrency partes subiendo en
+    paralelo, por lo que la memoria usada se limita a unas cuantas partes.
+    Si algo falla el multipart upload se aborta.
+    """
+    s3_client = get_s3_client()
+    if s3_client is None:
+        return False
+
+    upload_id = None
+    futures = []
+    slots = threading.BoundedSemaphore(max_concurrency)
+
+    def upload_part(part_number, data):
+        try:
+            response = s3_client.upload_part(
+                Bucket=bucket_name,
+                Key=object_name,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            slots.release()
+
+    def submit_part(data):
+        nonlocal upload_id
+        if upload_id is None:
+            upload_id = s3_client.create_multipart_upload(
+                Bucket=bucket_name, Key=object_name
+            )["UploadId"]
+        # Espera a que haya lugar para no acumular partes en memoria
+        slots.acquire()
+        for future in futures:
+            if future.done() and future.exception():
+                slots.release()
+                raise future.exception()
+        futures.append(get_s3_executor().submit(upload_part, len(futures) + 1, data))
+
+    def abort():
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        if upload_id is not None:
+            try:
+                s3_client.abort_multipart_upload(
+                    Bucket=bucket_name, Key=object_name, UploadId=upload_id
+                )
+            except ClientError as e:
+                logger.error("Error aborting multipart upload %s: %s", upload_id, e)
 
-    
     try:
-        file_obj = io.BytesIO()
-        logger.debug(f'object_name in download file is: {object_name}')
-        s3_client.download_fileobj(bucket_name, object_name, file_obj)
-        file_obj.seek(0)  # Volver al inicio del archivo
-        
-        return  file_obj 
+        pending = []
+        pending_size = 0
+        for chunk in chunks:
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= part_size:
+                data = b"".join(pending)
+                while len(data) >= part_size:
+                    submit_part(data[:part_size])
+                    data = data[part_size:]
+                pending = [data]
+                pending_size = len(data)
+
+        data = b"".join(pending)
+        if upload_id is None:
+            s3_client.put_object(Bucket=bucket_name, Key=object_name, Body=data)
+        else:
+            if data:
+                submit_part(data)
+            parts = [future.result() for future in futures]
+            s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_name,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        logger.info("File uploaded to %s/%s", bucket_name, object_name)
+        return True
     except ClientError as e:
-        print(f"Error downloading file: {e}")
-        return None
\ No newline at end of file
+        abort()
+        error_code = e.response["Error"]["Code"]
+        if error_code == "NoSuchBucket":
+            logger.error("Bucket %s not found", bucket_name)
+            return "BucketNotFound"
+        logger.exception("Error uploading file %s/%s", bucket_name, object_name)
+        return "ClientError"
+    except BaseException:
+        abort()
+        raise
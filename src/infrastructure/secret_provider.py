@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from domain.constants import (
+    SECRET_CACHE_FILE,
+    SECRET_REFRESH_INTERVAL,
+    SECRET_RETRY_INTERVAL,
+    SECRET_ROTATION_GRACE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SecretProvider:
+    """
+    Secreto cargado en la primera consulta (desde el archivo de cache local
+    si está vigente) y refrescado en segundo plano cada ttl segundos sin
+    bloquear a quien lo consulta. Cuando el valor cambia, el anterior se
+    sigue entregando en versions() durante rotation_grace segundos.
+
+    loader recibe el path y regresa el secreto (get_key_jwt en la app, una
+    función local en pruebas).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        loader: Callable[[str], object],
+        ttl: float = SECRET_REFRESH_INTERVAL,
+        retry_interval: float = SECRET_RETRY_INTERVAL,
+        rotation_grace: float = SECRET_ROTATION_GRACE,
+        cache_file: str = SECRET_CACHE_FILE,
+    ):
+        self.path = path
+        self.loader = loader
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.rotation_grace = rotation_grace
+        self.cache_file = cache_file
+        self._current = None
+        self._previous = None
+        self._previous_until = 0.0
+        self._refresh_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _read_cache_file(self) -> Optional[Tuple[float, object]]:
+        if not self.cache_file:
+            return None
+        try:
+            with open(self.cache_file) as file:
+                cached = json.load(file)
+            if cached["path"] != self.path:
+                return None
+            return cached["loaded_at"], cached["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Ignoring unreadable secret cache file %s", self.cache_file)
+            return None
+
+    def _write_cache_file(self, value, loaded_at: float):
+        if not self.cache_file:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        try:
+            # mkstemp crea el archivo con permisos 0600
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".secret-")
+            with os.fdopen(fd, "w") as file:
+                json.dump(
+                    {"path": self.path, "loaded_at": loaded_at, "value": value}, file
+                )
+            os.replace(temp_path, self.cache_file)
+        except OSError:
+            logger.warning("Could not write secret cache file %s", self.cache_file)
+
+    def _set(self, value, loaded_at: float):
+        if self._current is not None and value != self._current:
+            logger.info("Secret %s rotated", self.path)
+            self._previous = self._current
+            self._previous_until = time.time() + self.rotation_grace
+        self._current = value
+        self._refresh_at = loaded_at + self.ttl
+
+    def _load(self):
+        cached = self._read_cache_file()
+        if cached is not None and time.time() - cached[0] < self.ttl:
+            self._set(cached[1], cached[0])
+            return
+        try:
+            value = self.loader(self.path)
+        except Exception:
+            if cached is None:
+                raise
+            # Se usa la copia vencida y se reintenta en segundo plano
+            logger.warning("Using cached copy of secret %s", self.path)
+            self._set(cached[1], cached[0])
+            return
+        loaded_at = time.time()
+        self._set(value, loaded_at)
+        self._write_cache_file(value, loaded_at)
+
+    def _refresh(self):
+        try:
+            value = self.loader(self.path)
+        except Exception:
+            logger.exception("Could not refresh secret %s", self.path)
+            with self._lock:
+                self._refresh_at = time.time() + self.retry_interval
+                self._refreshing = False
+            return
+        loaded_at = time.time()
+        with self._lock:
+            self._set(value, loaded_at)
+            self._refreshing = False
+        self._write_cache_file(value, loaded_at)
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._refresh, name="secret-refresh", daemon=True
+        ).start()
+
+    def get(self):
+        """
+        Regresa el valor vigente del secreto; solo la primera consulta espera
+        la carga
+        """
+        if self._current is None:
+            with self._lock:
+                if self._current is None:
+                    self._load()
+        elif time.time() >= self._refresh_at:
+            self._refresh_in_background()
+        return self._current
+
+    def versions(self) -> List[object]:
+        """
+        Valores aceptados: el vigente y, durante la ventana de rotación, el
+        anterior
+        """
+        current = self.get()
+        previous = self._previous
+        if previous is not None and time.time() < self._previous_until:
+            return [current, previous]
+        return [current]
+
+    def prefetch(self):
+        """
+        Inicia la carga en segundo plano para que el primer request no la
+        espere
+        """
+
+        def load():
+            try:
+                self.get()
+            except Exception:
+                logger.exception("Could not load secret %s", self.path)
+
+        threading.Thread(target=load, name="secret-prefetch", daemon=True).start()
@@ -0,0 +1,56 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Paquete privado, solo disponible con las dependencias del proyecto
+pytest.importorskip("ds_security_validation")
+
+from src.application import auth  # noqa: E402
+
+
+class StaticKeys:
+    def versions(self):
+        return ["key"]
+
+
+def make_verifier(claims, valid=True, **kwargs):
+    verification = MagicMock()
+    verification.is_valid.return_value = valid
+    verification.get_claims.return_value = json.dumps(claims)
+    with patch.object(auth, "Verification", return_value=verification):
+        verifier = auth.TokenVerifier(StaticKeys(), **kwargs)
+        # La instancia queda registrada para la llave y se reutiliza
+        verifier._get_verifications()
+    return verifier, verification
+
+
+def test_token_claims_are_cached():
+    verifier, verification = make_verifier({"bucket": "b"})
+
+    assert verifier.get_claims("token") == {"bucket": "b"}
+    assert verifier.get_claims("token") == {"bucket": "b"}
+    verification.is_valid.assert_called_once_with("token")
+
+
+def test_token_claims_expire_with_ttl_and_exp():
+    verifier, verification = make_verifier({"bucket": "b"}, ttl=0.05)
+    verifier.get_claims("token")
+    time.sleep(0.1)
+    verifier.get_claims("token")
+    assert verification.is_valid.call_count == 2
+
+    verifier, verification = make_verifier({"exp": time.time() + 0.05})
+    verifier.get_claims("token")
+    time.sleep(0.1)
+    verifier.get_claims("token")
+    assert verification.is_valid.call_count == 2
+
+
+def test_invalid_token_is_not_cached():
+    verifier, verification = make_verifier({}, valid=False)
+
+    assert verifier.get_claims("token") is None
+    assert verifier.get_claims("token") is None
+    assert verification.is_valid.call_count == 2
@@ -0,0 +1,80 @@
+import io
+import tarfile
+from unittest.mock import patch
+
+from src.application import batch_upload
+
+
+def test_batch_object_key_stays_inside_prefix():
+    assert batch_upload.batch_object_key("docs/a.pdf", "up/", None) == "up/docs/a.pdf"
+    assert batch_upload.batch_object_key("../a.pdf", "up/", None) is None
+    assert batch_upload.batch_object_key("/a.pdf", "", ["a.pdf"]) == "a.pdf"
+    assert batch_upload.batch_object_key("b.pdf", "", ["a.pdf"]) is None
+
+
+def test_batch_object_key_does_not_escape_to_a_sibling_prefix():
+    assert batch_upload.batch_object_key("0/x", "tenant1", None) == "tenant1/0/x"
+    assert batch_upload.batch_object_key("../tenant10/x", "tenant1", None) is None
+    assert batch_upload.batch_object_key("0/x", "tenant1", ["tenant10/x"]) is None
+
+
+def test_iter_archive_expands_regular_files():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in (("a.txt", b"a" * 10), ("dir/b.txt", b"b" * 100000)):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    body = buffer.getvalue()
+    chunks = (body[i : i + 1000] for i in range(0, len(body), 1000))
+
+    files = [
+        (name, b"".join(content)) for name, content in batch_upload.iter_archive(chunks)
+    ]
+
+    assert files == [("a.txt", b"a" * 10), ("dir/b.txt", b"b" * 100000)]
+
+
+def test_upload_batch_reports_each_file():
+    files = [("a.txt", iter([b"a"])), ("../x", iter([b"x"])), ("b.txt", iter([b"b"]))]
+    outcomes = {"up/a.txt": True, "up/b.txt": "BucketNotFound"}
+
+    def upload_stream(chunks, bucket_name, key, part_size, concurrency):
+        return outcomes[key]
+
+    with patch.object(batch_upload, "upload_stream", upload_stream), patch.object(
+        batch_upload, "invalidate_object_metadata"
+    ) as invalidate:
+        results, form_error = batch_upload.upload_batch(
+            files, "bucket", "up/", None, 10, 1, 2, 10
+        )
+
+    assert form_error is None
+    assert [result["status"] for result in results] == ["success", "error", "error"]
+    assert results[1]["key"] is None
+    assert results[2]["error"] == "Bucket not found"
+    invalidate.assert_called_once_with("bucket", "up/a.txt")
+
+
+def test_upload_batch_keeps_results_when_body_is_truncated():
+    def truncated():
+        yield b"b"
+        # Lo que lanza iter_multipart cuando el body se corta
+        raise batch_upload.MultipartError("Incomplete multipart body")
+
+    files = [("a.txt", iter([b"aaa"])), ("b.txt", truncated())]
+
+    with patch.object(
+        batch_upload, "upload_stream", return_value=True
+    ) as upload, patch.object(batch_upload, "invalidate_object_metadata"):
+        results, form_error = batch_upload.upload_batch(
+            files, "bucket", "up/", None, 10, 1, 2, 10
+        )
+
+    assert form_error == "Incomplete multipart body"
+    assert upload.call_count == 1
+    assert [(result["key"], result["status"]) for result in results] == [
+        ("up/a.txt", "success"),
+        ("up/b.txt", "error"),
+    ]
+    assert results[1]["error"] == "The file was not received completely"
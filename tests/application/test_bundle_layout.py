@@ -0,0 +1,85 @@
+import io
+import zipfile
+import zlib
+from datetime import datetime, timezone
+
+from src.application.bundle_layout import (
+    LAYOUT_FLAT,
+    LAYOUT_NESTED,
+    CrcResolver,
+    crc32_combine,
+    plan_bundle,
+)
+from src.application.zip_stream import ZipStream
+from src.domain.entities.bundle_file import BundleFile
+
+CONTENTS = {"a.txt": b"hola mundo", "video.mp4": b"\x00\x01" * 50_000, "vacio": b""}
+DATE = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def bundle_files():
+    return [
+        BundleFile(
+            bucket_name="bkt-test",
+            key=name,
+            file_name=name,
+            size=len(content),
+            etag=f'"{name}"',
+            last_modified=DATE,
+            crc32=zlib.crc32(content),
+        )
+        for name, content in CONTENTS.items()
+    ]
+
+
+def render(plan):
+    resolver = CrcResolver()
+    data = b""
+    for segment in plan.segments:
+        if segment.bundle_file is not None:
+            data += CONTENTS[segment.bundle_file.key]
+        elif segment.data is not None:
+            data += segment.data
+        else:
+            data += segment.render(resolver)
+    return data
+
+
+def test_crc32_combine():
+    first, second = b"primera parte", b"segunda parte" * 1000
+    assert crc32_combine(
+        zlib.crc32(first), zlib.crc32(second), len(second)
+    ) == zlib.crc32(first + second)
+
+
+def test_plan_matches_zip_stream_nested():
+    plan = plan_bundle([("Carpeta", bundle_files())], LAYOUT_NESTED)
+    data = render(plan)
+
+    inner = ZipStream()
+    inner_data = b""
+    for name, content in CONTENTS.items():
+        inner_data += b"".join(inner.add(name, [content], date_time=DATE))
+    inner_data += b"".join(inner.finish())
+    outer = ZipStream()
+    expected = b"".join(outer.add("Carpeta.zip", [inner_data], date_time=DATE))
+    expected += b"".join(outer.finish())
+
+    assert plan.size == len(data)
+    assert data == expected
+
+
+def test_plan_flat_is_deterministic():
+    plan = plan_bundle([("Carpeta", bundle_files())], LAYOUT_FLAT)
+    data = render(plan)
+
+    assert plan_bundle([("Carpeta", bundle_files())], LAYOUT_FLAT).etag == plan.etag
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == [
+            "Carpeta/",
+            "Carpeta/a.txt",
+            "Carpeta/video.mp4",
+            "Carpeta/vacio",
+        ]
+        assert archive.getinfo("Carpeta/a.txt").date_time == (2024, 5, 1, 12, 30, 0)
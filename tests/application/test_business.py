@@ -1,22 +1,95 @@
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import MagicMock, patch
+
 # Importando desde src.application
 from src.application import business
-from result import Ok, Err, Result
+from src.domain.entities.bundle_file import BundleFile
+
+
+def test_put_file_use_case():
+    with patch.object(
+        business, "upload_stream", return_value=True
+    ) as upload, patch.object(business, "invalidate_object_metadata") as invalidate:
+        response = business.business_logic(
+            "put_file",
+            {"file_chunks": iter([b"data"]), "bucket_name": "bucket", "key": "a.txt"},
+        )
+
+    assert response == {
+        "response": {"message": "File uploaded successfully", "status": "success"},
+        "error": None,
+    }
+    assert upload.call_args.args[1:3] == ("bucket", "a.txt")
+    invalidate.assert_called_once_with("bucket", "a.txt")
+
+
+def test_put_file_bucket_not_found():
+    with patch.object(business, "upload_stream", return_value="BucketNotFound"):
+        response = business.business_logic(
+            "put_file",
+            {"file_chunks": iter([]), "bucket_name": "missing", "key": "a.txt"},
+        )
+
+    assert response["status_code"] == 404
+    assert response["error"] == "Bucket not found"
+
+
+def test_put_files_reports_uploaded_files_when_form_is_invalid():
+    results = [{"fileName": "a.txt", "key": "up/a.txt", "status": "success"}]
+    with patch.object(
+        business, "upload_batch", return_value=(results, "Incomplete multipart body")
+    ):
+        response = business.business_logic(
+            "put_files",
+            {"form_files": iter([]), "bucket_name": "bucket", "prefix": "up/"},
+        )
+
+    assert response["response"] == {
+        "files": results,
+        "uploaded": 1,
+        "failed": 0,
+        "error": "Incomplete multipart body",
+    }
+
+    with patch.object(business, "upload_batch", return_value=([], "Bad form")):
+        response = business.business_logic(
+            "put_files",
+            {"form_files": iter([]), "bucket_name": "bucket", "prefix": "up/"},
+        )
+
+    assert (response["status_code"], response["error"]) == (400, "Bad form")
+
+
+def test_get_file_without_available_files():
+    missing = [("bucket", "a.txt")]
+    with patch.object(business, "resolve_files", return_value=([], missing)):
+        response = business.business_logic(
+            "get_file", {"files_data": {"bucket": [{"F": [{"key": "a.txt"}]}]}}
+        )
+
+    assert response["status_code"] == 404
+    assert response["error"] == "No files found to download."
+
+
+def test_unknown_action():
+    with pytest.raises(Exception, match="Event user_get not found"):
+        business.business_logic("user_get", {})
 
 
-def test_get_use_case(): 
-    mock_id = "some_id"
-    result = business.user_get(mock_id) 
-    match result:
-        case Ok(user):
-            assert user == {"id": mock_id}
-        case Err(e):
-            assert False, e
+def test_cached_bundle_is_closed_on_unsatisfiable_range(tmp_path):
+    cached = tmp_path / "bundle.zip"
+    cached.write_bytes(b"x" * 10)
+    cached_file = open(cached, "rb")
+    bundle_cache = MagicMock()
+    bundle_cache.open.return_value = cached_file
+    folders = [("F", [BundleFile("bucket", "a.txt", "a.txt", 4, etag='"e"')])]
 
+    with patch.object(
+        business, "resolve_files", return_value=(folders, [])
+    ), patch.object(business, "get_bundle_cache", return_value=bundle_cache):
+        response = business.download_file_logic(
+            {"bucket": []}, range_header="bytes=100-200", redirect=False
+        )
 
-def test_user_create(): 
-    mock_data = {"key": "value"}
-    
-    result = business.user_create(mock_data) 
-    assert result.is_ok()
\ No newline at end of file
+    assert response.status_code == 416
+    assert cached_file.closed
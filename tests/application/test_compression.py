@@ -0,0 +1,29 @@
+import os
+
+from src.application.compression import choose_compression
+from src.application.zip_stream import ZIP_DEFLATED, ZIP_STORED
+
+
+def test_choose_compression_by_extension_and_content_type():
+    assert choose_compression("video.MP4", None, [])[0] == ZIP_STORED
+    assert choose_compression("reporte.csv", None, [])[0] == ZIP_DEFLATED
+    assert choose_compression("datos", "application/json", [])[0] == ZIP_DEFLATED
+    assert choose_compression("foto", "image/jpeg", [])[0] == ZIP_STORED
+
+
+def test_choose_compression_by_sample_keeps_content():
+    method, chunks = choose_compression("datos.bin", None, iter([b"\0" * 1000, b"x"]))
+    assert method == ZIP_DEFLATED
+    assert list(chunks) == [b"\0" * 1000, b"x"]
+
+    random_data = os.urandom(1000)
+    method, chunks = choose_compression("datos.bin", None, iter([random_data]))
+    assert method == ZIP_STORED
+    assert list(chunks) == [random_data]
+
+
+def test_choose_compression_policy_override():
+    assert choose_compression("reporte.csv", None, [], policy="store")[0] == ZIP_STORED
+    assert (
+        choose_compression("video.mp4", None, [], policy="deflate")[0] == ZIP_DEFLATED
+    )
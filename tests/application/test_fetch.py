@@ -0,0 +1,47 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from src.application import fetch
+from src.application.fetch import map_ordered
+from src.domain.entities.bundle_file import BundleFile
+
+
+def test_map_ordered_keeps_order_and_limit():
+    lock = threading.Lock()
+    in_flight = {"current": 0, "max": 0}
+
+    def work(item):
+        with lock:
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        time.sleep(random.uniform(0, 0.01))
+        with lock:
+            in_flight["current"] -= 1
+        return item * 2
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(map_ordered(work, range(50), 4, executor))
+
+    assert results == [item * 2 for item in range(50)]
+    assert in_flight["max"] <= 4
+
+
+def test_iter_parallel_range_reassembles_in_order():
+    data = bytes(range(256)) * 40
+    requested = []
+
+    def stream_file(bucket_name, key, chunk_size, start, end, etag):
+        requested.append((start, end, etag))
+        time.sleep(random.uniform(0, 0.01))
+        yield data[start : end + 1]
+
+    bundle_file = BundleFile("bucket", "big.bin", "big.bin", len(data), etag='"e"')
+    with patch.object(fetch, "stream_file", stream_file):
+        chunks = list(fetch.iter_parallel_range(bundle_file, 100, 9999, 1000, 3))
+
+    assert b"".join(chunks) == data[100:10000]
+    assert sorted(requested)[0] == (100, 1099, '"e"')
+    assert len(requested) == 10
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.application.http_range import (
+    RangeNotSatisfiable,
+    http_date,
+    if_range_matches,
+    is_not_modified,
+    parse_byte_range,
+)
+
+LAST_MODIFIED = datetime(2015, 10, 21, 7, 28, 0, tzinfo=timezone.utc)
+
+
+def test_parse_byte_range():
+    assert parse_byte_range(None, 100) is None
+    assert parse_byte_range("bytes=0-9", 100) == (0, 9)
+    assert parse_byte_range("bytes=90-", 100) == (90, 99)
+    assert parse_byte_range("bytes=-10", 100) == (90, 99)
+    assert parse_byte_range("bytes=50-500", 100) == (50, 99)
+    assert parse_byte_range("bytes=0-1,5-6", 100) is None
+
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range("bytes=100-", 100)
+
+
+def test_if_range_matches():
+    assert if_range_matches(None, '"abc"')
+    assert if_range_matches('"abc"', '"abc"')
+    assert not if_range_matches('"old"', '"abc"')
+    assert not if_range_matches("Wed, 21 Oct 2015 07:28:00 GMT", '"abc"')
+    assert if_range_matches(http_date(LAST_MODIFIED), '"abc"', LAST_MODIFIED)
+    assert not if_range_matches('W/"abc"', '"abc"')
+
+
+def test_is_not_modified():
+    assert is_not_modified('"abc"', None, '"abc"')
+    assert is_not_modified('W/"old", W/"abc"', None, '"abc"')
+    assert not is_not_modified('"old"', None, '"abc"')
+    assert is_not_modified(
+        None, "Wed, 21 Oct 2015 07:28:00 GMT", '"abc"', LAST_MODIFIED
+    )
+    assert not is_not_modified(
+        None, "Tue, 20 Oct 2015 07:28:00 GMT", '"abc"', LAST_MODIFIED
+    )
+    # If-None-Match tiene prioridad sobre la fecha
+    assert not is_not_modified(
+        '"old"', "Wed, 21 Oct 2015 07:28:00 GMT", '"abc"', LAST_MODIFIED
+    )
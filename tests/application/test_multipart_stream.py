@@ -0,0 +1,45 @@
+import pytest
+
+from src.application.multipart_stream import MultipartError, iter_form_file
+
+CONTENT_TYPE = "multipart/form-data; boundary=XyZ"
+
+
+def multipart_body(name, filename, content):
+    return (
+        b"--XyZ\r\n"
+        b'Content-Disposition: form-data; name="otro"\r\n\r\n'
+        b"valor\r\n"
+        b"--XyZ\r\n"
+        + f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode()
+        + b"Content-Type: application/octet-stream\r\n\r\n"
+        + content
+        + b"\r\n--XyZ--\r\n"
+    )
+
+
+def test_iter_form_file_with_small_chunks():
+    content = bytes(range(256)) * 100
+    body = multipart_body("file", "datos.bin", content)
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    assert b"".join(iter_form_file(chunks, CONTENT_TYPE, "file")) == content
+
+
+def test_iter_form_file_missing_field():
+    body = multipart_body("archivo", "datos.bin", b"abc")
+
+    with pytest.raises(MultipartError):
+        list(iter_form_file([body], CONTENT_TYPE, "file"))
+
+
+def test_iter_form_file_requires_multipart():
+    with pytest.raises(MultipartError):
+        list(iter_form_file([b"{}"], "application/json", "file"))
+
+
+def test_iter_form_file_truncated_body():
+    body = multipart_body("file", "datos.bin", b"abc" * 100)[:-40]
+
+    with pytest.raises(MultipartError):
+        list(iter_form_file([body], CONTENT_TYPE, "file"))
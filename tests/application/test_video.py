@@ -0,0 +1,105 @@
+import io
+from unittest.mock import patch
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+from src.application import video
+from src.domain.entities.object_metadata import ObjectMetadata
+from src.infrastructure.chunk_cache import ChunkCache
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.gets = []
+
+    def get_object(self, Bucket, Key, Range, IfMatch=None):
+        self.gets.append(Range)
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        etag, data = self.objects[Key]
+        if IfMatch is not None and IfMatch != etag:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+        first, last = Range[len("bytes=") :].split("-")
+        data = data[int(first) : int(last) + 1]
+        return {"Body": StreamingBody(io.BytesIO(data), len(data))}
+
+
+def test_iter_cached_range_fails_before_streaming_when_object_changed(tmp_path):
+    s3 = FakeS3()
+    cache = ChunkCache(str(tmp_path), 1 << 20, 100)
+    old = ObjectMetadata("videos", "a.mp4", 250, etag='"v1"')
+    new = ObjectMetadata("videos", "a.mp4", 300, etag='"v2"')
+    s3.objects["a.mp4"] = ('"v1"', bytes(range(250)))
+
+    with patch.object(video, "get_s3_client", return_value=s3), patch.object(
+        video, "invalidate_object_metadata"
+    ) as invalidate:
+        chunks = video.iter_cached_range(cache, old, 0, 99, 64)
+        assert b"".join(chunks) == bytes(range(100))
+
+        # El objeto se reemplaza entre dos requests; el primer segmento está
+        # en cache pero el siguiente se pide a S3 antes de entregar nada
+        s3.objects["a.mp4"] = ('"v2"', bytes(300))
+        with pytest.raises(ClientError) as error:
+            video.iter_cached_range(cache, old, 0, 249, 64)
+        assert error.value.response["Error"]["Code"] == "PreconditionFailed"
+        invalidate.assert_called_once_with("videos", "a.mp4")
+
+        chunks = video.iter_cached_range(cache, new, 0, 299, 64)
+        assert b"".join(chunks) == bytes(300)
+
+
+def test_iter_cached_range_close_releases_unread_body(tmp_path):
+    s3 = FakeS3()
+    cache = ChunkCache(str(tmp_path), 1 << 20, 100)
+    metadata = ObjectMetadata("videos", "a.mp4", 250, etag='"v1"')
+    s3.objects["a.mp4"] = ('"v1"', bytes(range(250)))
+
+    with patch.object(video, "get_s3_client", return_value=s3):
+        chunks = video.iter_cached_range(cache, metadata, 0, 249, 64)
+        assert s3.gets == ["bytes=0-249"]
+        body = chunks._body
+        chunks.close()
+
+    assert body._raw_stream.closed
+    assert not cache.contains("videos", "a.mp4", '"v1"', 0)
+
+
+class EmptyReadAhead:
+    chunk_size = 100
+
+    def contains(self, metadata, index):
+        return False
+
+    def get(self, metadata, index):
+        return None
+
+
+def test_iter_cached_range_counts_read_ahead_misses_only_for_s3(tmp_path):
+    s3 = FakeS3()
+    cache = ChunkCache(str(tmp_path), 1 << 20, 100)
+    metadata = ObjectMetadata("videos", "a.mp4", 250, etag='"v1"')
+    s3.objects["a.mp4"] = ('"v1"', bytes(range(250)))
+    recorded = []
+
+    def record_cache(cache_name, hit, count=1):
+        recorded.extend([(cache_name, hit)] * count)
+
+    with patch.object(video, "get_s3_client", return_value=s3):
+        b"".join(video.iter_cached_range(cache, metadata, 0, 149, 64))
+        with patch.object(video, "record_cache", record_cache):
+            chunks = video.iter_cached_range(
+                cache, metadata, 0, 249, 64, EmptyReadAhead()
+            )
+            assert b"".join(chunks) == bytes(range(250))
+
+    # Los segmentos 0 y 1 salen del disco, solo el 2 se pide a S3
+    assert sorted(recorded) == [
+        ("video_chunk", False),
+        ("video_chunk", True),
+        ("video_chunk", True),
+        ("video_read_ahead", False),
+    ]
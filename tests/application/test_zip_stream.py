@@ -0,0 +1,77 @@
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from src.application.zip_stream import ZipStream, ZIP_DEFLATED
+
+
+def build_zip(entries, compression=0):
+    zip_stream = ZipStream()
+    data = b""
+    for name, chunks in entries:
+        data += b"".join(zip_stream.add(name, chunks, compression=compression))
+    data += b"".join(zip_stream.finish())
+    return data
+
+
+def test_zip_stream_is_readable_by_zipfile():
+    data = build_zip(
+        [
+            ("a.txt", [b"hola ", b"mundo"]),
+            ("carpeta/Guía rápida.mp4", [b"\x00" * 100_000]),
+            ("vacio.txt", []),
+        ]
+    )
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["a.txt", "carpeta/Guía rápida.mp4", "vacio.txt"]
+        assert archive.read("a.txt") == b"hola mundo"
+        assert archive.read("carpeta/Guía rápida.mp4") == b"\x00" * 100_000
+        assert archive.read("vacio.txt") == b""
+
+
+def test_zip_stream_deflated():
+    content = b"linea de texto repetida\n" * 10_000
+    data = build_zip([("log.txt", [content])], compression=ZIP_DEFLATED)
+
+    assert len(data) < len(content)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.read("log.txt") == content
+
+
+def test_zip_stream_nested_zip():
+    inner = ZipStream()
+
+    def inner_chunks():
+        yield from inner.add("doc.pdf", [b"%PDF-1.4"])
+        yield from inner.finish()
+
+    data = build_zip([("carpeta.zip", inner_chunks())])
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        with zipfile.ZipFile(io.BytesIO(archive.read("carpeta.zip"))) as nested:
+            assert nested.read("doc.pdf") == b"%PDF-1.4"
+
+
+def test_zip_stream_parallel_deflate():
+    content = b"".join(b"fila %d de un csv grande\n" % i for i in range(200_000))
+    chunks = [content[i : i + 100_000] for i in range(0, len(content), 100_000)]
+
+    zip_stream = ZipStream()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        data = b"".join(
+            zip_stream.add(
+                "datos.csv",
+                chunks,
+                compression=ZIP_DEFLATED,
+                executor=executor,
+                block_size=256 * 1024,
+            )
+        )
+    data += b"".join(zip_stream.finish())
+
+    assert len(data) < len(content)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.read("datos.csv") == content
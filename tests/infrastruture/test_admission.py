@@ -0,0 +1,37 @@
+import asyncio
+
+from src.domain.entities.admission_budget import AdmissionBudget
+from src.infrastructure.admission import AdmissionController
+
+
+def test_admission_queues_then_rejects_when_full():
+    async def main():
+        controller = AdmissionController(
+            [AdmissionBudget("bundle", 1, 10, 1)], max_bytes=100, queue_timeout=0.05
+        )
+        assert await controller.acquire("bundle")
+        # La cola admite uno, que se atiende al liberar
+        waiter = asyncio.ensure_future(controller.acquire("bundle"))
+        await asyncio.sleep(0)
+        assert not await controller.acquire("bundle")
+        controller.release("bundle")
+        assert await waiter
+        # Sin liberar, el siguiente espera y vence
+        assert not await controller.acquire("bundle")
+
+    asyncio.run(main())
+
+
+def test_admission_shares_the_memory_budget_between_classes():
+    async def main():
+        controller = AdmissionController(
+            [AdmissionBudget("bundle", 5, 60, 0), AdmissionBudget("stream", 5, 50, 0)],
+            max_bytes=100,
+            queue_timeout=0.05,
+        )
+        assert await controller.acquire("bundle")
+        assert not await controller.acquire("stream")
+        controller.release("bundle")
+        assert await controller.acquire("stream")
+
+    asyncio.run(main())
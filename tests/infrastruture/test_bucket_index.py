@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+import pytest
+
+from src.infrastructure.bucket_index import BucketIndex
+
+
+def listing(prefix, delimiter=None):
+    objects = {
+        "": [{"Key": "root.mp4"}],
+        "A/": [{"Key": "A/1.mp4"}, {"Key": "A/2.mp4"}],
+        "B/": [{"Key": "B/1.mp4"}, {"Key": "B/sub/2.mp4"}],
+    }
+    return objects[prefix], ["A/", "B/"] if delimiter else []
+
+
+def test_bucket_index_query_with_cursor_and_prefix():
+    index = BucketIndex("bucket", (".mp4",), refresh_interval=60, max_age=600)
+    with patch.object(index, "_list", side_effect=listing):
+        index.refresh()
+
+    page, cursor, total = index.query("", limit=2)
+    assert [obj["Key"] for obj in page] == ["A/1.mp4", "A/2.mp4"]
+    assert total == 5
+
+    page, cursor, _ = index.query("", cursor=cursor, limit=2)
+    assert [obj["Key"] for obj in page] == ["B/1.mp4", "B/sub/2.mp4"]
+
+    page, cursor, _ = index.query("", cursor=cursor, limit=2)
+    assert [obj["Key"] for obj in page] == ["root.mp4"]
+    assert cursor is None
+
+    page, cursor, total = index.query("B/")
+    assert [obj["Key"] for obj in page] == ["B/1.mp4", "B/sub/2.mp4"]
+    assert (cursor, total) == (None, 2)
+
+
+def test_bucket_index_refresh_lists_only_stale_prefixes():
+    index = BucketIndex("bucket", (".mp4",), refresh_interval=60, max_age=600)
+    with patch.object(index, "_list", side_effect=listing) as list_mock:
+        index.refresh()
+        assert list_mock.call_count == 3
+
+        # Sin cambios solo se lista el primer nivel
+        list_mock.reset_mock()
+        index.refresh()
+        assert [call.args[0] for call in list_mock.call_args_list] == [""]
+
+        list_mock.reset_mock()
+        index.invalidate("B/new.mp4")
+        index.refresh()
+        assert sorted(call.args[0] for call in list_mock.call_args_list) == ["", "B/"]
+
+        list_mock.reset_mock()
+        index.invalidate()
+        index.refresh()
+        assert list_mock.call_count == 3
+
+    assert index.query("")[2] == 5
+
+
+def test_bucket_index_keeps_invalidation_when_refresh_fails():
+    index = BucketIndex("bucket", (".mp4",), refresh_interval=60, max_age=600)
+    with patch.object(index, "_list", side_effect=listing):
+        index.refresh()
+
+    index.invalidate("A/3.mp4")
+    with patch.object(index, "_list", side_effect=RuntimeError("S3")):
+        with pytest.raises(RuntimeError):
+            index.refresh()
+
+    with patch.object(index, "_list", side_effect=listing) as list_mock:
+        index.refresh()
+    assert sorted(call.args[0] for call in list_mock.call_args_list) == ["", "A/"]
@@ -0,0 +1,52 @@
+import os
+import time
+
+from src.infrastructure.bundle_cache import BundleCache, iter_file_range
+
+
+def test_bundle_cache_store_and_open(tmp_path):
+    cache = BundleCache(str(tmp_path), max_bytes=1000, max_age=60)
+    assert cache.open("abc") is None
+
+    assert b"".join(cache.store("abc", [b"PK", b"contenido"])) == b"PKcontenido"
+
+    cached_file = cache.open("abc")
+    assert b"".join(iter_file_range(cached_file, 2, 5, 2)) == b"cont"
+    assert cached_file.closed
+
+
+def test_bundle_cache_ignores_incomplete_bundles(tmp_path):
+    cache = BundleCache(str(tmp_path), max_bytes=1000, max_age=60)
+
+    chunks = cache.store("abc", [b"PK", b"contenido"])
+    next(chunks)
+    chunks.close()
+
+    assert cache.open("abc") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_bundle_cache_expires_old_bundles(tmp_path):
+    cache = BundleCache(str(tmp_path), max_bytes=1000, max_age=60)
+    b"".join(cache.store("abc", [b"PK"]))
+
+    old = time.time() - 120
+    os.utime(tmp_path / "abc.zip", (old, old))
+
+    assert cache.open("abc") is None
+    assert not (tmp_path / "abc.zip").exists()
+
+
+def test_bundle_caches_sharing_a_directory_share_max_bytes(tmp_path):
+    # Dos workers con el mismo directorio
+    first = BundleCache(str(tmp_path), max_bytes=100, max_age=60)
+    second = BundleCache(str(tmp_path), max_bytes=100, max_age=60)
+    first.scan_interval = second.scan_interval = 0
+
+    for cache, name in ((first, "a"), (second, "b"), (first, "c"), (second, "d")):
+        for index in range(2):
+            b"".join(cache.store(f"{name}{index}", [b"x" * 20]))
+
+    sizes = [entry.stat().st_size for entry in os.scandir(tmp_path)]
+    assert sum(sizes) <= 100
+    assert (tmp_path / "d1.zip").exists()
@@ -0,0 +1,38 @@
+from src.infrastructure.chunk_cache import ChunkCache
+
+
+def write_chunk(cache, index, data):
+    writer = cache.writer("bucket", "video.mp4", '"etag"', index)
+    writer.write(data)
+    writer.commit()
+
+
+def test_chunk_cache_read_and_lru_eviction(tmp_path):
+    cache = ChunkCache(str(tmp_path), max_bytes=20, chunk_size=10)
+    write_chunk(cache, 0, b"0123456789")
+    write_chunk(cache, 1, b"abcdefghij")
+
+    assert cache.read("bucket", "video.mp4", '"etag"', 0, 2, 5) == b"234"
+    write_chunk(cache, 2, b"ABCDEFGHIJ")
+
+    assert cache.read("bucket", "video.mp4", '"etag"', 1) is None
+    assert cache.read("bucket", "video.mp4", '"etag"', 0) == b"0123456789"
+    assert cache.read("bucket", "video.mp4", '"etag"', 2) == b"ABCDEFGHIJ"
+
+
+def test_chunk_cache_is_keyed_by_etag(tmp_path):
+    cache = ChunkCache(str(tmp_path), max_bytes=100, chunk_size=10)
+    write_chunk(cache, 0, b"0123456789")
+
+    assert cache.contains("bucket", "video.mp4", '"etag"', 0)
+    assert not cache.contains("bucket", "video.mp4", '"otra"', 0)
+
+
+def test_chunk_cache_discarded_writer_is_not_published(tmp_path):
+    cache = ChunkCache(str(tmp_path), max_bytes=100, chunk_size=10)
+    writer = cache.writer("bucket", "video.mp4", '"etag"', 0)
+    writer.write(b"01234")
+    writer.discard()
+
+    assert cache.read("bucket", "video.mp4", '"etag"', 0) is None
+    assert list(tmp_path.iterdir()) == []
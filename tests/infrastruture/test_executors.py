@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+from src.infrastructure.executors import iterate_blocking, run_blocking
+
+
+def test_run_blocking_runs_outside_the_event_loop():
+    async def main():
+        return await run_blocking(threading.current_thread)
+
+    assert asyncio.run(main()) is not threading.main_thread()
+
+
+def test_iterate_blocking_closes_the_iterator_when_stopped_early():
+    closed = threading.Event()
+    threads = set()
+
+    def chunks():
+        try:
+            for i in range(10):
+                threads.add(threading.current_thread())
+                yield bytes([i])
+        finally:
+            closed.set()
+
+    async def main():
+        received = []
+        iterator = iterate_blocking(chunks())
+        async for chunk in iterator:
+            received.append(chunk)
+            if len(received) == 3:
+                break
+        await iterator.aclose()
+        return received
+
+    assert asyncio.run(main()) == [b"\x00", b"\x01", b"\x02"]
+    assert closed.wait(5)
+    assert threading.main_thread() not in threads
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from dataclasses import asdict
+
+import pytest
+
+from src.domain.entities.bundle_job import (
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_RUNNING,
+    BundleJob,
+)
+from src.infrastructure.job_queue import JOB_ID, JobQueueFull, LocalJobQueue
+
+
+def test_job_queue_runs_jobs_in_background():
+    queue = LocalJobQueue(max_workers=1, max_pending=10, ttl=60)
+    done = threading.Event()
+
+    def work(job, total):
+        job.bytes_done = total
+        job.status = JOB_COMPLETED
+        done.set()
+
+    job = queue.submit(work, 10)
+    assert done.wait(5)
+    assert queue.get(job.job_id).bytes_done == 10
+    assert queue.get("otro") is None
+
+
+def test_job_ids_are_random_128_bit_values():
+    queue = LocalJobQueue(max_workers=1, max_pending=10, ttl=60)
+    job_ids = {queue.submit(lambda job: None).job_id for _ in range(5)}
+
+    assert len(job_ids) == 5
+    assert all(JOB_ID.fullmatch(job_id) for job_id in job_ids)
+
+
+def test_job_queue_marks_failed_jobs_and_limits_pending():
+    queue = LocalJobQueue(max_workers=1, max_pending=1, ttl=60)
+    release = threading.Event()
+
+    def fail(job):
+        release.wait(5)
+        raise Exception("S3 no disponible")
+
+    job = queue.submit(fail)
+    with pytest.raises(JobQueueFull):
+        queue.submit(fail)
+
+    release.set()
+    queue._executor.shutdown(wait=True)
+    assert job.status == JOB_FAILED
+    assert job.finished_at is not None
+
+
+class MemoryJobStore:
+    """
+    Store compartido entre colas, como el JSON en S3
+    """
+
+    def __init__(self):
+        self.items = {}
+
+    def save(self, job):
+        self.items[job.job_id] = json.dumps(asdict(job))
+
+    def load(self, job_id):
+        item = self.items.get(job_id)
+        return BundleJob(**json.loads(item)) if item is not None else None
+
+
+def test_job_can_be_polled_from_another_worker():
+    store = MemoryJobStore()
+    worker_a = LocalJobQueue(1, 10, 60, store, sync_interval=0.01)
+    worker_b = LocalJobQueue(1, 10, 60, store, sync_interval=0.01)
+    release = threading.Event()
+
+    def work(job):
+        job.status = JOB_RUNNING
+        job.bytes_done = 5
+        release.wait(5)
+        job.status = JOB_COMPLETED
+
+    job = worker_a.submit(work)
+    deadline = time.time() + 5
+    while worker_b.get(job.job_id).bytes_done != 5 and time.time() < deadline:
+        time.sleep(0.01)
+    assert worker_b.get(job.job_id).status == JOB_RUNNING
+
+    release.set()
+    worker_a._executor.shutdown(wait=True)
+    assert worker_b.get(job.job_id).status == JOB_COMPLETED
+    assert worker_b.get("0" * 32) is None
+
+
+def test_job_of_a_dead_worker_is_reported_as_failed():
+    store = MemoryJobStore()
+    store.save(BundleJob("a" * 32, status=JOB_RUNNING, updated_at=time.time() - 600))
+    queue = LocalJobQueue(1, 10, 60, store, stale_after=300)
+
+    job = queue.get("a" * 32)
+
+    assert job.status == JOB_FAILED
+    assert job.error == "Bundle job interrupted"
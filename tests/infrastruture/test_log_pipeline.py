@@ -0,0 +1,48 @@
+import logging
+import queue
+
+from src.infrastructure.log_pipeline import (
+    DebugSampler,
+    NonBlockingQueueHandler,
+    RedactingFormatter,
+)
+
+
+def make_record(msg, args, level=logging.INFO):
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+def test_queue_handler_summarizes_payloads_without_formatting():
+    log_queue = queue.Queue(maxsize=1)
+    handler = NonBlockingQueueHandler(log_queue)
+    payload = b"x" * 10_000_000
+
+    handler.handle(
+        make_record(
+            "upload %s context %s",
+            (
+                payload,
+                {"file_content": payload, "key": "a.txt", "items": list(range(50))},
+            ),
+        )
+    )
+    # La cola llena descarta el registro en lugar de bloquear
+    handler.handle(make_record("otro", ()))
+
+    record = log_queue.get_nowait()
+    assert log_queue.empty()
+    message = RedactingFormatter("%(message)s").format(record)
+    assert message.startswith(
+        "upload <10000000 bytes> context {'file_content': '<redacted>', 'key': 'a.txt'"
+    )
+    assert "<30 more>" in message
+
+
+def test_formatter_hides_tokens_and_sampler_keeps_other_levels():
+    formatter = RedactingFormatter("%(message)s")
+    record = make_record("Authorization: %s", ("Bearer eyJhbGc.eyJzdWIi.firma",))
+    assert formatter.format(record) == "Authorization: Bearer <redacted>"
+
+    sampler = DebugSampler(rate=0)
+    assert not sampler.filter(make_record("debug", (), logging.DEBUG))
+    assert sampler.filter(make_record("info", (), logging.INFO))
@@ -0,0 +1,36 @@
+import time
+
+from src.domain.entities.object_metadata import ObjectMetadata
+from src.infrastructure.metadata_cache import ObjectMetadataCache
+
+
+def metadata(key, etag='"1"'):
+    return ObjectMetadata(bucket_name="bucket", key=key, size=10, etag=etag)
+
+
+def test_metadata_cache_lru_eviction():
+    cache = ObjectMetadataCache(max_items=2, ttl=60)
+    cache.put(metadata("a"))
+    cache.put(metadata("b"))
+    assert cache.get("bucket", "a") is not None
+    cache.put(metadata("c"))
+
+    assert cache.get("bucket", "b") is None
+    assert cache.get("bucket", "a") is not None
+    assert cache.get("bucket", "c") is not None
+
+
+def test_metadata_cache_ttl_and_invalidation():
+    cache = ObjectMetadataCache(max_items=10, ttl=0.01)
+    cache.put(metadata("a"))
+    time.sleep(0.02)
+    assert cache.get("bucket", "a") is None
+
+    cache.ttl = 60
+    cache.put(metadata("a"))
+    cache.put(metadata("b"))
+    cache.invalidate("bucket", "a")
+    assert cache.get("bucket", "a") is None
+    assert cache.get("bucket", "b") is not None
+    cache.invalidate("bucket")
+    assert cache.get("bucket", "b") is None
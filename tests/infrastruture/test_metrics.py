@@ -0,0 +1,48 @@
+import threading
+
+from src.infrastructure.metrics import Counter, Gauge, Histogram
+
+
+def test_counter_sums_shards_of_all_threads():
+    counter = Counter("test_bytes_total", "Bytes de prueba", ("route",))
+
+    def worker():
+        for _ in range(1000):
+            counter.inc("/api/file", amount=2)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc('/a"b')
+
+    # Los shards de hilos terminados se siguen sumando
+    assert counter.render().splitlines() == [
+        "# HELP test_bytes_total Bytes de prueba",
+        "# TYPE test_bytes_total counter",
+        'test_bytes_total{route="/a\\"b"} 1',
+        'test_bytes_total{route="/api/file"} 8000',
+    ]
+    assert counter.render() == counter.render()
+
+
+def test_histogram_and_gauge_render():
+    histogram = Histogram("test_seconds", "Latencia", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "GetObject")
+
+    gauge = Gauge("test_in_flight", "En curso")
+    gauge.inc()
+    thread = threading.Thread(target=gauge.dec)
+    thread.start()
+    thread.join()
+
+    assert histogram.render().splitlines()[2:] == [
+        'test_seconds_bucket{op="GetObject",le="0.1"} 2',
+        'test_seconds_bucket{op="GetObject",le="1.0"} 3',
+        'test_seconds_bucket{op="GetObject",le="+Inf"} 4',
+        'test_seconds_sum{op="GetObject"} 3.65',
+        'test_seconds_count{op="GetObject"} 4',
+    ]
+    assert gauge.render().splitlines()[-1] == "test_in_flight 0"
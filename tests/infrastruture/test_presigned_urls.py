@@ -0,0 +1,31 @@
+import time
+
+from src.infrastructure import presigned_urls
+from src.infrastructure.presigned_urls import PresignedUrlCache
+
+
+class FakeS3Client:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.calls += 1
+        return f"https://{Params['Bucket']}/{Params['Key']}?sig={self.calls}"
+
+
+def test_presigned_url_is_reused_until_refresh_margin(monkeypatch):
+    s3_client = FakeS3Client()
+    monkeypatch.setattr(presigned_urls, "get_s3_client", lambda: s3_client)
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = PresignedUrlCache(expiration=300, refresh_margin=60, max_items=10)
+
+    url, expires_in = cache.get_url("bucket", "video.mp4")
+    assert expires_in == 240
+    now[0] += 200
+    assert cache.get_url("bucket", "video.mp4") == (url, 40)
+    assert cache.get_url("bucket", "otro.mp4")[0] != url
+
+    now[0] += 41
+    assert cache.get_url("bucket", "video.mp4")[0] != url
+    assert s3_client.calls == 3
@@ -0,0 +1,41 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.infrastructure.read_ahead_buffer import ReadAheadBuffer
+
+
+def test_read_ahead_buffer_waits_for_pending_segments():
+    buffer = ReadAheadBuffer(max_bytes=100, idle_ttl=60)
+    release = threading.Event()
+
+    def load():
+        release.wait(5)
+        return [b"segmento 1", b"segmento 2"]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        buffer.schedule(["s1", "s2"], load, executor)
+        assert buffer.contains("s1")
+        release.set()
+        assert buffer.get("s2", timeout=5) == b"segmento 2"
+
+    assert buffer.get("s1") == b"segmento 1"
+    assert buffer.get("s3") is None
+
+
+def test_read_ahead_buffer_memory_budget_and_idle_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    buffer = ReadAheadBuffer(max_bytes=20, idle_ttl=30)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        buffer.schedule(["a", "b"], lambda: [b"0" * 10, b"1" * 10], executor)
+    buffer.get("a")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        buffer.schedule(["c"], lambda: [b"2" * 10], executor)
+
+    assert buffer.get("b") is None
+    assert buffer.get("a") == b"0" * 10
+
+    now[0] += 31
+    assert buffer.get("c") is None
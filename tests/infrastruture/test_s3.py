@@ -0,0 +1,27 @@
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+from src.infrastructure import s3
+
+
+def test_upload_stream_aborts_multipart_upload_when_a_part_fails():
+    client = MagicMock()
+    client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+
+    def upload_part(PartNumber, **kwargs):
+        if PartNumber == 2:
+            raise ClientError({"Error": {"Code": "InternalError"}}, "UploadPart")
+        return {"ETag": f'"{PartNumber}"'}
+
+    client.upload_part.side_effect = upload_part
+    chunks = [b"a" * 10, b"b" * 10, b"c" * 10, b"d" * 5]
+
+    with patch.object(s3, "get_s3_client", return_value=client):
+        result = s3.upload_stream(chunks, "bucket", "big.bin", 10, 2)
+
+    assert result == "ClientError"
+    client.abort_multipart_upload.assert_called_once_with(
+        Bucket="bucket", Key="big.bin", UploadId="upload-1"
+    )
+    client.complete_multipart_upload.assert_not_called()
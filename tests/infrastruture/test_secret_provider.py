@@ -0,0 +1,33 @@
+import json
+import time
+
+from src.infrastructure.secret_provider import SecretProvider
+
+
+def test_secret_provider_keeps_previous_value_after_rotation():
+    values = iter([{"k": "old"}, {"k": "new"}])
+    provider = SecretProvider("jwt", lambda path: next(values), ttl=0)
+
+    assert provider.versions() == [{"k": "old"}]
+    # La segunda consulta ya vencida dispara el refresco en segundo plano
+    provider.get()
+    deadline = time.time() + 2
+    while provider.get() != {"k": "new"} and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert provider.versions() == [{"k": "new"}, {"k": "old"}]
+
+
+def test_secret_provider_starts_from_cache_file(tmp_path):
+    cache_file = str(tmp_path / "secret.json")
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        return {"k": "value"}
+
+    SecretProvider("jwt", loader, cache_file=cache_file).get()
+    assert SecretProvider("jwt", loader, cache_file=cache_file).get() == {"k": "value"}
+    assert calls == ["jwt"]
+    with open(cache_file) as file:
+        assert json.load(file)["value"] == {"k": "value"}